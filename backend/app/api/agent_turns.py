@@ -0,0 +1,136 @@
+"""
+Per-connection tracking of in-flight agent turns.
+
+A new utterance arriving while the agent is still working on an older one is
+handled according to the turn policy:
+
+    supersede   cancel running turns and start the new one (barge-in)
+    queue       run turns one after another in arrival order
+    parallel    run every turn concurrently (replies may arrive out of order)
+
+Cancelling a turn cancels its task; the cancellation propagates through the
+agent runtime into the LangGraph run and any MCP tool call it is awaiting.
+"""
+import asyncio
+import itertools
+import logging
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+TURN_POLICIES = ("supersede", "queue", "parallel")
+
+
+class TurnLimitReached(Exception):
+    """Raised when a connection already has the maximum number of turns in flight."""
+
+
+class AgentTurn(NamedTuple):
+    correlation_id: Optional[str]
+    task: asyncio.Task
+
+
+class AgentTurnTracker:
+    """Owns the agent turn tasks of one websocket connection."""
+
+    def __init__(self, policy: str = "supersede", max_turns: int = 4):
+        """
+        Initialize the tracker.
+
+        Args:
+            policy: One of TURN_POLICIES
+            max_turns: Maximum running plus queued turns (not applicable to supersede)
+
+        Raises:
+            ValueError: If the policy is unknown
+        """
+        if policy not in TURN_POLICIES:
+            raise ValueError(f"Unknown agent turn policy '{policy}', expected one of {', '.join(TURN_POLICIES)}")
+        self.policy = policy
+        self.max_turns = max(1, max_turns)
+        self.turns: Dict[int, AgentTurn] = {}
+        self._ids = itertools.count(1)
+        self._last_task: Optional[asyncio.Task] = None
+        self.closed = False
+
+        # Stats
+        self.started = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    def start(self, run: Callable[[], Awaitable[None]], correlation_id: Optional[str] = None) -> List[Optional[str]]:
+        """
+        Start a new turn according to the policy.
+
+        Args:
+            run: Factory for the turn coroutine (only called once the turn may run)
+            correlation_id: Correlation id of the utterance
+
+        Returns:
+            Correlation ids of turns cancelled to make way for this one
+
+        Raises:
+            TurnLimitReached: If max_turns are already running or queued
+        """
+        if self.closed:
+            # Connection is gone; a late transcription must not start an orphaned turn
+            return []
+        if self.policy != "supersede" and len(self.turns) >= self.max_turns:
+            self.rejected += 1
+            raise TurnLimitReached(f"{len(self.turns)} agent turns already in progress")
+        superseded = self.cancel() if self.policy == "supersede" else []
+
+        previous = self._last_task if self.policy == "queue" else None
+
+        async def run_turn():
+            if previous is not None and not previous.done():
+                # Queued: wait for the previous turn, whatever its outcome
+                await asyncio.wait({previous})
+            await run()
+
+        turn_id = next(self._ids)
+        task = asyncio.create_task(run_turn())
+        self.turns[turn_id] = AgentTurn(correlation_id, task)
+        task.add_done_callback(lambda _: self.turns.pop(turn_id, None))
+        self._last_task = task
+        self.started += 1
+        return superseded
+
+    def cancel(self, correlation_id: Optional[str] = None) -> List[Optional[str]]:
+        """
+        Cancel running and queued turns.
+
+        Args:
+            correlation_id: Only cancel turns for this utterance (None cancels all)
+
+        Returns:
+            Correlation ids of the cancelled turns
+        """
+        cancelled = []
+        for turn in list(self.turns.values()):
+            if correlation_id is not None and turn.correlation_id != correlation_id:
+                continue
+            if turn.task.cancel():
+                cancelled.append(turn.correlation_id)
+        if cancelled:
+            self.cancelled += len(cancelled)
+            logger.info(f"🛑 Cancelled {len(cancelled)} agent turn(s)")
+        return cancelled
+
+    async def close(self):
+        """Cancel every turn and wait for them to unwind (on disconnect)."""
+        self.closed = True
+        self.cancel()
+        tasks = [turn.task for turn in self.turns.values()]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> dict:
+        """Get turn counts for this connection."""
+        return {
+            "policy": self.policy,
+            "active": len(self.turns),
+            "started": self.started,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+        }
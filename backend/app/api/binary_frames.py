@@ -0,0 +1,103 @@
+"""
+Binary websocket frames for /ws/dictate audio.
+
+Layout (all integers unsigned bytes):
+
+    0       version (currently 1)
+    1       message type code (see FRAME_TYPES)
+    2       audio format code (see AUDIO_FORMATS)
+    3       correlation id length N (0-255)
+    4..4+N  correlation id, UTF-8
+    4+N..   audio payload
+"""
+from typing import NamedTuple, Optional
+
+FRAME_VERSION = 1
+HEADER_SIZE = 4
+
+FRAME_TYPES = {
+    1: "audio",
+    2: "audio_chunk",
+    3: "audio_end",
+}
+
+AUDIO_FORMATS = {
+    0: "webm",
+    1: "pcm_f32le",
+    2: "pcm_s16le",
+}
+
+
+class BinaryFrameError(Exception):
+    """Raised when a binary frame has a malformed header."""
+
+
+class BinaryFrame(NamedTuple):
+    message_type: str
+    audio_format: str
+    correlation_id: Optional[str]
+    payload: memoryview
+
+
+def parse_binary_frame(data: bytes) -> BinaryFrame:
+    """
+    Parse a binary frame without copying its payload.
+
+    Args:
+        data: Raw websocket frame bytes
+
+    Returns:
+        BinaryFrame whose payload is a memoryview into data
+
+    Raises:
+        BinaryFrameError: If the header is truncated, uses unknown codes or has
+            a correlation id that isn't UTF-8
+    """
+    view = memoryview(data)
+    if len(view) < HEADER_SIZE:
+        raise BinaryFrameError(f"Binary frame too short ({len(view)} bytes)")
+
+    version, type_code, format_code, corr_len = view[0], view[1], view[2], view[3]
+    if version != FRAME_VERSION:
+        raise BinaryFrameError(f"Unsupported binary frame version: {version}")
+    if type_code not in FRAME_TYPES:
+        raise BinaryFrameError(f"Unknown binary frame type: {type_code}")
+    if format_code not in AUDIO_FORMATS:
+        raise BinaryFrameError(f"Unknown audio format: {format_code}")
+
+    payload_start = HEADER_SIZE + corr_len
+    if len(view) < payload_start:
+        raise BinaryFrameError("Binary frame truncated inside correlation id")
+
+    correlation_id = None
+    if corr_len:
+        try:
+            correlation_id = bytes(view[HEADER_SIZE:payload_start]).decode("utf-8")
+        except UnicodeDecodeError as e:
+            raise BinaryFrameError("Correlation id is not UTF-8") from e
+    return BinaryFrame(
+        message_type=FRAME_TYPES[type_code],
+        audio_format=AUDIO_FORMATS[format_code],
+        correlation_id=correlation_id,
+        payload=view[payload_start:],
+    )
+
+
+def encode_binary_frame(message_type: str, payload: bytes, correlation_id: Optional[str] = None, audio_format: str = "webm") -> bytes:
+    """
+    Build a binary frame (the inverse of parse_binary_frame, used by clients and benchmarks).
+
+    Raises:
+        BinaryFrameError: If the type or format is unknown or the correlation id is too long
+    """
+    type_codes = {name: code for code, name in FRAME_TYPES.items()}
+    format_codes = {name: code for code, name in AUDIO_FORMATS.items()}
+    if message_type not in type_codes:
+        raise BinaryFrameError(f"Unknown binary frame type: {message_type}")
+    if audio_format not in format_codes:
+        raise BinaryFrameError(f"Unknown audio format: {audio_format}")
+    corr = correlation_id.encode("utf-8") if correlation_id else b""
+    if len(corr) > 255:
+        raise BinaryFrameError("Correlation id longer than 255 bytes")
+    header = bytes((FRAME_VERSION, type_codes[message_type], format_codes[audio_format], len(corr)))
+    return header + corr + bytes(payload)
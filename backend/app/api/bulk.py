@@ -0,0 +1,182 @@
+import asyncio
+import json
+import os
+import tarfile
+import tempfile
+import zipfile
+from functools import partial
+from typing import IO, AsyncIterator, Callable, Iterator, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import UploadFile
+from app.config.config import BULK_MAX_FILES, BULK_MAX_ARCHIVE_MB, BULK_MAX_FILE_MB, BULK_MAX_EXTRACTED_MB
+from app.dependencies import get_audio_transcription_service
+from app.services.voice_processing.audio_transcription_service import AudioTranscriptionService
+
+router = APIRouter()
+
+# Archives stay in memory up to this size, then spill to a temporary file
+SPOOL_MEMORY_BYTES = 16 * 1024 * 1024
+MB = 1024 * 1024
+
+
+def _skip_member(name: str) -> bool:
+    """Hidden files and macOS resource forks that archivers add alongside the audio."""
+    return os.path.basename(name).startswith(".") or name.startswith("__MACOSX/")
+
+
+def _archive_members(spool) -> Iterator[Tuple[str, bytes]]:
+    """
+    Open a zip or (optionally compressed) tar archive and iterate its files.
+
+    Raises:
+        ValueError: If the data is neither
+    """
+    spool.seek(0)
+    if zipfile.is_zipfile(spool):
+        archive = zipfile.ZipFile(spool)
+        return _extract(
+            (info.filename, partial(archive.open, info))
+            for info in archive.infolist() if not info.is_dir() and not _skip_member(info.filename)
+        )
+    spool.seek(0)
+    try:
+        archive = tarfile.open(fileobj=spool, mode="r:*")
+    except tarfile.TarError as e:
+        raise ValueError("Body is not a zip or tar archive") from e
+    return _extract(
+        (member.name, partial(archive.extractfile, member))
+        for member in archive if member.isfile() and not _skip_member(member.name)
+    )
+
+
+def _check_size(name: str, size: int, remaining: int) -> int:
+    """
+    Check one file's (uncompressed) size against the per-file and per-request limits.
+
+    Returns:
+        The bytes the request may still use
+
+    Raises:
+        ValueError: If a limit is exceeded
+    """
+    if size > BULK_MAX_FILE_MB * MB:
+        raise ValueError(f"{name} is larger than {BULK_MAX_FILE_MB} MB uncompressed")
+    if size > remaining:
+        raise ValueError(f"Upload is larger than {BULK_MAX_EXTRACTED_MB} MB uncompressed")
+    return remaining - size
+
+
+def _extract(members: Iterator[Tuple[str, Callable[[], IO[bytes]]]]) -> Iterator[Tuple[str, bytes]]:
+    """
+    Read archive members within the file count and uncompressed size limits.
+
+    Sizes are checked on the bytes actually decompressed, since the sizes an
+    archive declares can be forged.
+
+    Raises:
+        ValueError: From the iteration, once a limit is exceeded
+    """
+    remaining = BULK_MAX_EXTRACTED_MB * MB
+    for count, (name, open_member) in enumerate(members, 1):
+        if count > BULK_MAX_FILES:
+            raise ValueError(f"Archive has more than {BULK_MAX_FILES} files")
+        with open_member() as stream:
+            data = stream.read(min(BULK_MAX_FILE_MB * MB, remaining) + 1)
+        remaining = _check_size(name, len(data), remaining)
+        yield name, data
+
+
+async def _read_in_thread(members: Iterator[Tuple[str, bytes]]) -> AsyncIterator[Tuple[str, bytes]]:
+    """Iterate archive members off the event loop (reads may decompress or hit disk)."""
+    while True:
+        member = await asyncio.to_thread(next, members, None)
+        if member is None:
+            return
+        yield member
+
+
+async def _read_uploads(uploads) -> AsyncIterator[Tuple[str, bytes]]:
+    """
+    Read multipart files within the same size limits as archive members.
+
+    Raises:
+        ValueError: From the iteration, once a limit is exceeded
+    """
+    remaining = BULK_MAX_EXTRACTED_MB * MB
+    for upload in uploads:
+        name = upload.filename or ""
+        # Never read more than the limits allow, whatever size the part claims
+        data = await upload.read(min(BULK_MAX_FILE_MB * MB, remaining) + 1)
+        remaining = _check_size(name, len(data), remaining)
+        yield name, data
+
+
+def _check_upload_sizes(uploads):
+    """Reject a multipart upload up front when its parts' sizes are known to exceed the limits."""
+    remaining = BULK_MAX_EXTRACTED_MB * MB
+    for upload in uploads:
+        if upload.size is not None:
+            remaining = _check_size(upload.filename or "", upload.size, remaining)
+
+
+@router.post("/transcribe")
+async def transcribe_bulk(
+    request: Request,
+    format: str = Query("webm", description="Format of files without a raw PCM extension (.f32, .s16, .pcm)"),
+    transcription_service: AudioTranscriptionService = Depends(get_audio_transcription_service)
+):
+    """
+    Transcribe many clips, sent as multipart files or as one zip/tar archive body.
+
+    Results stream back as NDJSON, one line per clip as each length-sorted batch
+    finishes, then a summary line with the throughput in audio-seconds per wall-second.
+    """
+    try:
+        job = transcription_service.create_bulk_job(format)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        if int(request.headers.get("content-length") or 0) > BULK_MAX_ARCHIVE_MB * MB:
+            raise HTTPException(status_code=413, detail=f"Upload larger than {BULK_MAX_ARCHIVE_MB} MB")
+        form = await request.form(max_files=BULK_MAX_FILES)
+        uploads = [value for _, value in form.multi_items() if isinstance(value, UploadFile)]
+        if not uploads:
+            await form.close()
+            raise HTTPException(status_code=400, detail="No files in the multipart upload")
+        try:
+            _check_upload_sizes(uploads)
+        except ValueError as e:
+            await form.close()
+            raise HTTPException(status_code=413, detail=str(e))
+        files = _read_uploads(uploads)
+        cleanup = form.close
+    else:
+        # zip needs random access, so the archive is spooled rather than read while it streams in
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > BULK_MAX_ARCHIVE_MB * MB:
+                spool.close()
+                raise HTTPException(status_code=413, detail=f"Archive larger than {BULK_MAX_ARCHIVE_MB} MB")
+            # Past SPOOL_MEMORY_BYTES writes go to disk (and the first one copies the buffer there)
+            await asyncio.to_thread(spool.write, chunk)
+        try:
+            files = _read_in_thread(await asyncio.to_thread(_archive_members, spool))
+        except ValueError as e:
+            spool.close()
+            raise HTTPException(status_code=400, detail=str(e))
+
+        async def cleanup():
+            spool.close()
+
+    async def lines():
+        try:
+            async for result in job.run(files):
+                yield json.dumps(result) + "\n"
+        finally:
+            await cleanup()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
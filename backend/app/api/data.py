@@ -1,7 +1,32 @@
-from fastapi import APIRouter
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from app.services.transcript import TranscriptService
+from app.dependencies import get_transcript_service
 
 router = APIRouter()
 
 @router.get("/")
 async def read_data():
     return {"message": "Hello from the Data Endpoint"}
+
+# Sync handlers: FastAPI runs them in its threadpool, so SQLite reads don't block the loop
+@router.get("/transcripts")
+def read_transcripts(
+    limit: int = Query(50, ge=1, le=500),
+    before_id: Optional[int] = None,
+    transcript_service: TranscriptService = Depends(get_transcript_service)
+):
+    """Page backwards through transcript history, newest first."""
+    return transcript_service.get_page(limit=limit, before_id=before_id)
+
+@router.get("/transcripts/range")
+def read_transcripts_range(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    after_id: Optional[int] = None,
+    transcript_service: TranscriptService = Depends(get_transcript_service)
+):
+    """Get transcript messages between start (inclusive) and end (exclusive), oldest first."""
+    return transcript_service.get_range(start=start, end=end, limit=limit, after_id=after_id)
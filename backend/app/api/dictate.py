@@ -1,13 +1,26 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-import json
 import logging
-from datetime import datetime
 from typing import Dict, Any
-from app.services.transcript import TranscriptService
 from app.services.agent.agent_service import AgentService
 from app.services.voice_processing.audio_transcription_service import AudioTranscriptionService
-from app.dependencies import get_agent_service, get_audio_transcription_service
+from app.services.voice_processing.streaming_transcriber import StreamingTranscriptionSession
+from app.services.voice_processing.transcription_pool import TranscriptionQueueFull
+from app.config.config import (
+    AGENT_STREAMING, AGENT_TURN_POLICY, AGENT_MAX_TURNS,
+    WS_CONTROL_QUEUE_SIZE, WS_TRANSCRIPT_QUEUE_SIZE, WS_AUDIO_QUEUE_SIZE, WS_STREAM_QUEUE_SIZE, WS_OUTBOX_SIZE,
+    WS_CODEC, WS_LOG_SAMPLE_EVERY, WS_LOG_MAX_CHARS
+)
+from app.api.agent_turns import AgentTurnTracker, TurnLimitReached
+from app.api.binary_frames import BinaryFrame, BinaryFrameError, parse_binary_frame
+from app.api.ws_codec import create_message, is_msgpack_message, json_codec, negotiate_codec
+from app.api.ws_logging import MessageLog
+from app.api.ws_pipeline import MessagePipeline, PRIORITY_CONTROL, PRIORITY_NORMAL
+from app.dependencies import get_agent_service, get_audio_transcription_service, get_transcript_service
+from app.services.metrics import metrics
 import asyncio
+import time
+import uuid
+from collections import OrderedDict
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -16,30 +29,71 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 # Initialize services
-transcript_service = TranscriptService()
-
-def create_message(message_type: str, data: Dict[str, Any], message_id: str = None, correlation_id: str = None) -> Dict[str, Any]:
-    """Create standardized message format"""
-    return {
-        "type": message_type,
-        "id": message_id,
-        "corr": correlation_id,
-        "ts": datetime.now().isoformat(),
-        "data": data
-    }
+transcript_service = get_transcript_service()
+
+# Incoming text frames are JSON whatever codec the connection negotiated
+text_codec = json_codec(WS_CODEC)
+message_log = MessageLog(logger, sample_every=WS_LOG_SAMPLE_EVERY, max_chars=WS_LOG_MAX_CHARS)
+
+# Lane each incoming message type is queued on (anything else goes to "control")
+MESSAGE_LANES = {
+    "ping": "control",
+    "cancel": "control",
+    "transcript": "transcript",
+    "audio": "audio",
+    "audio_chunk": "stream",
+    "audio_end": "stream",
+}
+
+# Incoming types that complete a user utterance; end-to-end latency is measured from their arrival
+UTTERANCE_END_TYPES = {"audio", "audio_end", "transcript"}
+# Utterance start times kept per connection (entries for utterances that never reach the agent age out)
+MAX_TRACKED_UTTERANCES = 64
+
+# Outgoing types sent ahead of regular traffic, and types dropped rather than waited on under load
+CONTROL_MESSAGE_TYPES = {"pong", "error"}
+DROPPABLE_MESSAGE_TYPES = {"partial_transcript"}
 
 async def send_message(websocket: WebSocket, message_type: str, data: Dict[str, Any], message_id: str = None, correlation_id: str = None):
     """Send standardized message to client"""
     message = create_message(message_type, data, message_id, correlation_id)
-    await websocket.send_text(json.dumps(message))
-    logger.info(f"Sent {message_type}: {data}")
+    frame = getattr(websocket.state, "codec", text_codec).encode(message)
+    pipeline = getattr(websocket.state, "pipeline", None)
+    if pipeline is None:
+        await (websocket.send_bytes(frame) if isinstance(frame, bytes) else websocket.send_text(frame))
+    else:
+        # Serialized by the connection's writer task
+        priority = PRIORITY_CONTROL if message_type in CONTROL_MESSAGE_TYPES else PRIORITY_NORMAL
+        await pipeline.send(frame, priority, droppable=message_type in DROPPABLE_MESSAGE_TYPES)
+    message_log.sent(message_type, data)
+
+
+def mark_utterance_start(websocket: WebSocket, message_type: str, correlation_id: str = None):
+    """Remember when the last message of an utterance arrived, for end-to-end latency."""
+    if correlation_id is None or message_type not in UTTERANCE_END_TYPES:
+        return
+    started = websocket.state.utterance_started
+    started[correlation_id] = time.perf_counter()
+    while len(started) > MAX_TRACKED_UTTERANCES:
+        started.popitem(last=False)
+
+
+def observe_utterance_end(websocket: WebSocket, correlation_id: str = None):
+    """Record the time from an utterance's arrival to its final reply."""
+    started = websocket.state.utterance_started.pop(correlation_id, None)
+    if started is not None:
+        metrics.observe("utterance", time.perf_counter() - started, correlation_id)
 
 
 async def process_agent_response(websocket: WebSocket, text: str, agent_service: AgentService, correlation_id: str = None):
     """Process user text with agent and send response back to frontend."""
+    turn_started = time.perf_counter()
     try:
-        # Process with agent service (handles both web actions and general chat)
-        response_text = agent_service.process_text(text)
+        if AGENT_STREAMING:
+            response_text = await stream_agent_response(websocket, text, agent_service, correlation_id)
+        else:
+            # Process with agent service (handles both web actions and general chat) without blocking the loop
+            response_text = await agent_service.aprocess_text(text, websocket.state.session_id)
         
         # Store agent's response
         agent_transcript_data = transcript_service.store_transcript(
@@ -49,9 +103,14 @@ async def process_agent_response(websocket: WebSocket, text: str, agent_service:
         
         # Send agent's response back to frontend
         await send_message(websocket, "transcript", agent_transcript_data, correlation_id=correlation_id)
+        metrics.observe("agent_turn", time.perf_counter() - turn_started, correlation_id)
+        observe_utterance_end(websocket, correlation_id)
+        if metrics.trace_capacity and correlation_id:
+            logger.debug(f"Trace {correlation_id}: {metrics.get_trace(correlation_id)}")
         
     except Exception as e:
         logger.error(f"Error processing agent response: {e}")
+        metrics.increment("agent_turn_failed")
         # Send error message to frontend
         error_transcript_data = transcript_service.store_transcript(
             text=f"Sorry, I encountered an error: {str(e)}",
@@ -59,6 +118,308 @@ async def process_agent_response(websocket: WebSocket, text: str, agent_service:
         )
         await send_message(websocket, "transcript", error_transcript_data, correlation_id=correlation_id)
 
+async def stream_agent_response(websocket: WebSocket, text: str, agent_service: AgentService, correlation_id: str = None) -> str:
+    """Forward agent tokens and tool progress to frontend as they happen; return the final text."""
+    response_text = ""
+    started = time.perf_counter()
+    first_token = True
+    tool_started: Dict[str, float] = {}
+    async for event in agent_service.astream_text(text, websocket.state.session_id):
+        event_type = event["type"]
+        if event_type == "delta":
+            if first_token:
+                metrics.observe("agent_first_token", time.perf_counter() - started, correlation_id)
+                first_token = False
+            await send_message(websocket, "transcript_delta", {"text": event["text"], "sender": "Dictate"}, correlation_id=correlation_id)
+        elif event_type in ("tool_start", "tool_end"):
+            if event_type == "tool_start":
+                tool_started[event["tool"]] = time.perf_counter()
+            elif event["tool"] in tool_started:
+                metrics.observe("tool_call", time.perf_counter() - tool_started.pop(event["tool"]), correlation_id, label=event["tool"])
+            await send_message(websocket, event_type, {k: v for k, v in event.items() if k != "type"}, correlation_id=correlation_id)
+        elif event_type == "final":
+            response_text = event["text"]
+    return response_text
+
+def spawn(websocket: WebSocket, coro) -> asyncio.Task:
+    """Run a background task owned by the connection (cancelled on disconnect)."""
+    task = asyncio.create_task(coro)
+    websocket.state.tasks.add(task)
+    task.add_done_callback(websocket.state.tasks.discard)
+    return task
+
+
+async def start_agent_turn(websocket: WebSocket, text: str, agent_service: AgentService, correlation_id: str = None):
+    """Hand user text to the agent under the connection's turn policy, reporting superseded turns."""
+    try:
+        superseded = websocket.state.turns.start(
+            lambda: process_agent_response(websocket, text, agent_service, correlation_id),
+            correlation_id
+        )
+    except TurnLimitReached as e:
+        await send_busy(websocket, str(e), correlation_id)
+        return
+    for cancelled_id in superseded:
+        metrics.increment("agent_cancelled", label="superseded")
+        await send_message(websocket, "agent_cancelled", {"reason": "superseded"}, correlation_id=cancelled_id)
+
+
+async def send_busy(websocket: WebSocket, reason: str, correlation_id: str = None):
+    """Tell the client a message was rejected because the connection is overloaded."""
+    metrics.increment("busy")
+    await send_message(websocket, "error", {
+        "code": "BUSY",
+        "message": reason
+    }, correlation_id=correlation_id)
+
+
+async def send_partial_transcript(websocket: WebSocket, stream: StreamingTranscriptionSession, correlation_id: str = None):
+    """Decode the newest audio of a stream and send the interim transcript to frontend."""
+    try:
+        with metrics.timer("partial_transcript", correlation_id):
+            result = await stream.update()
+        if result["text"]:
+            await send_message(websocket, "partial_transcript", {**result, "sender": "User"}, correlation_id=correlation_id)
+    except Exception as e:
+        # Partials are best-effort; the final pass on audio_end covers the same audio
+        logger.warning(f"Skipping partial transcript: {e}")
+
+
+async def send_user_transcript(websocket: WebSocket, transcribed_text: str, agent_service: AgentService, correlation_id: str = None):
+    """Store and echo transcribed user speech, then process it with agent in the background."""
+    # Store transcribed text as user message
+    transcript_data = transcript_service.store_transcript(
+        text=transcribed_text,
+        sender="User"
+    )
+    
+    # Send transcribed text back to frontend
+    await send_message(websocket, "transcript", transcript_data, correlation_id=correlation_id)
+    
+    # Process with agent service asynchronously (non-blocking)
+    logger.info(f"Processing transcribed text with agent: {transcribed_text}")
+    await start_agent_turn(websocket, transcribed_text, agent_service, correlation_id)
+
+
+async def send_transcription_error(websocket: WebSocket, error: Exception, correlation_id: str = None):
+    """Report a failed transcription to frontend as a Dictate message."""
+    metrics.increment("transcription_failed")
+    websocket.state.utterance_started.pop(correlation_id, None)
+    error_transcript_data = transcript_service.store_transcript(
+        text=f"Audio transcription failed: {str(error)}",
+        sender="Dictate"
+    )
+    await send_message(websocket, "transcript", error_transcript_data, correlation_id=correlation_id)
+
+
+async def handle_audio(websocket: WebSocket, audio_data, audio_format: str, audio_service: AudioTranscriptionService, agent_service: AgentService, correlation_id: str = None):
+    """Transcribe a complete clip and hand the text to the agent."""
+    logger.info("Processing audio message")
+    
+    try:
+        with metrics.timer("transcribe", correlation_id):
+            transcribed_text = await audio_service.transcribe_audio(audio_data, audio_format)
+    except TranscriptionQueueFull as e:
+        websocket.state.utterance_started.pop(correlation_id, None)
+        await send_busy(websocket, str(e), correlation_id)
+        return
+    except Exception as e:
+        logger.error(f"Error processing audio message: {e}")
+        await send_transcription_error(websocket, e, correlation_id)
+        return
+    
+    await send_user_transcript(websocket, transcribed_text, agent_service, correlation_id)
+
+
+async def handle_audio_chunk(websocket: WebSocket, streams: Dict[str, StreamingTranscriptionSession], chunk, audio_format: str, audio_service: AudioTranscriptionService, agent_service: AgentService, correlation_id: str = None):
+    """Append streamed audio and emit a partial transcript when one is due."""
+    stream_id = correlation_id or "default"
+    stream = streams.get(stream_id)
+    if stream is None:
+        try:
+            stream = streams[stream_id] = audio_service.create_stream(audio_format)
+        except Exception as e:
+            await send_message(websocket, "error", {
+                "code": "INVALID_AUDIO",
+                "message": str(e)
+            }, correlation_id=correlation_id)
+            return
+    
+    stream.add_chunk(chunk)
+    
+    if stream.exhausted:
+        # Too long for one utterance: finalize it as if audio_end had arrived
+        logger.info(f"Audio stream {stream_id} reached its length limit, finalizing")
+        streams.pop(stream_id, None)
+        spawn(websocket, finish_audio_stream(websocket, stream, agent_service, correlation_id))
+        return
+    
+    if stream.partial_due():
+        spawn(websocket, send_partial_transcript(websocket, stream, correlation_id))
+
+
+async def handle_audio_end(websocket: WebSocket, streams: Dict[str, StreamingTranscriptionSession], agent_service: AgentService, correlation_id: str = None):
+    """End of utterance: final decode of the uncommitted tail, then agent."""
+    stream = streams.pop(correlation_id or "default", None)
+    if stream is None:
+        await send_message(websocket, "error", {
+            "code": "UNKNOWN_STREAM",
+            "message": "audio_end received without preceding audio_chunk"
+        }, correlation_id=correlation_id)
+        return
+    
+    spawn(websocket, finish_audio_stream(websocket, stream, agent_service, correlation_id))
+
+
+async def finish_audio_stream(websocket: WebSocket, stream: StreamingTranscriptionSession, agent_service: AgentService, correlation_id: str = None):
+    """Finalize a streamed utterance, send the final transcript and hand it to the agent."""
+    try:
+        with metrics.timer("stream_finalize", correlation_id):
+            result = await stream.update(final=True)
+        transcribed_text = result["text"]
+        if not transcribed_text:
+            raise Exception("No speech detected in audio data")
+    except TranscriptionQueueFull as e:
+        websocket.state.utterance_started.pop(correlation_id, None)
+        await send_busy(websocket, str(e), correlation_id)
+        return
+    except Exception as e:
+        logger.error(f"Error finishing audio stream: {e}")
+        await send_transcription_error(websocket, e, correlation_id)
+        return
+    
+    await send_user_transcript(websocket, transcribed_text, agent_service, correlation_id)
+
+
+async def dispatch_binary_frame(websocket: WebSocket, pipeline: MessagePipeline, data: bytes):
+    """Reader side: parse a binary audio frame header and queue the frame on its lane."""
+    try:
+        with metrics.timer("frame_parse"):
+            frame = parse_binary_frame(data)
+    except BinaryFrameError as e:
+        metrics.increment("invalid_frame")
+        await send_message(websocket, "error", {
+            "code": "INVALID_FRAME",
+            "message": str(e)
+        })
+        return
+    
+    message_log.received(frame.message_type, len(data))
+    mark_utterance_start(websocket, frame.message_type, frame.correlation_id)
+    lane = MESSAGE_LANES[frame.message_type]
+    if not pipeline.submit(lane, frame):
+        await send_busy(websocket, f"Too many pending {lane} messages, {frame.message_type} frame dropped", frame.correlation_id)
+
+
+async def dispatch_message(websocket: WebSocket, pipeline: MessagePipeline, data, codec):
+    """Reader side: decode a JSON or MessagePack message and queue it on its lane."""
+    try:
+        message = codec.decode(data)
+        if not isinstance(message, dict):
+            raise ValueError("message must be an object")
+    except Exception as e:
+        await send_message(websocket, "error", {
+            "code": "INVALID_JSON" if isinstance(data, str) else "INVALID_MESSAGE",
+            "message": f"Invalid {codec.name} message: {str(e)}"
+        })
+        return
+    
+    message_type = message.get("type")
+    message_log.received(message_type, len(data))
+    mark_utterance_start(websocket, message_type, message.get("corr"))
+    lane = MESSAGE_LANES.get(message_type, "control")
+    if not pipeline.submit(lane, message):
+        await send_busy(websocket, f"Too many pending {lane} messages, {message_type} message dropped", message.get("corr"))
+
+
+async def handle_binary_frame(websocket: WebSocket, frame: BinaryFrame, streams: Dict[str, StreamingTranscriptionSession], audio_service: AudioTranscriptionService, agent_service: AgentService):
+    """Handle a binary audio frame; the payload is passed on as a memoryview."""
+    if frame.message_type == "audio":
+        await handle_audio(websocket, frame.payload, frame.audio_format, audio_service, agent_service, frame.correlation_id)
+    elif frame.message_type == "audio_chunk":
+        await handle_audio_chunk(websocket, streams, frame.payload, frame.audio_format, audio_service, agent_service, frame.correlation_id)
+    elif frame.message_type == "audio_end":
+        await handle_audio_end(websocket, streams, agent_service, frame.correlation_id)
+
+
+async def handle_text_frame(websocket: WebSocket, message: Dict[str, Any], streams: Dict[str, StreamingTranscriptionSession], audio_service: AudioTranscriptionService, agent_service: AgentService):
+    """Handle a parsed JSON message."""
+    message_type = message.get("type")
+    message_data = message.get("data", {})
+    correlation_id = message.get("corr")
+    
+    if message_type == "transcript":
+        # Process transcript message
+        logger.info("Processing transcript message")
+        
+        # Store transcript with sender
+        sender = message_data.get("sender")
+        if sender is None:
+            logger.error("Missing 'sender' field in transcript message, defaulting to 'User'")
+            sender = "User"
+        
+        text = message_data.get("text", "")
+        if not text:
+            logger.error("Missing or empty 'text' field in transcript message, defaulting to empty string")
+        
+        # Store the user's message
+        transcript_data = transcript_service.store_transcript(
+            text=text,
+            sender=sender
+        )
+        
+        # Send user's message back to frontend
+        await send_message(websocket, "transcript", transcript_data, correlation_id=correlation_id)
+        
+        # If it's a user message, process it with agent
+        if sender == "User":
+            logger.info(f"Processing user message with agent: {text}")
+            
+            # Process with agent service asynchronously (non-blocking)
+            await start_agent_turn(websocket, text, agent_service, correlation_id)
+    
+    elif message_type in ("audio", "audio_chunk"):
+        # Legacy path: base64 audio inside JSON
+        try:
+            with metrics.timer("base64_decode", correlation_id):
+                audio_data = audio_service.decode_audio_payload(message_data)
+        except Exception as e:
+            if message_type == "audio":
+                await send_transcription_error(websocket, e, correlation_id)
+            else:
+                await send_message(websocket, "error", {
+                    "code": "INVALID_AUDIO",
+                    "message": str(e)
+                }, correlation_id=correlation_id)
+            return
+        
+        audio_format = message_data.get("format", "webm")
+        if message_type == "audio":
+            await handle_audio(websocket, audio_data, audio_format, audio_service, agent_service, correlation_id)
+        else:
+            await handle_audio_chunk(websocket, streams, audio_data, audio_format, audio_service, agent_service, correlation_id)
+    
+    elif message_type == "audio_end":
+        await handle_audio_end(websocket, streams, agent_service, correlation_id)
+    
+    elif message_type == "cancel":
+        # Explicit barge-in: stop the turn for this utterance, or every turn without a corr
+        for cancelled_id in websocket.state.turns.cancel(correlation_id):
+            metrics.increment("agent_cancelled", label="cancelled")
+            await send_message(websocket, "agent_cancelled", {"reason": "cancelled"}, correlation_id=cancelled_id)
+    
+    elif message_type == "ping":
+        # Respond to ping
+        await send_message(websocket, "pong", {"status": "alive"}, correlation_id=correlation_id)
+    
+    else:
+        # Unknown message type
+        await send_message(websocket, "error", {
+            "code": "UNKNOWN_MESSAGE_TYPE",
+            "message": f"Unknown message type: {message_type}"
+        }, correlation_id=correlation_id)
+
+
 @router.websocket("/dictate")
 async def websocket_dictate(
     websocket: WebSocket, 
@@ -66,96 +427,51 @@ async def websocket_dictate(
     audio_service: AudioTranscriptionService = Depends(get_audio_transcription_service)
 ):
     await websocket.accept()
-    logger.info("WebSocket client connected to /dictate")
+    # Each connection gets its own agent session (memory + isolated browser)
+    websocket.state.session_id = uuid.uuid4().hex
+    logger.info(f"WebSocket client connected to /dictate (session {websocket.state.session_id})")
+    # In-flight agent turns and other background work owned by this connection
+    websocket.state.turns = AgentTurnTracker(AGENT_TURN_POLICY, AGENT_MAX_TURNS)
+    websocket.state.tasks = set()
+    websocket.state.utterance_started = OrderedDict()
+    
+    # Open streaming utterances on this connection, keyed by correlation id
+    streams: Dict[str, StreamingTranscriptionSession] = {}
+    
+    async def handle_queued(lane: str, item):
+        if isinstance(item, BinaryFrame):
+            await handle_binary_frame(websocket, item, streams, audio_service, agent_service)
+        else:
+            await handle_text_frame(websocket, item, streams, audio_service, agent_service)
+    
+    # MessagePack is opt-in per connection; everything else speaks JSON
+    websocket.state.codec = codec = negotiate_codec(websocket.query_params.get("codec"), WS_CODEC)
+    
+    # The loop below only reads and routes; per-lane workers handle messages and one writer sends
+    pipeline = MessagePipeline(websocket, handle_queued, {
+        "control": WS_CONTROL_QUEUE_SIZE,
+        "transcript": WS_TRANSCRIPT_QUEUE_SIZE,
+        "audio": WS_AUDIO_QUEUE_SIZE,
+        "stream": WS_STREAM_QUEUE_SIZE,
+    }, outbox_size=WS_OUTBOX_SIZE)
+    websocket.state.pipeline = pipeline
+    pipeline.start()
+    flush_timeout = None
     
     try:
         while True:
-            # Wait for message from client
-            data = await websocket.receive_text()
-            logger.info(f"Received: {data}")
+            # Wait for message from client (JSON text frames or binary audio frames)
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
             
-            try:
-                message = json.loads(data)
-                message_type = message.get("type")
-                message_data = message.get("data", {})
-                correlation_id = message.get("corr")
-                
-                if message_type == "transcript":
-                    # Process transcript message
-                    logger.info("Processing transcript message")
-                    
-                    # Store transcript with sender
-                    sender = message_data.get("sender")
-                    if sender is None:
-                        logger.error("Missing 'sender' field in transcript message, defaulting to 'User'")
-                        sender = "User"
-                    
-                    text = message_data.get("text", "")
-                    if not text:
-                        logger.error("Missing or empty 'text' field in transcript message, defaulting to empty string")
-                    
-                    # Store the user's message
-                    transcript_data = transcript_service.store_transcript(
-                        text=text,
-                        sender=sender
-                    )
-                    
-                    # Send user's message back to frontend
-                    await send_message(websocket, "transcript", transcript_data, correlation_id=correlation_id)
-                    
-                    # If it's a user message, process it with agent
-                    if sender == "User":
-                        logger.info(f"Processing user message with agent: {text}")
-                        
-                        # Process with agent service asynchronously (non-blocking)
-                        asyncio.create_task(process_agent_response(websocket, text, agent_service, correlation_id))
-                
-                elif message_type == "audio":
-                    # Process audio message for transcription
-                    logger.info("Processing audio message")
-                    
-                    try:
-                        # Use audio transcription service
-                        transcribed_text = await audio_service.transcribe_audio_message(message_data)
-                        
-                        # Store transcribed text as user message
-                        transcript_data = transcript_service.store_transcript(
-                            text=transcribed_text,
-                            sender="User"
-                        )
-                        
-                        # Send transcribed text back to frontend
-                        await send_message(websocket, "transcript", transcript_data, correlation_id=correlation_id)
-                        
-                        # Process with agent service asynchronously (non-blocking)
-                        logger.info(f"Processing transcribed text with agent: {transcribed_text}")
-                        asyncio.create_task(process_agent_response(websocket, transcribed_text, agent_service, correlation_id))
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing audio message: {e}")
-                        # Send error message to frontend
-                        error_transcript_data = transcript_service.store_transcript(
-                            text=f"Audio transcription failed: {str(e)}",
-                            sender="Dictate"
-                        )
-                        await send_message(websocket, "transcript", error_transcript_data, correlation_id=correlation_id)
-                
-                elif message_type == "ping":
-                    # Respond to ping
-                    await send_message(websocket, "pong", {"status": "alive"}, correlation_id=correlation_id)
-                
+            if frame.get("bytes") is not None:
+                if codec.binary and is_msgpack_message(frame["bytes"]):
+                    await dispatch_message(websocket, pipeline, frame["bytes"], codec)
                 else:
-                    # Unknown message type
-                    await send_message(websocket, "error", {
-                        "code": "UNKNOWN_MESSAGE_TYPE",
-                        "message": f"Unknown message type: {message_type}"
-                    }, correlation_id=correlation_id)
-                    
-            except json.JSONDecodeError as e:
-                await send_message(websocket, "error", {
-                    "code": "INVALID_JSON",
-                    "message": f"Invalid JSON: {str(e)}"
-                })
+                    await dispatch_binary_frame(websocket, pipeline, frame["bytes"])
+            elif frame.get("text") is not None:
+                await dispatch_message(websocket, pipeline, frame["text"], text_codec)
             
     except WebSocketDisconnect:
         logger.info("WebSocket client disconnected")
@@ -166,8 +482,19 @@ async def websocket_dictate(
                 "code": "INTERNAL_ERROR",
                 "message": str(e)
             })
+            flush_timeout = 1.0
         except:
             pass
     finally:
-        # WebSocket connection closed
-        pass
\ No newline at end of file
+        # WebSocket connection closed; drop unfinished streams, stop orphaned work and release the agent session
+        await pipeline.close(flush_timeout)
+        streams.clear()
+        for task in list(websocket.state.tasks):
+            task.cancel()
+        asyncio.create_task(close_connection(websocket, agent_service))
+
+
+async def close_connection(websocket: WebSocket, agent_service: AgentService):
+    """Cancel the connection's agent turns, then release its agent session."""
+    await websocket.state.turns.close()
+    await agent_service.close_session(websocket.state.session_id)
\ No newline at end of file
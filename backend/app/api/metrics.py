@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.dependencies import get_agent_service, get_audio_transcription_service
+from app.services.agent.agent_service import AgentService
+from app.services.metrics import metrics
+
+router = APIRouter()
+
+@router.get("", response_class=PlainTextResponse)
+async def read_metrics():
+    """Per-stage timing histograms and event counters in the Prometheus text format."""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@router.get("/summary")
+async def read_metrics_summary():
+    """Count, mean and estimated p50/p95/p99 per stage, and event counts."""
+    return metrics.get_summary()
+
+@router.get("/transcription")
+async def read_transcription_stats():
+    """Transcription engine, cascade escalation, worker pool, cache and daemon stats."""
+    service = get_audio_transcription_service()
+    info = service.get_service_info()
+    info["daemon"] = await service.get_daemon_stats()
+    return info
+
+@router.get("/agent")
+async def read_agent_stats(agent_service: AgentService = Depends(get_agent_service)):
+    """Agent sessions, fast-path hit rates and browser pool stats."""
+    return agent_service.get_stats()
+
+@router.get("/traces/{corr}")
+async def read_trace(corr: str):
+    """Stages recorded for one request (requires DICTATE_TRACE_CAPACITY > 0)."""
+    if not metrics.trace_capacity:
+        raise HTTPException(status_code=404, detail="Request tracing is disabled")
+    trace = metrics.get_trace(corr)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"No trace for {corr}")
+    return {"corr": corr, "stages": trace}
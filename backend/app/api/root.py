@@ -1,7 +1,15 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.services.readiness import readiness
 
 router = APIRouter()
 
 @router.get("/")
 async def read_root():
     return {"message": "Hello World"}
+
+@router.get("/ready")
+async def read_readiness():
+    """Report per-component warm-up state; 503 until every component is ready."""
+    status = readiness.get_status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
@@ -0,0 +1,114 @@
+"""
+Message codecs for /ws/dictate.
+
+    json      stdlib json (default)
+    orjson    same wire format, encoded with orjson when it's installed
+    msgpack   MessagePack in binary frames, negotiated by the client with ?codec=msgpack
+
+Incoming text frames are always JSON. With msgpack, incoming binary frames
+that start with a MessagePack map marker are messages; everything else is a
+binary audio frame (those start with the frame version byte).
+"""
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to stdlib json
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: msgpack negotiation is refused without it
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+Frame = Union[str, bytes]
+
+
+def create_message(message_type: str, data: Dict[str, Any], message_id: str = None, correlation_id: str = None) -> Dict[str, Any]:
+    """Create standardized message format"""
+    return {
+        "type": message_type,
+        "id": message_id,
+        "corr": correlation_id,
+        "ts": datetime.now().isoformat(),
+        "data": data
+    }
+
+
+# Built once: json.dumps with any keyword arguments constructs a new encoder per call
+_json_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class JsonCodec:
+    """Stdlib JSON in text frames."""
+
+    name = "json"
+    binary = False
+
+    def encode(self, message: Dict[str, Any]) -> Frame:
+        return _json_encoder.encode(message)
+
+    def decode(self, data: Frame) -> Dict[str, Any]:
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    """JSON in text frames, encoded and parsed with orjson."""
+
+    name = "orjson"
+
+    def encode(self, message: Dict[str, Any]) -> Frame:
+        return orjson.dumps(message, default=str).decode()
+
+    def decode(self, data: Frame) -> Dict[str, Any]:
+        return orjson.loads(data)
+
+
+class MsgpackCodec:
+    """MessagePack in binary frames."""
+
+    name = "msgpack"
+    binary = True
+
+    def encode(self, message: Dict[str, Any]) -> Frame:
+        return msgpack.packb(message, default=str)
+
+    def decode(self, data: Frame) -> Dict[str, Any]:
+        return msgpack.unpackb(data)
+
+
+def is_msgpack_message(data: bytes) -> bool:
+    """Whether a binary frame is a MessagePack map (fixmap, map16 or map32)."""
+    return bool(data) and (0x80 <= data[0] <= 0x8f or data[0] in (0xde, 0xdf))
+
+
+def json_codec(preferred: str = "json") -> JsonCodec:
+    """The JSON codec to use; 'orjson' silently falls back to stdlib json when unavailable."""
+    if preferred == "orjson" and orjson is not None:
+        return OrjsonCodec()
+    if preferred not in ("json", "orjson"):
+        logger.warning(f"Unknown websocket JSON codec '{preferred}', using json")
+    return JsonCodec()
+
+
+def negotiate_codec(requested: Optional[str], default: str = "json"):
+    """
+    Pick the codec for a connection.
+
+    Args:
+        requested: Codec asked for by the client (?codec=...), if any
+        default: Server-configured JSON codec ('json' or 'orjson')
+
+    Returns:
+        Codec instance; unsupported requests fall back to JSON
+    """
+    if requested == "msgpack":
+        if msgpack is not None:
+            return MsgpackCodec()
+        logger.warning("Client asked for msgpack but it isn't installed, using JSON")
+    return json_codec(default)
@@ -0,0 +1,79 @@
+"""
+Cheap logging of /ws/dictate traffic.
+
+Messages are logged lazily (nothing is formatted unless the record is
+emitted), high-frequency types are sampled at DEBUG and payloads are
+truncated, so streaming deltas don't pay for serialization twice.
+"""
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional
+
+# Types sent or received many times per utterance; only every Nth one is logged, at DEBUG
+FREQUENT_MESSAGE_TYPES = frozenset({
+    "transcript_delta", "partial_transcript", "tool_start", "tool_end",
+    "audio_chunk", "ping", "pong",
+})
+
+
+class _Preview:
+    """Defers repr() of a payload until a handler formats the record."""
+
+    __slots__ = ("value", "max_chars")
+
+    def __init__(self, value: Any, max_chars: int):
+        self.value = value
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        value = self.value
+        if isinstance(value, dict):
+            # Cut long fields before repr so a large transcript isn't copied in full first
+            value = {k: v[:self.max_chars] if isinstance(v, str) else v for k, v in value.items()}
+        text = repr(value)
+        if len(text) > self.max_chars:
+            return f"{text[:self.max_chars]}..."
+        return text
+
+
+class MessageLog:
+    """Sampled, size-truncated logger for websocket messages."""
+
+    def __init__(self, logger: logging.Logger, sample_every: int = 50, max_chars: int = 200,
+                 frequent_types: Iterable[str] = FREQUENT_MESSAGE_TYPES):
+        """
+        Initialize the message log.
+
+        Args:
+            logger: Logger to write to
+            sample_every: Log one in this many frequent messages (0 disables them)
+            max_chars: Payload previews are cut to this length
+            frequent_types: Message types that are sampled and logged at DEBUG
+        """
+        self.logger = logger
+        self.sample_every = sample_every
+        self.max_chars = max_chars
+        self.frequent_types = frozenset(frequent_types)
+        self._counts: Dict[str, int] = defaultdict(int)
+
+    def _level(self, message_type: Optional[str]) -> Optional[int]:
+        """Level to log this message at, or None to skip it."""
+        if message_type not in self.frequent_types:
+            return logging.INFO
+        if self.sample_every <= 0:
+            return None
+        count = self._counts[message_type]
+        self._counts[message_type] = count + 1
+        return logging.DEBUG if count % self.sample_every == 0 else None
+
+    def sent(self, message_type: str, data: Any):
+        """Log an outgoing message."""
+        level = self._level(message_type)
+        if level is not None and self.logger.isEnabledFor(level):
+            self.logger.log(level, "Sent %s: %s", message_type, _Preview(data, self.max_chars))
+
+    def received(self, message_type: Optional[str], size: int):
+        """Log an incoming message by type and size (payloads are never logged)."""
+        level = self._level(message_type)
+        if level is not None and self.logger.isEnabledFor(level):
+            self.logger.log(level, "Received %s message (%d bytes)", message_type, size)
@@ -0,0 +1,154 @@
+"""
+Per-connection websocket message pipeline.
+
+The reader only parses frames and routes them into bounded per-type lanes.
+Each lane has its own worker, so a slow lane (a clip being transcribed) never
+holds up another (a ping). All sends go through one writer task draining a
+prioritized, bounded outbox: control replies jump ahead of regular traffic,
+best-effort messages are dropped when the outbox is full and everything else
+waits for room (backpressure on the producer).
+"""
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from fastapi import WebSocket
+
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Outbox priorities (lower is sent first); messages of equal priority keep their order
+PRIORITY_CONTROL = 0
+PRIORITY_NORMAL = 1
+
+
+class MessagePipeline:
+    """Reader-side lanes and a single serialized writer for one websocket connection."""
+
+    def __init__(self, websocket: WebSocket, handler: Callable[[str, Any], Awaitable[None]], lanes: Dict[str, int], outbox_size: int = 256):
+        """
+        Initialize the pipeline (no tasks run until start()).
+
+        Args:
+            websocket: Connection to write to
+            handler: Coroutine called as handler(lane, item) for each queued item
+            lanes: Lane name to maximum number of queued items
+            outbox_size: Maximum number of queued outgoing messages
+        """
+        self.websocket = websocket
+        self.handler = handler
+        self.lanes: Dict[str, asyncio.Queue] = {name: asyncio.Queue(maxsize=size) for name, size in lanes.items()}
+        self.outbox: asyncio.PriorityQueue = asyncio.PriorityQueue(maxsize=outbox_size)
+        self._seq = itertools.count()
+        self._tasks: List[asyncio.Task] = []
+
+        # Stats
+        self.rejected: Dict[str, int] = {name: 0 for name in lanes}
+        self.dropped_sends = 0
+        self.sent = 0
+
+    def start(self):
+        """Start the writer and one worker per lane."""
+        self._tasks.append(asyncio.create_task(self._write_loop()))
+        for name, lane in self.lanes.items():
+            self._tasks.append(asyncio.create_task(self._work_loop(name, lane)))
+
+    def submit(self, lane: str, item: Any) -> bool:
+        """
+        Queue an item on a lane without waiting.
+
+        Returns:
+            False if the lane is full (the caller reports the overload)
+        """
+        try:
+            self.lanes[lane].put_nowait((time.perf_counter(), item))
+            return True
+        except asyncio.QueueFull:
+            self.rejected[lane] += 1
+            metrics.increment("ws_rejected", label=lane)
+            return False
+
+    async def send(self, frame: Union[str, bytes], priority: int = PRIORITY_NORMAL, droppable: bool = False):
+        """
+        Queue an outgoing frame.
+
+        Args:
+            frame: Encoded message (text, or bytes for binary codecs)
+            priority: PRIORITY_CONTROL or PRIORITY_NORMAL
+            droppable: Drop the message instead of waiting when the outbox is full
+        """
+        entry = (priority, next(self._seq), time.perf_counter(), frame)
+        if droppable:
+            try:
+                self.outbox.put_nowait(entry)
+            except asyncio.QueueFull:
+                self.dropped_sends += 1
+                metrics.increment("ws_send_dropped")
+            return
+        await self.outbox.put(entry)
+
+    async def _write_loop(self):
+        """Single writer: sends are serialized in priority order."""
+        while True:
+            _, _, queued_at, frame = await self.outbox.get()
+            metrics.observe("outbox_wait", time.perf_counter() - queued_at)
+            try:
+                # Time the socket write itself: a slow client shows up here, not in outbox_wait
+                with metrics.timer("ws_send"):
+                    if isinstance(frame, bytes):
+                        await self.websocket.send_bytes(frame)
+                    else:
+                        await self.websocket.send_text(frame)
+                self.sent += 1
+            except Exception as e:
+                # Socket is gone; the reader sees the disconnect and closes the pipeline
+                logger.debug(f"Websocket writer stopped: {e}")
+                return
+            finally:
+                self.outbox.task_done()
+
+    async def _work_loop(self, name: str, lane: asyncio.Queue):
+        """Process one lane's items in order."""
+        while True:
+            queued_at, item = await lane.get()
+            metrics.observe("queue_wait", time.perf_counter() - queued_at, label=name)
+            try:
+                await self.handler(name, item)
+            except Exception as e:
+                logger.error(f"Error handling {name} message: {e}")
+            finally:
+                lane.task_done()
+
+    async def close(self, flush_timeout: Optional[float] = None):
+        """
+        Stop the workers and the writer.
+
+        Args:
+            flush_timeout: Seconds to wait for queued sends first (None skips flushing,
+                e.g. after a disconnect)
+        """
+        workers, writer = self._tasks[1:], self._tasks[:1]
+        for task in workers:
+            task.cancel()
+        if flush_timeout and writer and not writer[0].done():
+            try:
+                await asyncio.wait_for(self.outbox.join(), timeout=flush_timeout)
+            except asyncio.TimeoutError:
+                pass
+        for task in writer:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def get_stats(self) -> dict:
+        """Get queue depths and overload counters."""
+        return {
+            "queued": {name: lane.qsize() for name, lane in self.lanes.items()},
+            "rejected": dict(self.rejected),
+            "outbox": self.outbox.qsize(),
+            "sent": self.sent,
+            "dropped_sends": self.dropped_sends,
+        }
@@ -1,14 +1,48 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from app.config.config import SECRET_KEY, ALLOWED_ORIGINS
+from app.config.config import SECRET_KEY, ALLOWED_ORIGINS, WARMUP_ON_STARTUP
+from app.dependencies import get_agent_service, get_audio_transcription_service, get_transcript_service
+from app.services.readiness import readiness
 
 # HTTP APIs
-from app.api import root, data
+from app.api import root, data, bulk, metrics
 
 # WebSocket APIs
 from app.api import echo, dictate
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+async def warm_up_services():
+    """Preload Whisper and the agent runtime in parallel."""
+    await asyncio.gather(
+        readiness.track("whisper", get_audio_transcription_service().warm_up()),
+        readiness.track("agent", get_agent_service().warm_up()),
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so the server starts accepting connections immediately
+    warmup_task = None
+    if WARMUP_ON_STARTUP:
+        readiness.register("whisper")
+        readiness.register("agent")
+        warmup_task = asyncio.create_task(warm_up_services())
+    else:
+        logger.info("Startup warm-up disabled; components load on first use")
+    
+    yield
+    
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    # Playwright MCP servers are child processes; without this they outlive the app
+    await get_agent_service().close()
+    get_audio_transcription_service().whisper_client.pool.shutdown()
+    get_transcript_service().close()
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware for cross-origin requests
 app.add_middleware(
@@ -36,6 +70,8 @@ async def verify_secret_header(request: Request, call_next):
 # HTTP endpoints
 app.include_router(root.router)
 app.include_router(data.router, prefix="/data")
+app.include_router(bulk.router, prefix="/bulk")
+app.include_router(metrics.router, prefix="/metrics")
 
 # WebSocket endpoints
 app.include_router(echo.router, prefix="/ws")
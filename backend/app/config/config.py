@@ -1,2 +1,140 @@
+import os
+
 ALLOWED_ORIGINS = ["*"]
-SECRET_KEY = "secret-key-not-expose-backend-outside-app"
\ No newline at end of file
+SECRET_KEY = "secret-key-not-expose-backend-outside-app"
+
+# Audio transcription
+WHISPER_MODEL = os.getenv("DICTATE_WHISPER_MODEL", "base")
+# "thread" shares the process (torch releases the GIL during inference), "process" isolates each worker
+WHISPER_POOL_KIND = os.getenv("DICTATE_WHISPER_POOL_KIND", "thread")
+WHISPER_WORKERS = int(os.getenv("DICTATE_WHISPER_WORKERS", "1"))
+# Maximum number of clips waiting for a free worker before requests are rejected
+WHISPER_QUEUE_SIZE = int(os.getenv("DICTATE_WHISPER_QUEUE_SIZE", "8"))
+# Transcription engine: "whisper" (reference openai-whisper) or "faster-whisper" (CTranslate2, int8 on CPU)
+WHISPER_ENGINE = os.getenv("DICTATE_WHISPER_ENGINE", "whisper")
+# Decode options; empty language auto-detects, beam size 0 decodes greedily, threads 0 keeps the library default
+WHISPER_LANGUAGE = os.getenv("DICTATE_WHISPER_LANGUAGE", "")
+WHISPER_BEAM_SIZE = int(os.getenv("DICTATE_WHISPER_BEAM_SIZE", "0"))
+WHISPER_WITHOUT_TIMESTAMPS = os.getenv("DICTATE_WHISPER_WITHOUT_TIMESTAMPS", "0") == "1"
+WHISPER_THREADS = int(os.getenv("DICTATE_WHISPER_THREADS", "0"))
+# Weight precision of the faster-whisper engine ("int8", "int8_float32", "float32", ...)
+WHISPER_COMPUTE_TYPE = os.getenv("DICTATE_WHISPER_COMPUTE_TYPE", "int8")
+# Confidence cascade: decode with this smaller model first (e.g. "tiny"; empty disables) and rerun
+# with WHISPER_MODEL only when the draft's least confident segment crosses a threshold or the clip is long
+WHISPER_CASCADE_MODEL = os.getenv("DICTATE_WHISPER_CASCADE_MODEL", "")
+WHISPER_CASCADE_MIN_LOGPROB = float(os.getenv("DICTATE_WHISPER_CASCADE_MIN_LOGPROB", "-0.5"))
+WHISPER_CASCADE_MAX_NO_SPEECH = float(os.getenv("DICTATE_WHISPER_CASCADE_MAX_NO_SPEECH", "0.5"))
+WHISPER_CASCADE_MAX_COMPRESSION = float(os.getenv("DICTATE_WHISPER_CASCADE_MAX_COMPRESSION", "2.4"))
+WHISPER_CASCADE_MAX_SECONDS = float(os.getenv("DICTATE_WHISPER_CASCADE_MAX_SECONDS", "5.0"))
+# Shared transcription daemon (Unix only): when set, every uvicorn worker sends decodes to the daemon
+# listening on this socket (python -m app.services.voice_processing.transcription_daemon), which
+# holds the models once and batches requests across workers. Falls back to in-process decoding
+# while the daemon is unreachable
+WHISPER_DAEMON_SOCKET = os.getenv("DICTATE_WHISPER_DAEMON_SOCKET", "")
+WHISPER_DAEMON_MAX_BATCH = int(os.getenv("DICTATE_WHISPER_DAEMON_MAX_BATCH", "8"))
+# How long the daemon waits for more requests to join a batch once one has arrived
+WHISPER_DAEMON_BATCH_WINDOW_MS = float(os.getenv("DICTATE_WHISPER_DAEMON_BATCH_WINDOW_MS", "10"))
+WHISPER_DAEMON_QUEUE_SIZE = int(os.getenv("DICTATE_WHISPER_DAEMON_QUEUE_SIZE", "64"))
+# Seconds a worker keeps using its in-process fallback before trying the daemon again
+WHISPER_DAEMON_RETRY_INTERVAL = float(os.getenv("DICTATE_WHISPER_DAEMON_RETRY_INTERVAL", "5"))
+# Seconds a worker waits for a daemon response; a daemon that takes longer is treated as unreachable
+WHISPER_DAEMON_TIMEOUT = float(os.getenv("DICTATE_WHISPER_DAEMON_TIMEOUT", "60"))
+
+# Streaming transcription
+STREAM_PARTIAL_INTERVAL = float(os.getenv("DICTATE_STREAM_PARTIAL_INTERVAL", "0.5"))
+VAD_MIN_SILENCE_MS = int(os.getenv("DICTATE_VAD_MIN_SILENCE_MS", "600"))
+# A stream longer than this is finalized as if audio_end had arrived; a window without a pause
+# is committed once it reaches the second limit (Whisper decodes at most 30 s at a time)
+STREAM_MAX_SECONDS = float(os.getenv("DICTATE_STREAM_MAX_SECONDS", "120"))
+STREAM_MAX_WINDOW_SECONDS = float(os.getenv("DICTATE_STREAM_MAX_WINDOW_SECONDS", "30"))
+
+# Bulk transcription (POST /bulk/transcribe): clips per model batch, and how many decoded clips
+# are sorted by length at a time so each batch holds clips of similar duration
+BULK_BATCH_SIZE = int(os.getenv("DICTATE_BULK_BATCH_SIZE", "8"))
+BULK_SORT_WINDOW = int(os.getenv("DICTATE_BULK_SORT_WINDOW", "64"))
+# Limits on one request: files in a multipart upload or archive, the size of the request body,
+# and the (uncompressed) size of each file and of all of them together (zip bombs)
+BULK_MAX_FILES = int(os.getenv("DICTATE_BULK_MAX_FILES", "1000"))
+BULK_MAX_ARCHIVE_MB = int(os.getenv("DICTATE_BULK_MAX_ARCHIVE_MB", "1024"))
+BULK_MAX_FILE_MB = int(os.getenv("DICTATE_BULK_MAX_FILE_MB", "100"))
+BULK_MAX_EXTRACTED_MB = int(os.getenv("DICTATE_BULK_MAX_EXTRACTED_MB", "4096"))
+
+# Preload Whisper and the agent runtime in the background at startup
+WARMUP_ON_STARTUP = os.getenv("DICTATE_WARMUP_ON_STARTUP", "1") == "1"
+
+# Content-addressed transcription cache (0 entries disables it; empty path keeps it memory-only)
+TRANSCRIPTION_CACHE_SIZE = int(os.getenv("DICTATE_TRANSCRIPTION_CACHE_SIZE", "256"))
+TRANSCRIPTION_CACHE_TTL = float(os.getenv("DICTATE_TRANSCRIPTION_CACHE_TTL", "3600"))
+TRANSCRIPTION_CACHE_PATH = os.getenv("DICTATE_TRANSCRIPTION_CACHE_PATH", "")
+# Rows kept in the on-disk tier; the oldest beyond this are pruned (0 keeps every unexpired row)
+TRANSCRIPTION_CACHE_DISK_SIZE = int(os.getenv("DICTATE_TRANSCRIPTION_CACHE_DISK_SIZE", "10000"))
+
+# Agent conversation memory
+AGENT_MEMORY_TOKEN_BUDGET = int(os.getenv("DICTATE_AGENT_MEMORY_TOKEN_BUDGET", "2000"))
+AGENT_MEMORY_KEEP_TURNS = int(os.getenv("DICTATE_AGENT_MEMORY_KEEP_TURNS", "6"))
+AGENT_MEMORY_SUMMARY_TOKENS = int(os.getenv("DICTATE_AGENT_MEMORY_SUMMARY_TOKENS", "300"))
+AGENT_SUMMARY_MODEL = os.getenv("DICTATE_AGENT_SUMMARY_MODEL", "gpt-4o-mini")
+
+# Transcript history (empty path keeps only the in-memory ring buffer)
+TRANSCRIPT_DB_PATH = os.getenv("DICTATE_TRANSCRIPT_DB_PATH", os.path.join(os.path.expanduser("~"), ".dictate", "transcripts.db"))
+TRANSCRIPT_BUFFER_SIZE = int(os.getenv("DICTATE_TRANSCRIPT_BUFFER_SIZE", "500"))
+
+# Per-connection agent sessions leased from a pool of Playwright MCP browsers
+AGENT_POOL_MIN_SIZE = int(os.getenv("DICTATE_AGENT_POOL_MIN_SIZE", "1"))
+AGENT_POOL_MAX_SIZE = int(os.getenv("DICTATE_AGENT_POOL_MAX_SIZE", "4"))
+# Spare browsers above the minimum are shut down after this many idle seconds
+AGENT_POOL_IDLE_TIMEOUT = float(os.getenv("DICTATE_AGENT_POOL_IDLE_TIMEOUT", "300"))
+# A connection's browser goes back to the pool after this many idle seconds
+AGENT_SESSION_IDLE_TIMEOUT = float(os.getenv("DICTATE_AGENT_SESSION_IDLE_TIMEOUT", "120"))
+
+# Stream agent tokens and tool progress over /ws/dictate instead of one final message
+AGENT_STREAMING = os.getenv("DICTATE_AGENT_STREAMING", "1") == "1"
+
+# What a new utterance does to an agent turn still in flight on the same connection:
+# "supersede" cancels it (barge-in), "queue" runs after it, "parallel" runs alongside it
+AGENT_TURN_POLICY = os.getenv("DICTATE_AGENT_TURN_POLICY", "supersede")
+# Running plus queued agent turns allowed per connection (queue and parallel policies)
+AGENT_MAX_TURNS = int(os.getenv("DICTATE_AGENT_MAX_TURNS", "4"))
+
+# Deterministic fast path: common browser commands ("go back", "open youtube.com") call the
+# Playwright MCP tool directly instead of going through the LLM. The grammar file (JSON list of
+# rules) adds to, or overrides by name, the built-in rules
+AGENT_FAST_PATH = os.getenv("DICTATE_AGENT_FAST_PATH", "1") == "1"
+AGENT_FAST_PATH_GRAMMAR = os.getenv("DICTATE_AGENT_FAST_PATH_GRAMMAR", "")
+
+# Opt-in cache of read-only agent answers, keyed on the normalized request (and the open page's URL
+# for answers read from it); 0 entries disables it. A hit on a turn that opened a page opens it
+# again; turns that clicked, typed or used another side-effecting tool are never cached
+AGENT_RESPONSE_CACHE_SIZE = int(os.getenv("DICTATE_AGENT_RESPONSE_CACHE_SIZE", "0"))
+AGENT_RESPONSE_CACHE_TTL = float(os.getenv("DICTATE_AGENT_RESPONSE_CACHE_TTL", "300"))
+
+# Tool output compaction: Playwright results are pruned, deduplicated and cut to a token budget
+# ("tool=tokens,..." overrides the per-tool defaults) before the LLM sees them, and results of
+# earlier steps in the same run are replaced by one-line summaries
+AGENT_TOOL_COMPACTION = os.getenv("DICTATE_AGENT_TOOL_COMPACTION", "1") == "1"
+AGENT_TOOL_OUTPUT_TOKENS = int(os.getenv("DICTATE_AGENT_TOOL_OUTPUT_TOKENS", "1500"))
+AGENT_TOOL_OUTPUT_BUDGETS = os.getenv("DICTATE_AGENT_TOOL_OUTPUT_BUDGETS", "")
+
+# Per-connection /ws/dictate queues; a full queue answers with a BUSY error instead of growing
+WS_CONTROL_QUEUE_SIZE = int(os.getenv("DICTATE_WS_CONTROL_QUEUE_SIZE", "32"))
+WS_TRANSCRIPT_QUEUE_SIZE = int(os.getenv("DICTATE_WS_TRANSCRIPT_QUEUE_SIZE", "8"))
+WS_AUDIO_QUEUE_SIZE = int(os.getenv("DICTATE_WS_AUDIO_QUEUE_SIZE", "4"))
+WS_STREAM_QUEUE_SIZE = int(os.getenv("DICTATE_WS_STREAM_QUEUE_SIZE", "128"))
+# Outgoing messages queued for the connection's writer (partial transcripts are dropped when full)
+WS_OUTBOX_SIZE = int(os.getenv("DICTATE_WS_OUTBOX_SIZE", "256"))
+
+# JSON encoder for /ws/dictate ("json" or "orjson"); clients may negotiate MessagePack with ?codec=msgpack
+WS_CODEC = os.getenv("DICTATE_WS_CODEC", "json")
+# Hot-path message logging: one in N streaming messages is logged (0 disables), payloads cut to N chars
+WS_LOG_SAMPLE_EVERY = int(os.getenv("DICTATE_WS_LOG_SAMPLE_EVERY", "50"))
+WS_LOG_MAX_CHARS = int(os.getenv("DICTATE_WS_LOG_MAX_CHARS", "200"))
+
+# Playwright MCP server launch. An explicit command wins; otherwise a local
+# node_modules/@playwright/mcp install is run directly, falling back to npx with this pinned version
+MCP_SERVER_COMMAND = os.getenv("DICTATE_MCP_SERVER_COMMAND", "")
+MCP_SERVER_VERSION = os.getenv("DICTATE_MCP_SERVER_VERSION", "0.0.41")
+# Tool schemas cached across restarts so the agent is built before the MCP handshake (empty path disables it)
+MCP_TOOL_CACHE_PATH = os.getenv("DICTATE_MCP_TOOL_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".dictate", "mcp_tools.json"))
+
+# Per-request stage traces kept for GET /metrics/traces/{corr} (0 disables tracing)
+TRACE_CAPACITY = int(os.getenv("DICTATE_TRACE_CAPACITY", "0"))
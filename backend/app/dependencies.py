@@ -1,6 +1,8 @@
 from functools import lru_cache
+from app.config.config import TRANSCRIPT_DB_PATH, TRANSCRIPT_BUFFER_SIZE
 from app.services.agent.agent_service import AgentService
 from app.services.voice_processing.audio_transcription_service import AudioTranscriptionService
+from app.services.transcript import TranscriptService
 
 @lru_cache()
 def get_agent_service() -> AgentService:
@@ -11,3 +13,8 @@ def get_agent_service() -> AgentService:
 def get_audio_transcription_service() -> AudioTranscriptionService:
     """Dependency function to get AudioTranscriptionService instance."""
     return AudioTranscriptionService()
+
+@lru_cache()
+def get_transcript_service() -> TranscriptService:
+    """Dependency function to get TranscriptService instance."""
+    return TranscriptService(db_path=TRANSCRIPT_DB_PATH or None, buffer_size=TRANSCRIPT_BUFFER_SIZE)
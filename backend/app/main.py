@@ -1,5 +1,8 @@
+import multiprocessing
 import uvicorn
 import app.app as app 
 
 if __name__ == "__main__":
+    # Required for the process-based transcription pool in the frozen binary
+    multiprocessing.freeze_support()
     uvicorn.run("app.app:app", host="127.0.0.1", port=8000)
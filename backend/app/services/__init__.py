@@ -1,6 +1,19 @@
 # Services package
-from .voice_processing import AudioTranscriptionService
-from .transcript import TranscriptService
-from .agent.agent_service import AgentService
+#
+# Exports are resolved on first access (PEP 562) so importing one service, or a
+# light module such as app.services.metrics, doesn't load Whisper and the agent stack.
 
-__all__ = ['AudioTranscriptionService', 'TranscriptService', 'AgentService']
\ No newline at end of file
+__all__ = ['AudioTranscriptionService', 'TranscriptService', 'AgentService']
+
+
+def __getattr__(name):
+    if name == 'AudioTranscriptionService':
+        from .voice_processing.audio_transcription_service import AudioTranscriptionService
+        return AudioTranscriptionService
+    if name == 'TranscriptService':
+        from .transcript import TranscriptService
+        return TranscriptService
+    if name == 'AgentService':
+        from .agent.agent_service import AgentService
+        return AgentService
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,4 +1,7 @@
 # Agent service package
+#
+# AgentService itself is light; the runtime (LangChain, LangGraph, MCP) is
+# imported when the agent is first used.
 from .agent_service import AgentService
 
 __all__ = ['AgentService']
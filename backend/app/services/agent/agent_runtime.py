@@ -2,37 +2,71 @@ import os
 import asyncio
 import threading
 import logging
-from typing import Dict, Any, List, Optional
+import time
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 
-# MCP client (stdio)
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-
-# LangChain + MCP adapters + agent
-from langchain_mcp_adapters.tools import load_mcp_tools
+# LangChain
 from langchain_openai import ChatOpenAI
-from langgraph.prebuilt import create_react_agent
-from langchain.memory import ConversationBufferMemory
 
-# Validate OpenAI API key
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY environment variable is required for agent functionality")
+from app.config.config import (
+    AGENT_MEMORY_SUMMARY_TOKENS, AGENT_SUMMARY_MODEL,
+    AGENT_POOL_MIN_SIZE, AGENT_POOL_MAX_SIZE, AGENT_POOL_IDLE_TIMEOUT, AGENT_SESSION_IDLE_TIMEOUT,
+    AGENT_FAST_PATH, AGENT_FAST_PATH_GRAMMAR, AGENT_RESPONSE_CACHE_SIZE, AGENT_RESPONSE_CACHE_TTL
+)
+from app.services.metrics import metrics
+from .agent_service import DEFAULT_SESSION_ID
+from .agent_session import SYSTEM_PROMPT, AgentSession
+from .browser_pool import BrowserSessionPool
+from .conversation_memory import Turn
+from .intent_router import IntentMatch, IntentRouter
+from .mcp_launcher import resolve_server
+from .response_cache import (
+    NAVIGATE_TOOL, CachedAnswer, CacheKeys, ResponseCache, context_fingerprint, page_after, tool_calls
+)
+from .tool_compaction import tool_compactor
 
 logger = logging.getLogger(__name__)
 
+# How often idle leases and spare browsers are checked
+MAINTENANCE_INTERVAL = 30.0
+
 class AgentRuntime:
-    """Persistent agent runtime for voice-controlled web actions with browser context."""
+    """
+    Persistent agent runtime for voice-controlled web actions.
+    
+    Owns a background event loop, a pool of isolated Playwright MCP browser
+    sessions and one AgentSession (memory + leased browser) per client connection.
+    """
     
     def __init__(self):
+        # Checked here rather than at import, so the rest of the app runs without a key
+        if not os.getenv("OPENAI_API_KEY"):
+            raise ValueError("OPENAI_API_KEY environment variable is required for agent functionality")
         self.loop = asyncio.new_event_loop()
         self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
         self.thread.start()
-        self.session = None
-        self.agent = None
-        self.memory = ConversationBufferMemory(return_messages=True)
+        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+        self.summary_llm = ChatOpenAI(model=AGENT_SUMMARY_MODEL, temperature=0)
+        
+        # Launch Playwright MCP (pinned/local when available) with an isolated browser per server
+        self.server, server_version = resolve_server()
+        self.pool = BrowserSessionPool(
+            self.server,
+            self.llm,
+            min_size=AGENT_POOL_MIN_SIZE,
+            max_size=AGENT_POOL_MAX_SIZE,
+            idle_timeout=AGENT_POOL_IDLE_TIMEOUT,
+            server_version=server_version
+        )
+        # Common browser commands bypass the LLM
+        self.intents = IntentRouter.from_grammar_file(AGENT_FAST_PATH_GRAMMAR) if AGENT_FAST_PATH else None
+        # Repeated read-only questions are answered from here (opt-in)
+        self.responses = ResponseCache(max_entries=AGENT_RESPONSE_CACHE_SIZE, ttl=AGENT_RESPONSE_CACHE_TTL)
+        self.sessions: Dict[str, AgentSession] = {}
+        self._sessions_lock = threading.Lock()
+        self._maintenance_task = None
         self._ready = False
-        self._client_ctx = None
+        self.startup_ms: Optional[float] = None
         self._sync(self._start())
 
     def _sync(self, coro):
@@ -40,89 +74,283 @@ class AgentRuntime:
         fut = asyncio.run_coroutine_threadsafe(coro, self.loop)
         return fut.result()
 
+    def _async(self, coro) -> "asyncio.Future":
+        """Schedule async coroutine in the background thread and return an awaitable for the caller's loop."""
+        fut = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        return asyncio.wrap_future(fut)
+
     async def _start(self):
-        """Initialize MCP connection and create agent with persistent browser context."""
+        """Pre-launch the browser pool and start idle maintenance."""
         try:
-            logger.info("🔧 Initializing agent runtime with Playwright...")
-            
-            # Launch Playwright MCP with persistent browser
-            args = ["@playwright/mcp@latest", "--browser", "chrome"]
-            self.server = StdioServerParameters(command="npx", args=args)
-
-            self._client_ctx = stdio_client(self.server)
-            self.read, self.write = await self._client_ctx.__aenter__()
-            self.session = ClientSession(self.read, self.write)
-            await self.session.__aenter__()
-            await self.session.initialize()
-
-            # Load MCP tools and create agent - this maintains browser context
-            tools = await load_mcp_tools(self.session)
-            logger.info(f"📦 Loaded {len(tools)} MCP tools")
-            
-            # Create the agent with MCP tools - this maintains persistent browser context
-            self.agent = create_react_agent(
-                ChatOpenAI(model="gpt-4o-mini", temperature=0), 
-                tools  # MCP Playwright tools for persistent browser actions
-            )
-            
+            logger.info(f"🔧 Initializing agent runtime with Playwright ({self.server.command} {' '.join(self.server.args)})...")
+            started = time.perf_counter()
+            await self.pool.start()
+            self.startup_ms = (time.perf_counter() - started) * 1000
+            if self.intents is not None and self.pool.sessions:
+                self.intents.restrict_to(tool.name for tool in self.pool.sessions[0].tools)
+            self._maintenance_task = asyncio.create_task(self._maintain())
             self._ready = True
-            logger.info("✅ Agent runtime ready with persistent browser context")
+            logger.info(
+                f"✅ Agent runtime ready in {self.startup_ms:.0f} ms with {len(self.pool.sessions)} pre-launched browser session(s) "
+                f"(tool cache hits: {self.pool.tool_cache_hits}, launch timings: {self.pool.get_stats()['last_launch_ms']})"
+            )
             
         except Exception as e:
             logger.error(f"❌ Failed to initialize agent runtime: {e}")
             self._ready = False
 
-    def process_text(self, text: str) -> str:
+    async def _maintain(self):
+        """Periodically return idle connections' browsers to the pool and shut down spare browsers."""
+        while True:
+            await asyncio.sleep(MAINTENANCE_INTERVAL)
+            try:
+                now = time.monotonic()
+                with self._sessions_lock:
+                    sessions = list(self.sessions.values())
+                for session in sessions:
+                    if session.browser is not None and now - session.last_active > AGENT_SESSION_IDLE_TIMEOUT:
+                        logger.info(f"💤 Releasing idle browser of agent session {session.session_id}")
+                        await session.release_browser()
+                await self.pool.evict_idle()
+            except Exception as e:
+                logger.error(f"Agent runtime maintenance failed: {e}")
+
+    def get_session(self, session_id: str = DEFAULT_SESSION_ID) -> AgentSession:
+        """Get or create the agent session for a connection."""
+        with self._sessions_lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = AgentSession(session_id, self.pool, self._summarize, self.loop)
+                self.sessions[session_id] = session
+            return session
+
+    async def aclose_session(self, session_id: str):
+        """Drop a connection's session and return its browser to the pool."""
+        with self._sessions_lock:
+            session = self.sessions.pop(session_id, None)
+        if session is not None:
+            await self._async(session.close())
+
+    def _finish_turn(self, session: AgentSession, text: str, result, cache_keys: Optional[CacheKeys] = None) -> str:
+        """Extract the response text from an agent result, save the turn to memory and cache read-only answers."""
+        # Extract response text
+        response_text = self.extract_final_text(result)
+        session.save_turn(text, response_text)
+        calls = tool_calls(result)
+        # Keyed on the page as it was when the turn started
+        self.responses.put(cache_keys, response_text, calls)
+        session.page_url = page_after(calls, session.page_url, self.responses.read_only_tools)
+        return response_text
+
+    def _cached_response(self, session: AgentSession, text: str) -> Tuple[Optional[CacheKeys], Optional[CachedAnswer]]:
+        """
+        Look up a cached answer to a request.
+
+        Returns:
+            The cache keys (None if the request can't be cached) and the cached answer, if any
+        """
+        # Anything that changes how the agent answers invalidates the cache; answers
+        # read from the open page are scoped to its URL
+        keys = self.responses.keys(text, context_fingerprint(
+            self.llm.model_name, SYSTEM_PROMPT, self.pool.server_version
+        ), session.page_url)
+        return keys, self.responses.get(keys)
+
+    async def _open_cached_page(self, session: AgentSession, answer: CachedAnswer) -> bool:
+        """
+        Open the page a cached answer was read from, as the turn that produced it did. Must run on the runtime loop.
+
+        Returns:
+            Whether the answer can be served; if the page didn't open, the agent answers instead
+        """
+        if answer.url is None:
+            return True
+        try:
+            result = await session.call_tool(NAVIGATE_TOOL, {"url": answer.url})
+            ok = not getattr(result, "isError", False)
+        except Exception as e:
+            logger.warning(f"💾 Opening {answer.url} for a cached answer failed, using the agent: {e}")
+            ok = False
+        session.page_url = answer.url if ok else None
+        return ok
+
+    def _serve_cached(self, session: AgentSession, text: str, answer: CachedAnswer) -> str:
+        """Record a turn answered from the response cache."""
+        logger.info(f"💾 Answered from the response cache: {text}")
+        metrics.increment("agent_response_cache_hit")
+        session.save_turn(text, answer.text)
+        return answer.text
+
+    async def _call_intent(self, session: AgentSession, intent: IntentMatch) -> bool:
+        """
+        Run a fast-path command's tool call. Must run on the runtime loop.
+
+        Returns:
+            Whether the call succeeded; failed commands fall back to the agent
+        """
+        started = time.perf_counter()
+        try:
+            result = await session.call_tool(intent.tool, intent.arguments)
+            ok = not getattr(result, "isError", False)
+            if not ok:
+                logger.info(f"⚡ Fast-path {intent.tool} reported an error, using the agent")
+        except Exception as e:
+            logger.warning(f"⚡ Fast-path {intent.tool} failed, using the agent: {e}")
+            ok = False
+        # Fast-path commands navigate or press keys, so the page may change even if the call fails
+        session.page_url = page_after([(intent.tool, intent.arguments)], session.page_url) if ok else None
+        seconds = time.perf_counter() - started
+        self.intents.record(intent, seconds, ok)
+        metrics.observe("fast_path", seconds, label=intent.rule)
+        if ok:
+            logger.info(f"⚡ Fast-path {intent.rule} -> {intent.tool}({intent.arguments}) in {seconds * 1000:.0f} ms")
+        return ok
+
+    def _match_intent(self, text: str) -> Optional[IntentMatch]:
+        """Resolve a transcript to a fast-path command, if it is one."""
+        return self.intents.match(text) if self.intents is not None else None
+
+    def process_text(self, text: str, session_id: str = DEFAULT_SESSION_ID) -> str:
         """Process user text and return agent response with web actions."""
         if not self._ready:
             return "Sorry, I'm still starting up. Please wait a moment and try again."
             
         try:
-            logger.info(f"🤖 Processing text with agent: {text}")
-            
-            # System prompt for web browsing
-            system_prompt = (
-                "You are a careful web-browsing agent. Use MCP Playwright tools to navigate, read, and extract. "
-                "Minimize steps. Return concise answers and try not to use too many words. If a site blocks automation, explain briefly."
-            )
+            session = self.get_session(session_id)
+            intent = self._match_intent(text)
+            if intent is not None and self._sync(self._call_intent(session, intent)):
+                session.save_turn(text, intent.reply)
+                return intent.reply
+            cache_keys, cached = self._cached_response(session, text)
+            if cached is not None and self._sync(self._open_cached_page(session, cached)):
+                return self._serve_cached(session, text, cached)
             
-            # Get conversation history from memory
-            memory_variables = self.memory.load_memory_variables({})
-            chat_history = memory_variables.get("history", [])
-            
-            # Build messages with memory
-            messages = [("system", system_prompt)]
+            logger.info(f"🤖 Processing text with agent: {text}")
+            messages = session.build_messages(text)
             
-            # Add conversation history
-            for message in chat_history:
-                if hasattr(message, 'content'):
-                    role = "human" if message.__class__.__name__ == "HumanMessage" else "assistant"
-                    messages.append((role, message.content))
+            # Run the agent turn in the background thread
+            result = self._sync(session.run(messages))
             
-            # Add current user message
-            messages.append(("human", text))
+            return self._finish_turn(session, text, result, cache_keys)
             
-            # Run the async agent.ainvoke in the background thread
-            async def _invoke_agent():
-                return await self.agent.ainvoke({"messages": messages})
+        except Exception as e:
+            logger.error(f"Error processing text with agent: {e}")
+            return f"Sorry, I encountered an error: {str(e)}"
+
+    async def aprocess_text(self, text: str, session_id: str = DEFAULT_SESSION_ID) -> str:
+        """
+        Awaitable variant of process_text.
+        
+        The agent still runs on the runtime's own loop (the MCP sessions are bound to it),
+        but the caller awaits the result instead of blocking its thread on fut.result().
+        """
+        if not self._ready:
+            return "Sorry, I'm still starting up. Please wait a moment and try again."
             
-            result = self._sync(_invoke_agent())
+        try:
+            session = self.get_session(session_id)
+            intent = self._match_intent(text)
+            if intent is not None and await self._async(self._call_intent(session, intent)):
+                session.save_turn(text, intent.reply)
+                return intent.reply
+            cache_keys, cached = self._cached_response(session, text)
+            if cached is not None and await self._async(self._open_cached_page(session, cached)):
+                return self._serve_cached(session, text, cached)
             
-            # Extract response text
-            response_text = self.extract_final_text(result)
+            logger.info(f"🤖 Processing text with agent: {text}")
+            messages = session.build_messages(text)
             
-            # Save to memory
-            self.memory.save_context(
-                {"input": text},
-                {"output": response_text}
-            )
+            # Bridge to the background loop without parking the caller's loop
+            result = await self._async(session.run(messages))
             
-            return response_text
+            return self._finish_turn(session, text, result, cache_keys)
             
         except Exception as e:
             logger.error(f"Error processing text with agent: {e}")
             return f"Sorry, I encountered an error: {str(e)}"
 
+    async def astream_text(self, text: str, session_id: str = DEFAULT_SESSION_ID) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process user text, yielding progress events on the caller's loop as the agent runs.
+        
+        Yields 'delta', 'tool_start' and 'tool_end' events, then exactly one
+        {"type": "final", "text": ...} event with the complete response.
+        """
+        if not self._ready:
+            yield {"type": "final", "text": "Sorry, I'm still starting up. Please wait a moment and try again."}
+            return
+        
+        session = self.get_session(session_id)
+        intent = self._match_intent(text)
+        if intent is not None:
+            yield {"type": "tool_start", "tool": intent.tool, "input": intent.arguments}
+            ok = await self._async(self._call_intent(session, intent))
+            yield {"type": "tool_end", "tool": intent.tool, "output": "" if ok else "failed, using the agent"}
+            if ok:
+                session.save_turn(text, intent.reply)
+                yield {"type": "final", "text": intent.reply}
+                return
+        cache_keys, cached = self._cached_response(session, text)
+        if cached is not None:
+            if cached.url is not None:
+                yield {"type": "tool_start", "tool": NAVIGATE_TOOL, "input": {"url": cached.url}}
+            ok = await self._async(self._open_cached_page(session, cached))
+            if cached.url is not None:
+                yield {"type": "tool_end", "tool": NAVIGATE_TOOL, "output": "" if ok else "failed, using the agent"}
+            if ok:
+                yield {"type": "final", "text": self._serve_cached(session, text, cached)}
+                return
+        
+        logger.info(f"🤖 Streaming text with agent: {text}")
+        messages = session.build_messages(text)
+        
+        # Events are produced on the runtime loop and handed over to the caller's loop
+        caller_loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+        
+        def emit(event: Dict[str, Any]):
+            caller_loop.call_soon_threadsafe(events.put_nowait, event)
+        
+        run = self._async(session.stream(messages, emit))
+        getter = None
+        try:
+            while not run.done():
+                getter = asyncio.ensure_future(events.get())
+                done, _ = await asyncio.wait({getter, run}, return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    yield getter.result()
+                else:
+                    getter.cancel()
+            # Emits always land before the run's completion callback, so drain what's left
+            while not events.empty():
+                yield events.get_nowait()
+            
+            try:
+                result = run.result()
+                response_text = self._finish_turn(session, text, result, cache_keys)
+            except Exception as e:
+                logger.error(f"Error streaming text with agent: {e}")
+                response_text = f"Sorry, I encountered an error: {str(e)}"
+            yield {"type": "final", "text": response_text}
+        finally:
+            # Consumer went away (disconnect or barge-in): stop the run on the runtime loop too,
+            # which cancels the LangGraph run and any MCP tool call it is awaiting
+            if getter is not None and not getter.done():
+                getter.cancel()
+            if not run.done():
+                run.cancel()
+
+    async def _summarize(self, summary: str, turns: List[Turn]) -> str:
+        """Fold older conversation turns into the running summary with a cheap LLM call."""
+        transcript = "\n".join(f"User: {t.user}\nAssistant: {t.assistant}" for t in turns)
+        result = await self.summary_llm.ainvoke([
+            ("system",
+             "Update the running summary of a conversation between a user and a web-browsing assistant. "
+             f"Keep facts, user preferences and open tasks. Reply with the summary only, under {AGENT_MEMORY_SUMMARY_TOKENS} tokens."),
+            ("human", f"Current summary:\n{summary or '(empty)'}\n\nNew turns:\n{transcript}")
+        ])
+        return result.content
+
     def extract_final_text(self, result) -> str:
         """LangGraph returns a dict with 'messages'; extract the final content safely."""
         try:
@@ -137,18 +365,48 @@ class AgentRuntime:
         except Exception:
             return str(result)
 
+    async def _shutdown(self):
+        """Stop maintenance and shut down every browser session. Runs on the runtime loop."""
+        self._ready = False
+        if self._maintenance_task is not None:
+            self._maintenance_task.cancel()
+        await self.pool.close()
+
+    async def aclose(self):
+        """Shut down the Playwright MCP servers and stop the runtime loop."""
+        try:
+            await self._async(self._shutdown())
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
     def is_ready(self) -> bool:
         """Check if the agent runtime is ready to process requests."""
         return self._ready
 
+    def get_stats(self) -> Dict[str, Any]:
+        """Get session, fast-path, response cache and browser pool statistics."""
+        with self._sessions_lock:
+            active_sessions = len(self.sessions)
+        return {
+            "sessions": active_sessions,
+            "startup_ms": round(self.startup_ms, 1) if self.startup_ms is not None else None,
+            "fast_path": self.intents.get_stats() if self.intents is not None else None,
+            "response_cache": self.responses.get_stats(),
+            "tool_compaction": tool_compactor.get_stats(),
+            "pool": self.pool.get_stats()
+        }
+
 
 # Global runtime instance - persists across all requests
 _runtime: Optional[AgentRuntime] = None
+_runtime_lock = threading.Lock()
 
 def get_runtime() -> AgentRuntime:
     """Get or create the global agent runtime instance."""
     global _runtime
-    if _runtime is None:
-        _runtime = AgentRuntime()
+    # Creation may now happen from executor threads, so guard against double start
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = AgentRuntime()
     return _runtime
 
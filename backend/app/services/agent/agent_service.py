@@ -1,9 +1,12 @@
+import asyncio
 import logging
-from typing import Dict, Any, Optional
-from .agent_runtime import get_runtime
+from typing import AsyncIterator, Dict, Any
 
 logger = logging.getLogger(__name__)
 
+# Session used by callers that don't identify a connection
+DEFAULT_SESSION_ID = "default"
+
 class AgentService:
     """Clean service interface for the agent runtime."""
     
@@ -14,6 +17,8 @@ class AgentService:
     def _get_runtime(self):
         """Get or create the agent runtime instance."""
         if self.runtime is None:
+            # LangChain, LangGraph and MCP are only imported once the agent is first needed
+            from .agent_runtime import get_runtime
             self.runtime = get_runtime()
         return self.runtime
 
@@ -40,6 +45,99 @@ class AgentService:
             logger.error(f"❌ Error processing text: {e}")
             return f"Sorry, I encountered an error: {str(e)}"
 
+    async def aprocess_text(self, text: str, session_id: str = DEFAULT_SESSION_ID) -> str:
+        """
+        Process user text and return agent response without blocking the event loop.
+        
+        Args:
+            text: The text to process
+            session_id: Connection whose memory and browser the turn uses
+            
+        Returns:
+            Agent response text
+        """
+        try:
+            runtime = self.runtime
+            if runtime is None:
+                # Runtime construction launches the MCP server and blocks, so do it off-loop
+                loop = asyncio.get_running_loop()
+                runtime = await loop.run_in_executor(None, self._get_runtime)
+            
+            if not runtime.is_ready():
+                return "I'm still starting up. Please wait a moment and try again."
+            
+            logger.info(f"🤖 Processing text with agent: {text}")
+            return await runtime.aprocess_text(text, session_id)
+            
+        except Exception as e:
+            logger.error(f"❌ Error processing text: {e}")
+            return f"Sorry, I encountered an error: {str(e)}"
+
+    async def astream_text(self, text: str, session_id: str = DEFAULT_SESSION_ID) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process user text, yielding agent progress events as they happen.
+        
+        Args:
+            text: The text to process
+            session_id: Connection whose memory and browser the turn uses
+            
+        Yields:
+            'delta', 'tool_start' and 'tool_end' events, then one 'final' event
+        """
+        try:
+            runtime = self.runtime
+            if runtime is None:
+                # Runtime construction launches the MCP server and blocks, so do it off-loop
+                loop = asyncio.get_running_loop()
+                runtime = await loop.run_in_executor(None, self._get_runtime)
+        except Exception as e:
+            logger.error(f"❌ Error processing text: {e}")
+            yield {"type": "final", "text": f"Sorry, I encountered an error: {str(e)}"}
+            return
+        
+        if not runtime.is_ready():
+            yield {"type": "final", "text": "I'm still starting up. Please wait a moment and try again."}
+            return
+        
+        async for event in runtime.astream_text(text, session_id):
+            yield event
+
+    async def close_session(self, session_id: str):
+        """Release the memory and browser held by a connection's agent session."""
+        if self.runtime is None:
+            return
+        try:
+            await self.runtime.aclose_session(session_id)
+        except Exception as e:
+            logger.error(f"❌ Error closing agent session {session_id}: {e}")
+
+    async def close(self):
+        """Shut down the agent runtime and its browser processes (no-op if it never started)."""
+        if self.runtime is None:
+            return
+        try:
+            await self.runtime.aclose()
+        except Exception as e:
+            logger.error(f"❌ Error shutting down agent runtime: {e}")
+
+    async def warm_up(self):
+        """
+        Start the agent runtime (MCP server, browser and MCP initialize) off-loop.
+        
+        Raises:
+            Exception: If the runtime failed to start
+        """
+        loop = asyncio.get_running_loop()
+        runtime = await loop.run_in_executor(None, self._get_runtime)
+        if not runtime.is_ready():
+            raise Exception("Agent runtime failed to start")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get agent runtime statistics (empty until the runtime has started)."""
+        if self.runtime is None:
+            return {}
+        return self.runtime.get_stats()
+
     def is_ready(self) -> bool:
         """Check if the agent service is ready to process requests."""
         try:
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+from app.config.config import AGENT_MEMORY_TOKEN_BUDGET, AGENT_MEMORY_KEEP_TURNS, AGENT_MEMORY_SUMMARY_TOKENS
+from app.services.metrics import metrics
+from .browser_pool import BrowserSession, BrowserSessionPool
+from .conversation_memory import BoundedConversationMemory
+
+logger = logging.getLogger(__name__)
+
+# Tool outputs (page snapshots) can be huge; progress events only carry a preview
+TOOL_OUTPUT_PREVIEW_CHARS = 200
+
+# System prompt for web browsing
+SYSTEM_PROMPT = (
+    "You are a careful web-browsing agent. Use MCP Playwright tools to navigate, read, and extract. "
+    "Minimize steps. Return concise answers and try not to use too many words. If a site blocks automation, explain briefly."
+)
+
+
+class StageTimingHandler(AsyncCallbackHandler):
+    """Records each LLM call and tool call of an agent run as a metrics stage."""
+
+    def __init__(self):
+        """Initialize with no runs in flight."""
+        self._started: Dict[UUID, Tuple[str, str, float]] = {}
+
+    def _start(self, run_id: UUID, stage: str, label: str = ""):
+        self._started[run_id] = (stage, label, time.perf_counter())
+
+    def _end(self, run_id: UUID):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            stage, label, at = started
+            metrics.observe(stage, time.perf_counter() - at, label=label)
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs):
+        self._start(run_id, "llm_call")
+
+    async def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs):
+        self._start(run_id, "llm_call")
+
+    async def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        self._end(run_id)
+
+    async def on_llm_error(self, error, *, run_id: UUID, **kwargs):
+        self._end(run_id)
+
+    async def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs):
+        self._start(run_id, "tool_call", (serialized or {}).get("name") or kwargs.get("name") or "")
+
+    async def on_tool_end(self, output, *, run_id: UUID, **kwargs):
+        self._end(run_id)
+
+    async def on_tool_error(self, error, *, run_id: UUID, **kwargs):
+        self._end(run_id)
+
+
+class AgentSession:
+    """
+    Agent state for one client connection: its own conversation memory and an
+    isolated browser leased from the pool on first use.
+    """
+
+    def __init__(self, session_id: str, pool: BrowserSessionPool, summarizer, loop: asyncio.AbstractEventLoop):
+        """Initialize a session; no browser is leased until the first turn."""
+        self.session_id = session_id
+        self.pool = pool
+        self.memory = BoundedConversationMemory(
+            token_budget=AGENT_MEMORY_TOKEN_BUDGET,
+            keep_turns=AGENT_MEMORY_KEEP_TURNS,
+            summary_tokens=AGENT_MEMORY_SUMMARY_TOKENS,
+            summarizer=summarizer,
+            loop=loop
+        )
+        self.browser: Optional[BrowserSession] = None
+        # URL of the page this session has open, while known: set by navigations, cleared by
+        # anything else that may change the page; scopes cached answers about the open page
+        self.page_url: Optional[str] = None
+        self.last_active = time.monotonic()
+        # Created on the runtime loop in run(), where it's used
+        self._turn_lock: Optional[asyncio.Lock] = None
+
+    def build_messages(self, text: str) -> List[tuple]:
+        """Build the agent message list from the system prompt, memory and the new user text."""
+        # Build messages with bounded memory (summary + recent turns within the token budget)
+        messages = [("system", SYSTEM_PROMPT)]
+        messages.extend(self.memory.messages())
+
+        # Add current user message
+        messages.append(("human", text))
+        return messages
+
+    def save_turn(self, text: str, response_text: str):
+        """Save a finished turn to memory (older turns are summarized in the background)."""
+        self.memory.save_context(text, response_text)
+
+    def on_browser_reclaimed(self):
+        """Called by the pool when this session's idle browser is handed to someone else."""
+        logger.info(f"♻️ Browser reclaimed from agent session {self.session_id}")
+        self.browser = None
+        self.page_url = None
+
+    @asynccontextmanager
+    async def _turn(self):
+        """Hold the session's turn lock and its (possibly newly leased) browser for one turn."""
+        if self._turn_lock is None:
+            self._turn_lock = asyncio.Lock()
+
+        # Turns of one session are serialized; different sessions run in parallel
+        async with self._turn_lock:
+            if self.browser is None or self.browser.failed:
+                # A browser whose MCP server died mid-turn was dropped by the pool; lease a fresh one
+                self.browser = await self.pool.acquire(self)
+                self.page_url = None
+            browser = self.browser
+            browser.busy = True
+            if hasattr(browser.tool_session, "new_run"):
+                browser.tool_session.new_run()
+            try:
+                yield browser
+            finally:
+                browser.busy = False
+                browser.last_used = self.last_active = time.monotonic()
+
+    async def run(self, messages: List[tuple]):
+        """Run one agent turn on this session's browser. Must run on the runtime loop."""
+        async with self._turn() as browser:
+            return await browser.agent.ainvoke({"messages": messages}, config={"callbacks": [StageTimingHandler()]})
+
+    async def call_tool(self, tool: str, arguments: Dict[str, Any]):
+        """Call one MCP tool directly on this session's browser, without the agent. Must run on the runtime loop."""
+        async with self._turn() as browser:
+            return await browser.session.call_tool(tool, arguments)
+
+    async def stream(self, messages: List[tuple], emit: Callable[[Dict[str, Any]], None]):
+        """
+        Run one agent turn, emitting progress events as the LangGraph run proceeds.
+
+        Events passed to emit are dicts with 'type' of 'delta' (LLM token text),
+        'tool_start' or 'tool_end'. Must run on the runtime loop.
+
+        Returns:
+            The graph's final output (same shape as agent.ainvoke)
+        """
+        async with self._turn() as browser:
+            final_output = None
+            # Tool calls are timed by the consumer of the tool events; LLM calls are timed here
+            llm_started: Dict[str, float] = {}
+            async for event in browser.agent.astream_events({"messages": messages}, version="v2"):
+                kind = event["event"]
+                if kind == "on_chat_model_start":
+                    llm_started[event["run_id"]] = time.perf_counter()
+                elif kind == "on_chat_model_end" and event["run_id"] in llm_started:
+                    metrics.observe("llm_call", time.perf_counter() - llm_started.pop(event["run_id"]))
+                elif kind == "on_chat_model_stream":
+                    content = event["data"]["chunk"].content
+                    if isinstance(content, str) and content:
+                        emit({"type": "delta", "text": content})
+                elif kind == "on_tool_start":
+                    emit({"type": "tool_start", "tool": event["name"], "input": event["data"].get("input")})
+                elif kind == "on_tool_end":
+                    output = event["data"].get("output")
+                    preview = str(getattr(output, "content", output))[:TOOL_OUTPUT_PREVIEW_CHARS]
+                    emit({"type": "tool_end", "tool": event["name"], "output": preview})
+                elif kind == "on_chain_end" and not event.get("parent_ids"):
+                    # End of the top-level graph run
+                    final_output = event["data"].get("output")
+            return final_output
+
+    async def release_browser(self):
+        """Return the leased browser to the pool (if not mid-turn). Must run on the runtime loop."""
+        browser = self.browser
+        if browser is None or browser.busy:
+            return
+        self.browser = None
+        await self.pool.release(browser)
+
+    async def close(self):
+        """Release everything held by the session. Must run on the runtime loop."""
+        if self._turn_lock is not None:
+            # Let a running turn finish before handing its browser back
+            async with self._turn_lock:
+                await self.release_browser()
+        else:
+            await self.release_browser()
@@ -0,0 +1,303 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# MCP client (stdio)
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.types import Tool as MCPTool
+
+# LangChain + MCP adapters + agent
+from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
+from langgraph.prebuilt import create_react_agent
+
+from app.config.config import AGENT_TOOL_COMPACTION
+from .mcp_launcher import DeferredSession, list_all_tools, server_signature, tool_cache
+from .tool_compaction import CompactingSession, history_compaction_kwargs, tool_compactor
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserSession:
+    """One Playwright MCP server with an isolated browser context and its agent graph."""
+
+    def __init__(self, server: StdioServerParameters, llm, server_version: Optional[str] = None):
+        """Initialize an unstarted session (server_version, if known, selects cached tool schemas)."""
+        self.server = server
+        self.llm = llm
+        self.server_version = server_version
+        self.session: Optional[DeferredSession] = None
+        # What the agent's tools call through: compacts results before the LLM sees them
+        self.tool_session = None
+        self.agent = None
+        self.tools: List[Any] = []
+        # Startup timings in milliseconds and whether cached tool schemas were used
+        self.timings: Dict[str, float] = {}
+        self.tool_cache_hit = False
+        # Lease state, only touched on the runtime loop
+        self.owner = None
+        self.busy = False
+        self.last_used = time.monotonic()
+        # Set once the MCP server has died; the pool drops failed sessions
+        self.failed = False
+        self.on_failure: Optional[Callable[["BrowserSession"], None]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+
+    def _build_agent(self, mcp_tools: List[MCPTool]):
+        """Wrap MCP tool schemas as LangChain tools and build the agent graph."""
+        started = time.perf_counter()
+        self.tool_session = CompactingSession(self.session, tool_compactor) if AGENT_TOOL_COMPACTION else self.session
+        self.tools = [convert_mcp_tool_to_langchain_tool(self.tool_session, tool) for tool in mcp_tools]
+        self.agent = create_react_agent(self.llm, self.tools, **history_compaction_kwargs())
+        self.timings["graph_ms"] = (time.perf_counter() - started) * 1000
+
+    async def start(self):
+        """
+        Launch the MCP server and build the agent.
+
+        With cached tool schemas the agent graph is built immediately and start()
+        returns while the server is still launching; tool calls wait for the
+        handshake. Without them, start() returns once the tools have been listed.
+        """
+        self._stop = asyncio.Event()
+        self.session = DeferredSession()
+        self._started_at = time.perf_counter()
+
+        cached = tool_cache.load(server_signature(self.server), self.server_version)
+        if cached is not None:
+            self.server_version, mcp_tools = cached
+            self._build_agent(mcp_tools)
+            self.tool_cache_hit = True
+
+        started = asyncio.get_running_loop().create_future()
+        if self.agent is not None:
+            started.set_result(None)
+        # The stdio client and session contexts must be entered and exited by the
+        # same task, so a dedicated task owns them for the session's lifetime
+        self._task = asyncio.create_task(self._serve(started))
+        await started
+        self.timings["ready_ms"] = (time.perf_counter() - self._started_at) * 1000
+
+    async def _serve(self, started: asyncio.Future):
+        """Hold the MCP connection open until close() is called."""
+        try:
+            async with stdio_client(self.server) as (read, write):
+                async with ClientSession(read, write) as session:
+                    init_result = await session.initialize()
+                    self.timings["handshake_ms"] = (time.perf_counter() - self._started_at) * 1000
+                    version = getattr(init_result.serverInfo, "version", None)
+
+                    if not self.tool_cache_hit or version != self.server_version:
+                        # No cache, or the server changed underneath it: list the tools and (re)build
+                        if self.tool_cache_hit:
+                            logger.info(f"🔄 Playwright MCP is {version}, cached tools were for {self.server_version}; reloading")
+                            self.tool_cache_hit = False
+                        listed_at = time.perf_counter()
+                        mcp_tools = await list_all_tools(session)
+                        self.timings["list_tools_ms"] = (time.perf_counter() - listed_at) * 1000
+                        self.server_version = version
+                        self._build_agent(mcp_tools)
+                        tool_cache.save(server_signature(self.server), version, mcp_tools)
+                    logger.info(f"📦 Loaded {len(self.tools)} MCP tools ({'cached' if self.tool_cache_hit else 'listed'})")
+
+                    self.session.bind(session)
+                    if not started.done():
+                        started.set_result(None)
+                    await self._stop.wait()
+        except Exception as e:
+            self.failed = True
+            self.session.fail(e)
+            if not started.done():
+                started.set_exception(e)
+            else:
+                logger.warning(f"Browser session ended with error: {e}")
+                if self.on_failure is not None:
+                    self.on_failure(self)
+
+    async def reset(self):
+        """Close the browser so the next owner starts from a fresh, isolated context."""
+        try:
+            await self.session.call_tool("browser_close", {})
+        except Exception as e:
+            logger.debug(f"Browser reset failed (ignored): {e}")
+
+    async def close(self):
+        """Shut down the MCP session and its server process."""
+        if self._task is None:
+            return
+        self._stop.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=10)
+        except Exception as e:
+            logger.warning(f"Error closing browser session: {e}")
+        finally:
+            self._task = None
+
+
+class BrowserSessionPool:
+    """
+    Pool of pre-launched Playwright MCP sessions leased to agent sessions.
+
+    Keeps at least min_size sessions running and launches more on demand up to
+    max_size. When the pool is exhausted, the least recently used lease that is
+    not running a turn is reclaimed. Spare sessions idle beyond idle_timeout are
+    shut down. All methods must run on the runtime loop.
+    """
+
+    def __init__(self, server: StdioServerParameters, llm, min_size: int = 1, max_size: int = 4, idle_timeout: float = 300.0,
+                 server_version: Optional[str] = None):
+        """Initialize the pool (nothing is launched until start())."""
+        self.server = server
+        self.server_version = server_version
+        self.llm = llm
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.idle_timeout = idle_timeout
+        self.sessions: List[BrowserSession] = []
+        self._launching = 0
+        self._available: Optional[asyncio.Condition] = None
+
+        # Stats
+        self.launched = 0
+        self.reclaimed = 0
+        self.evicted = 0
+        self.failed = 0
+        self.tool_cache_hits = 0
+        self.last_launch: Dict[str, float] = {}
+
+    def _condition(self) -> asyncio.Condition:
+        # Created lazily so it binds to the runtime loop
+        if self._available is None:
+            self._available = asyncio.Condition()
+        return self._available
+
+    async def _launch(self) -> BrowserSession:
+        """Launch one more session (the caller has already counted it in _launching)."""
+        try:
+            session = BrowserSession(self.server, self.llm, self.server_version)
+            session.on_failure = self._discard
+            await session.start()
+        except Exception:
+            async with self._condition():
+                self._launching -= 1
+                self._condition().notify()
+            raise
+        async with self._condition():
+            self._launching -= 1
+            self.sessions.append(session)
+            self.launched += 1
+            self.tool_cache_hits += int(session.tool_cache_hit)
+            self.last_launch = session.timings
+        return session
+
+    def _discard(self, session: BrowserSession):
+        """
+        Drop a session whose MCP server died, so it is never leased again.
+
+        Its owner (unless mid-turn, where the turn fails and _turn re-leases next
+        time) is told to lease a fresh browser; one is launched on demand.
+        """
+        if session not in self.sessions:
+            return
+        self.sessions.remove(session)
+        self.failed += 1
+        logger.warning(f"🪦 Dropped a dead browser session ({len(self.sessions)} left)")
+        if session.owner is not None and not session.busy:
+            session.owner.on_browser_reclaimed()
+            session.owner = None
+        asyncio.create_task(self._notify())
+
+    async def _notify(self):
+        """Wake a waiter in acquire(), which may now launch a replacement."""
+        async with self._condition():
+            self._condition().notify()
+
+    async def start(self):
+        """Pre-launch min_size sessions in parallel."""
+        self._launching += self.min_size
+        results = await asyncio.gather(*(self._launch() for _ in range(self.min_size)), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            logger.error(f"❌ {len(errors)} of {self.min_size} browser sessions failed to launch: {errors[0]}")
+        if self.min_size and len(errors) == self.min_size:
+            raise errors[0]
+
+    async def acquire(self, owner) -> BrowserSession:
+        """
+        Lease a session to owner.
+
+        Owners must implement on_browser_reclaimed(), called when their idle lease
+        is taken over by someone else.
+        """
+        async with self._condition():
+            while True:
+                idle = [s for s in self.sessions if s.owner is None and not s.failed]
+                if idle:
+                    return self._lease(max(idle, key=lambda s: s.last_used), owner)
+                if len(self.sessions) + self._launching < self.max_size:
+                    self._launching += 1
+                    break
+                # Pool exhausted: reclaim the least recently used lease that isn't mid-turn
+                reclaimable = [s for s in self.sessions if not s.busy and not s.failed]
+                if reclaimable:
+                    session = min(reclaimable, key=lambda s: s.last_used)
+                    session.owner.on_browser_reclaimed()
+                    self.reclaimed += 1
+                    await session.reset()
+                    return self._lease(session, owner)
+                await self._condition().wait()
+
+        # Launch outside the lock so other leases aren't held up by browser startup
+        session = await self._launch()
+        return self._lease(session, owner)
+
+    def _lease(self, session: BrowserSession, owner) -> BrowserSession:
+        session.owner = owner
+        session.last_used = time.monotonic()
+        return session
+
+    async def release(self, session: BrowserSession):
+        """Return a leased session to the pool."""
+        await session.reset()
+        async with self._condition():
+            session.owner = None
+            session.busy = False
+            session.last_used = time.monotonic()
+            self._condition().notify()
+
+    async def evict_idle(self):
+        """Shut down unleased sessions idle beyond idle_timeout, keeping min_size running."""
+        now = time.monotonic()
+        idle = sorted(
+            (s for s in self.sessions if s.owner is None and now - s.last_used > self.idle_timeout),
+            key=lambda s: s.last_used
+        )
+        for session in idle:
+            if len(self.sessions) <= self.min_size:
+                break
+            self.sessions.remove(session)
+            self.evicted += 1
+            await session.close()
+
+    async def close(self):
+        """Shut down every session."""
+        sessions, self.sessions = self.sessions, []
+        await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
+
+    def get_stats(self) -> dict:
+        """Get pool size and lease statistics."""
+        return {
+            "size": len(self.sessions),
+            "leased": sum(1 for s in self.sessions if s.owner is not None),
+            "busy": sum(1 for s in self.sessions if s.busy),
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "launched": self.launched,
+            "reclaimed": self.reclaimed,
+            "evicted": self.evicted,
+            "failed": self.failed,
+            "tool_cache_hits": self.tool_cache_hits,
+            "last_launch_ms": {k: round(v, 1) for k, v in self.last_launch.items()},
+        }
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Deque, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception as e:
+    # Token budgets (history, tool output) then run on a rough estimate; say so once
+    logger.warning(f"tiktoken unavailable ({e!r}); estimating tokens as ~4 characters each")
+    _encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with the OpenAI tokenizer when available, else estimate ~4 chars per token."""
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int, keep_end: bool = False) -> str:
+    """Cut text down to at most max_tokens tokens (keeping the start, or the end)."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    if _encoding is not None:
+        tokens = _encoding.encode(text, disallowed_special=())
+        kept = tokens[-max_tokens:] if keep_end else tokens[:max_tokens]
+        return _encoding.decode(kept)
+    max_chars = max_tokens * 4
+    return text[-max_chars:] if keep_end else text[:max_chars]
+
+
+class Turn:
+    """One user/assistant exchange with its token count computed once."""
+
+    __slots__ = ("user", "assistant", "tokens")
+
+    def __init__(self, user: str, assistant: str):
+        self.user = user
+        self.assistant = assistant
+        self.tokens = count_tokens(user) + count_tokens(assistant)
+
+
+# Summarizer signature: (previous summary, turns to fold in) -> new summary
+Summarizer = Callable[[str, List[Turn]], Awaitable[str]]
+
+
+class BoundedConversationMemory:
+    """
+    Conversation memory with a fixed token budget.
+
+    The last keep_turns exchanges are kept verbatim; older ones are folded into a
+    running summary in the background. Token counts are tracked incrementally, so
+    building the prompt never re-walks the whole session.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 2000,
+        keep_turns: int = 6,
+        summary_tokens: int = 300,
+        summarizer: Optional[Summarizer] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ):
+        """
+        Initialize an empty memory.
+
+        Args:
+            token_budget: Maximum tokens of history (summary + turns) put into a prompt
+            keep_turns: Number of most recent turns kept verbatim
+            summary_tokens: Maximum size of the running summary
+            summarizer: Async callable that folds old turns into the summary
+            loop: Event loop the summarizer runs on
+        """
+        self.token_budget = token_budget
+        self.keep_turns = max(1, keep_turns)
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer
+        self.loop = loop
+
+        self.summary = ""
+        self._summary_token_count = 0
+        self._turns: Deque[Turn] = deque()
+        self._turn_tokens = 0
+        # Turns evicted from the verbatim window but not yet folded into the summary
+        self._pending: List[Turn] = []
+        self._compacting = False
+        self._lock = threading.Lock()
+
+    def save_context(self, user_text: str, assistant_text: str):
+        """Record a finished turn and schedule compaction of turns that fell out of the window."""
+        # A single huge turn must not be able to blow the whole budget on its own
+        half_budget = max(1, self.token_budget // 2)
+        turn = Turn(truncate_to_tokens(user_text, half_budget), truncate_to_tokens(assistant_text, half_budget))
+        with self._lock:
+            self._turns.append(turn)
+            self._turn_tokens += turn.tokens
+            while len(self._turns) > self.keep_turns or (
+                len(self._turns) > 1 and self._turn_tokens + self._summary_token_count > self.token_budget
+            ):
+                old = self._turns.popleft()
+                self._turn_tokens -= old.tokens
+                self._pending.append(old)
+            should_compact = bool(self._pending) and not self._compacting
+            if should_compact:
+                self._compacting = True
+
+        if should_compact:
+            self._schedule_compaction()
+
+    def _schedule_compaction(self):
+        """Run compaction on the memory's loop without waiting for it."""
+        if self.loop is not None and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._compact(), self.loop)
+        else:
+            # No loop to summarize on; fold turns in with the extractive fallback
+            self._fold_pending(None)
+
+    async def _compact(self):
+        """Fold all pending turns into the running summary."""
+        while True:
+            with self._lock:
+                batch = list(self._pending)
+                summary = self.summary
+                if not batch:
+                    self._compacting = False
+                    return
+
+            new_summary = None
+            if self.summarizer is not None:
+                try:
+                    new_summary = await self.summarizer(summary, batch)
+                except Exception as e:
+                    logger.warning(f"Conversation summarization failed, using extractive fallback: {e}")
+            self._fold_pending(new_summary, batch)
+
+    def _fold_pending(self, new_summary: Optional[str], batch: Optional[List[Turn]] = None):
+        """Replace the summary and drop the turns it now covers."""
+        with self._lock:
+            if batch is None:
+                batch = list(self._pending)
+                self._compacting = False
+            if new_summary is None:
+                # Extractive fallback: append the turns and keep the most recent part
+                lines = [f"User: {t.user} / Assistant: {t.assistant}" for t in batch]
+                new_summary = "\n".join(([self.summary] if self.summary else []) + lines)
+                new_summary = truncate_to_tokens(new_summary, self.summary_tokens, keep_end=True)
+            else:
+                new_summary = truncate_to_tokens(new_summary.strip(), self.summary_tokens)
+            self.summary = new_summary
+            self._summary_token_count = count_tokens(new_summary)
+            del self._pending[:len(batch)]
+
+    def messages(self) -> List[Tuple[str, str]]:
+        """
+        Build the history part of a prompt within the token budget.
+
+        Returns:
+            (role, content) tuples: the summary (if any), then recent turns oldest first
+        """
+        with self._lock:
+            budget = self.token_budget - self._summary_token_count
+            selected: List[Turn] = []
+            # Turns awaiting compaction are still shown verbatim while they fit
+            for turn in reversed(list(self._pending) + list(self._turns)):
+                if turn.tokens > budget:
+                    break
+                selected.append(turn)
+                budget -= turn.tokens
+            summary = self.summary
+
+        messages: List[Tuple[str, str]] = []
+        if summary:
+            messages.append(("system", f"Summary of the earlier conversation:\n{summary}"))
+        for turn in reversed(selected):
+            messages.append(("human", turn.user))
+            messages.append(("assistant", turn.assistant))
+        return messages
+
+    def get_stats(self) -> dict:
+        """Get memory size information."""
+        with self._lock:
+            return {
+                "turns": len(self._turns),
+                "pending_compaction": len(self._pending),
+                "turn_tokens": self._turn_tokens,
+                "summary_tokens": self._summary_token_count,
+                "token_budget": self.token_budget,
+            }
@@ -0,0 +1,210 @@
+import json
+import logging
+import re
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Pattern
+
+logger = logging.getLogger(__name__)
+
+# Built-in command grammar. Each rule's patterns must match the whole (normalized)
+# utterance; named groups are substituted into the tool arguments and the reply.
+# A "url" group is turned into an absolute URL, and also provides "host".
+DEFAULT_GRAMMAR: List[Dict[str, Any]] = [
+    {"name": "back", "patterns": [r"(?:go |navigate )?back(?: a page)?"],
+     "tool": "browser_navigate_back", "arguments": {}, "reply": "Went back."},
+    {"name": "forward", "patterns": [r"(?:go |navigate )?forward(?: a page)?"],
+     "tool": "browser_navigate_forward", "arguments": {}, "reply": "Went forward."},
+    {"name": "reload", "patterns": [r"(?:reload|refresh)(?: the)?(?: page)?"],
+     "tool": "browser_press_key", "arguments": {"key": "F5"}, "reply": "Reloaded the page."},
+    {"name": "scroll_down", "patterns": [r"scroll down", r"page down"],
+     "tool": "browser_press_key", "arguments": {"key": "PageDown"}, "reply": "Scrolled down."},
+    {"name": "scroll_up", "patterns": [r"scroll up", r"page up"],
+     "tool": "browser_press_key", "arguments": {"key": "PageUp"}, "reply": "Scrolled up."},
+    {"name": "scroll_top", "patterns": [r"(?:scroll|go) (?:to|up to) the top(?: of the page)?"],
+     "tool": "browser_press_key", "arguments": {"key": "Home"}, "reply": "Scrolled to the top."},
+    {"name": "scroll_bottom", "patterns": [r"(?:scroll|go) (?:to|down to) the bottom(?: of the page)?"],
+     "tool": "browser_press_key", "arguments": {"key": "End"}, "reply": "Scrolled to the bottom."},
+    {"name": "open_url",
+     "patterns": [r"(?:open|go to|navigate to|visit|load)(?: the)?(?: website| site| page)? "
+                  r"(?P<url>(?:https?://)?(?:[\w-]+(?:\.| dot ))+[a-z]{2,}(?:/\S*)?)"],
+     "tool": "browser_navigate", "arguments": {"url": "{url}"}, "reply": "Opened {host}."},
+    {"name": "new_tab", "patterns": [r"(?:open )?(?:a )?new tab"],
+     "tool": "browser_tab_new", "arguments": {}, "reply": "Opened a new tab."},
+    {"name": "close_tab", "patterns": [r"close(?: this| the| current)? tab"],
+     "tool": "browser_tab_close", "arguments": {}, "reply": "Closed the tab."},
+    {"name": "press_enter", "patterns": [r"(?:press|hit) enter"],
+     "tool": "browser_press_key", "arguments": {"key": "Enter"}, "reply": "Pressed Enter."},
+    {"name": "press_escape", "patterns": [r"(?:press|hit) escape"],
+     "tool": "browser_press_key", "arguments": {"key": "Escape"}, "reply": "Pressed Escape."},
+]
+
+_POLITE_PREFIX = re.compile(r"^(?:(?:ok(?:ay)?|hey|please|now|then|can you|could you|would you)[, ]+)+")
+_POLITE_SUFFIX = re.compile(r"(?:[, ]+(?:please|thanks|thank you|now))+$")
+_EDGE_PUNCTUATION = " \t.,!?;:\"'"
+
+
+def normalize_command(text: str) -> str:
+    """Lowercase, collapse whitespace and strip punctuation and politeness around a spoken command."""
+    text = " ".join(text.lower().split()).strip(_EDGE_PUNCTUATION)
+    text = _POLITE_PREFIX.sub("", text)
+    text = _POLITE_SUFFIX.sub("", text)
+    return text.strip(_EDGE_PUNCTUATION)
+
+
+def _to_url(spoken: str) -> str:
+    """Turn a spoken or written address ("youtube dot com") into an absolute URL."""
+    url = spoken.replace(" dot ", ".").replace(" ", "")
+    return url if re.match(r"https?://", url) else f"https://{url}"
+
+
+class IntentRule(NamedTuple):
+    name: str
+    patterns: List[Pattern]
+    tool: str
+    arguments: Dict[str, Any]
+    reply: str
+
+
+class IntentMatch(NamedTuple):
+    """A command resolved to one MCP tool call."""
+    rule: str
+    tool: str
+    arguments: Dict[str, Any]
+    reply: str
+
+
+def load_rules(grammar: Iterable[Dict[str, Any]]) -> List[IntentRule]:
+    """
+    Compile grammar entries into rules.
+
+    Raises:
+        ValueError: If an entry is malformed or a pattern doesn't compile
+    """
+    rules = []
+    for entry in grammar:
+        try:
+            rules.append(IntentRule(
+                entry["name"],
+                [re.compile(pattern) for pattern in entry["patterns"]],
+                entry["tool"],
+                dict(entry.get("arguments") or {}),
+                entry.get("reply", "Done."),
+            ))
+        except (KeyError, TypeError, re.error) as e:
+            raise ValueError(f"Invalid fast-path rule {entry!r}: {e}") from e
+    return rules
+
+
+class IntentRouter:
+    """
+    Matches transcripts against a command grammar and resolves them to direct
+    Playwright MCP tool calls, so common navigation skips the LLM.
+
+    Input that matches no rule, or more than one, falls through to the agent.
+    """
+
+    def __init__(self, rules: List[IntentRule]):
+        """Initialize the router with compiled rules."""
+        self.rules = rules
+        self._lock = threading.Lock()
+
+        # Stats
+        self.checked = 0
+        self.missed = 0
+        self.ambiguous = 0
+        self.hits: Dict[str, int] = {}
+        self.failed: Dict[str, int] = {}
+        self._latency: Dict[str, float] = {}
+
+    @classmethod
+    def from_grammar_file(cls, path: Optional[str] = None) -> "IntentRouter":
+        """
+        Build a router from the built-in grammar plus the rules in a JSON file.
+
+        Rules in the file replace built-in rules with the same name.
+
+        Raises:
+            ValueError: If the file is not a JSON list of valid rules
+        """
+        grammar = {entry["name"]: entry for entry in DEFAULT_GRAMMAR}
+        if path:
+            with open(path, encoding="utf-8") as f:
+                extra = json.load(f)
+            if not isinstance(extra, list):
+                raise ValueError(f"Fast-path grammar {path} must be a JSON list of rules")
+            for entry in extra:
+                grammar[entry.get("name")] = entry
+            logger.info(f"Loaded {len(extra)} fast-path rule(s) from {path}")
+        return cls(load_rules(grammar.values()))
+
+    def restrict_to(self, tool_names: Iterable[str]):
+        """Drop rules whose tool the MCP server doesn't provide."""
+        available = set(tool_names)
+        dropped = [rule.name for rule in self.rules if rule.tool not in available]
+        if dropped:
+            logger.info(f"Fast-path rules disabled (tool not available): {', '.join(dropped)}")
+        self.rules = [rule for rule in self.rules if rule.tool in available]
+
+    def match(self, text: str) -> Optional[IntentMatch]:
+        """
+        Resolve a transcript to a tool call.
+
+        Returns:
+            The match, or None when no rule (or more than one rule) matches
+        """
+        command = normalize_command(text)
+        matches = []
+        for rule in self.rules:
+            for pattern in rule.patterns:
+                found = pattern.fullmatch(command)
+                if found:
+                    matches.append((rule, found.groupdict()))
+                    break
+
+        with self._lock:
+            self.checked += 1
+            if not matches:
+                self.missed += 1
+                return None
+            if len(matches) > 1:
+                self.ambiguous += 1
+                logger.info(f"Ambiguous command ({', '.join(rule.name for rule, _ in matches)}), using the agent")
+                return None
+
+        rule, groups = matches[0]
+        groups = {k: v for k, v in groups.items() if v is not None}
+        if "url" in groups:
+            groups["url"] = _to_url(groups["url"])
+            groups["host"] = re.sub(r"^https?://", "", groups["url"]).split("/")[0]
+        arguments = {k: v.format(**groups) if isinstance(v, str) else v for k, v in rule.arguments.items()}
+        return IntentMatch(rule.name, rule.tool, arguments, rule.reply.format(**groups))
+
+    def record(self, match: IntentMatch, seconds: float, ok: bool):
+        """Record the outcome of a fast-path tool call."""
+        with self._lock:
+            counts = self.hits if ok else self.failed
+            counts[match.rule] = counts.get(match.rule, 0) + 1
+            self._latency[match.rule] = self._latency.get(match.rule, 0.0) + seconds
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit rate and per-rule counts and mean latency."""
+        with self._lock:
+            hits = sum(self.hits.values())
+            rules = {}
+            for name in sorted(set(self.hits) | set(self.failed)):
+                calls = self.hits.get(name, 0) + self.failed.get(name, 0)
+                rules[name] = {
+                    "hits": self.hits.get(name, 0),
+                    "failed": self.failed.get(name, 0),
+                    "mean_ms": round(self._latency[name] / calls * 1000, 1),
+                }
+            return {
+                "rules": len(self.rules),
+                "checked": self.checked,
+                "hits": hits,
+                "missed": self.missed,
+                "ambiguous": self.ambiguous,
+                "failed": sum(self.failed.values()),
+                "hit_rate": round(hits / self.checked, 3) if self.checked else None,
+                "by_rule": rules,
+            }
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import logging
+import os
+import shlex
+import shutil
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.types import Tool as MCPTool
+
+from app.config.config import MCP_SERVER_COMMAND, MCP_SERVER_VERSION, MCP_TOOL_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+# Flags passed to the Playwright MCP server however it is launched
+SERVER_FLAGS = ["--browser", "chrome", "--isolated"]
+
+# Directories searched for a locally installed @playwright/mcp (backend/ and the repo root)
+_SEARCH_ROOTS = [
+    os.getcwd(),
+    os.path.dirname(os.getcwd()),
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")),
+]
+
+
+def _find_local_server() -> Tuple[Optional[str], Optional[str]]:
+    """Find a locally installed Playwright MCP server; returns (cli.js path, package version)."""
+    for root in _SEARCH_ROOTS:
+        package_dir = os.path.join(root, "node_modules", "@playwright", "mcp")
+        package_json = os.path.join(package_dir, "package.json")
+        cli = os.path.join(package_dir, "cli.js")
+        if os.path.isfile(package_json) and os.path.isfile(cli):
+            try:
+                with open(package_json, encoding="utf-8") as f:
+                    version = json.load(f).get("version")
+            except Exception:
+                version = None
+            return cli, version
+    return None, None
+
+
+def resolve_server() -> Tuple[StdioServerParameters, Optional[str]]:
+    """
+    Decide how to launch the Playwright MCP server.
+
+    In order of preference: an explicit DICTATE_MCP_SERVER_COMMAND, a local
+    node_modules install run directly with node (no npx resolution), then npx
+    with the configured version pin.
+
+    Returns:
+        Server parameters and the server version if it is known before launch
+    """
+    if MCP_SERVER_COMMAND:
+        parts = shlex.split(MCP_SERVER_COMMAND)
+        return StdioServerParameters(command=parts[0], args=parts[1:]), None
+
+    cli, version = _find_local_server()
+    node = shutil.which("node")
+    if cli and node:
+        logger.info(f"Using local Playwright MCP {version or ''} at {cli}")
+        return StdioServerParameters(command=node, args=[cli] + SERVER_FLAGS), version
+
+    pinned = MCP_SERVER_VERSION if MCP_SERVER_VERSION != "latest" else None
+    args = ["--prefer-offline", f"@playwright/mcp@{MCP_SERVER_VERSION}"] + SERVER_FLAGS
+    return StdioServerParameters(command="npx", args=args), pinned
+
+
+def server_signature(server: StdioServerParameters) -> str:
+    """Key identifying a server launch configuration in the tool schema cache."""
+    return " ".join([server.command] + list(server.args))
+
+
+class ToolSchemaCache:
+    """On-disk cache of MCP tool schemas keyed by server launch command and version."""
+
+    def __init__(self, path: Optional[str]):
+        """Initialize the cache (path None disables it)."""
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[str, Any]:
+        if not self.path or not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable MCP tool cache {self.path}: {e}")
+            return {}
+
+    def load(self, signature: str, version: Optional[str] = None) -> Optional[Tuple[Optional[str], List[MCPTool]]]:
+        """
+        Load cached tool schemas for a server.
+
+        Args:
+            signature: Server launch signature
+            version: Expected server version, if known before launch
+
+        Returns:
+            (cached server version, tools), or None on a miss
+        """
+        with self._lock:
+            entry = self._read().get(signature)
+        if not entry:
+            return None
+        if version is not None and entry.get("server_version") != version:
+            return None
+        try:
+            tools = [MCPTool.model_validate(t) for t in entry["tools"]]
+        except Exception as e:
+            logger.warning(f"Ignoring invalid MCP tool cache entry: {e}")
+            return None
+        return entry.get("server_version"), tools
+
+    def save(self, signature: str, version: Optional[str], tools: List[MCPTool]):
+        """Store tool schemas for a server."""
+        if not self.path:
+            return
+        with self._lock:
+            data = self._read()
+            data[signature] = {
+                "server_version": version,
+                "tools": [t.model_dump(mode="json", exclude_none=True) for t in tools]
+            }
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                logger.warning(f"Failed to write MCP tool cache {self.path}: {e}")
+
+
+async def list_all_tools(session: ClientSession) -> List[MCPTool]:
+    """List every tool of a server, following pagination."""
+    tools: List[MCPTool] = []
+    cursor = None
+    while True:
+        page = await session.list_tools(cursor=cursor) if cursor else await session.list_tools()
+        tools.extend(page.tools or [])
+        cursor = page.nextCursor
+        if not cursor:
+            return tools
+
+
+class DeferredSession:
+    """
+    Stand-in for an MCP ClientSession that isn't connected yet.
+
+    Tools built from cached schemas hold this object; their calls wait until the
+    real session is bound (or fail if the launch failed).
+    """
+
+    def __init__(self):
+        self._session: Optional[ClientSession] = None
+        self._error: Optional[BaseException] = None
+        self._ready = asyncio.Event()
+
+    def bind(self, session: ClientSession):
+        """Attach the connected session and release waiting calls."""
+        self._session = session
+        self._ready.set()
+
+    def fail(self, error: BaseException):
+        """Mark the launch as failed so waiting calls raise."""
+        self._error = error
+        self._ready.set()
+
+    async def call_tool(self, *args, **kwargs):
+        await self._ready.wait()
+        if self._session is None:
+            raise RuntimeError(f"MCP server unavailable: {self._error}")
+        return await self._session.call_tool(*args, **kwargs)
+
+
+# Shared by every browser session
+tool_cache = ToolSchemaCache(MCP_TOOL_CACHE_PATH or None)
@@ -0,0 +1,230 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .intent_router import normalize_command
+
+logger = logging.getLogger(__name__)
+
+# Playwright MCP tools that only read the open page; a turn that used any other tool
+# (click, type, fill_form, press_key, evaluate, navigate_back, ...) changed what is on
+# screen or on the site, and isn't cached, since a cache hit would not repeat it
+READ_ONLY_TOOLS = frozenset({
+    "browser_snapshot", "browser_take_screenshot", "browser_wait_for",
+    "browser_tab_list", "browser_console_messages", "browser_network_requests",
+})
+
+# Opens a URL; the one side effect a cache hit repeats, by opening the same page again
+NAVIGATE_TOOL = "browser_navigate"
+
+# Requests that refer back to earlier turns or the current page can't be answered from a cache
+CONTEXT_WORDS = frozenset({
+    "it", "its", "that", "this", "these", "those", "there", "them", "they", "he", "she", "his", "her",
+    "their", "again", "more", "next", "previous", "same", "above", "below", "first", "second", "last",
+})
+
+
+class CacheKeys(NamedTuple):
+    """Where the answer to a request may be cached."""
+    # Answers that don't depend on the open page: no tools, or the turn opened its own page first
+    anywhere: str
+    # Answers read from the page the session had open (None if its URL isn't known)
+    on_page: Optional[str]
+
+
+class CachedAnswer(NamedTuple):
+    """A cached answer and the page it was read from, which a hit opens again."""
+    text: str
+    url: Optional[str] = None
+
+
+def tool_calls(result) -> List[Tuple[str, Dict[str, Any]]]:
+    """Name and arguments of each tool call an agent run made, from the tool calls on its messages."""
+    calls = []
+    messages = result.get("messages", []) if isinstance(result, dict) else []
+    for message in messages:
+        for call in getattr(message, "tool_calls", None) or ():
+            calls.append((call.get("name", ""), call.get("args") or {}))
+    return calls
+
+
+def page_after(calls: Iterable[Tuple[str, Dict[str, Any]]], page_url: Optional[str],
+               read_only_tools: Iterable[str] = READ_ONLY_TOOLS) -> Optional[str]:
+    """
+    URL of the page open after some tool calls, or None if it isn't known.
+
+    Navigating opens a known URL, read-only tools leave the page as it was and
+    anything else (clicks, going back, key presses) may have changed it.
+    """
+    for name, args in calls:
+        if name == NAVIGATE_TOOL:
+            page_url = args.get("url") or None
+        elif name not in read_only_tools:
+            page_url = None
+    return page_url
+
+
+def context_fingerprint(*parts: Any) -> str:
+    """Hash of whatever besides the request text shapes an answer (model, prompt, tools)."""
+    return hashlib.blake2b("\0".join(str(part) for part in parts).encode("utf-8"), digest_size=8).hexdigest()
+
+
+class ResponseCache:
+    """
+    LRU cache of agent answers to read-only requests, with per-entry expiry.
+
+    Keys combine the normalized request text with a context fingerprint, so a
+    change of model, prompt or tools never serves stale answers. Answers read
+    from the open page are also keyed on its URL; answers to turns that opened
+    their own page ("what's the weather") are shared by every connection and
+    carry the URL, so a hit can open the page again.
+    """
+
+    def __init__(self, max_entries: int = 0, ttl: float = 300.0, read_only_tools: Iterable[str] = READ_ONLY_TOOLS):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum cached answers (0 disables the cache)
+            ttl: Default seconds an answer stays valid
+            read_only_tools: Tools that don't change browser or site state
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.read_only_tools = frozenset(read_only_tools)
+        self._entries: "OrderedDict[str, Tuple[CachedAnswer, float]]" = OrderedDict()
+        # Used from the runtime's callers, which may be on different threads
+        self._lock = threading.Lock()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.skipped_side_effects = 0
+        self.skipped_context = 0
+        self.skipped_page = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def keys(self, text: str, fingerprint: str, page_url: Optional[str] = None) -> Optional[CacheKeys]:
+        """
+        Cache keys of a request, or None if it must not be served from the cache.
+
+        Requests that refer to earlier turns ("open it", "read that again") are
+        never cached, since their answer depends on the conversation.
+
+        Args:
+            text: The request
+            fingerprint: From context_fingerprint()
+            page_url: URL of the page the session has open, if known
+        """
+        if not self.enabled:
+            return None
+        command = normalize_command(text)
+        if not command or CONTEXT_WORDS.intersection(command.replace("'", " ").split()):
+            with self._lock:
+                self.skipped_context += 1
+            return None
+        # "what's" and "whats" are the same request
+        command = " ".join(command.replace("'", "").split())
+        return CacheKeys(
+            anywhere=self._key(fingerprint, command, ""),
+            on_page=self._key(fingerprint, command, page_url) if page_url else None
+        )
+
+    @staticmethod
+    def _key(fingerprint: str, command: str, page: str) -> str:
+        return hashlib.blake2b(f"{fingerprint}\0{page}\0{command}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, keys: Optional[CacheKeys]) -> Optional[CachedAnswer]:
+        """Look up a cached answer, preferring one that doesn't depend on the open page."""
+        if keys is None:
+            return None
+        with self._lock:
+            for key in keys:
+                if key is None:
+                    continue
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if time.monotonic() < entry[1]:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[key]
+                self.expired += 1
+            self.misses += 1
+            return None
+
+    def put(self, keys: Optional[CacheKeys], response_text: str, calls: List[Tuple[str, Dict[str, Any]]],
+            ttl: Optional[float] = None) -> bool:
+        """
+        Cache an answer if the turn that produced it only read pages.
+
+        A turn that opened a page before reading it is cached for every page,
+        with the last URL it opened; a turn that only read the open page is
+        cached for that page's URL. Turns with any other side effect, or that
+        read the open page and then navigated away, are not cached.
+
+        Args:
+            keys: Keys from keys() (None skips caching)
+            response_text: The agent's answer
+            calls: Tool calls the turn made, from tool_calls()
+            ttl: Seconds this answer stays valid (the cache default if None)
+
+        Returns:
+            Whether the answer was cached
+        """
+        if keys is None:
+            return False
+        names = [name for name, _ in calls]
+        side_effects = [name for name in names if name not in self.read_only_tools and name != NAVIGATE_TOOL]
+        with self._lock:
+            if side_effects:
+                self.skipped_side_effects += 1
+                logger.debug(f"Not caching answer; turn used {', '.join(side_effects)}")
+                return False
+            if not names or names[0] == NAVIGATE_TOOL:
+                key = keys.anywhere
+                answer = CachedAnswer(response_text, page_after(calls, None, self.read_only_tools))
+            elif NAVIGATE_TOOL not in names and keys.on_page is not None:
+                key = keys.on_page
+                answer = CachedAnswer(response_text)
+            else:
+                # Read a page whose URL isn't known, or read the open page and then left it
+                self.skipped_page += 1
+                return False
+            self._entries[key] = (answer, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._entries.move_to_end(key)
+            self.stored += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stored": self.stored,
+                "skipped_side_effects": self.skipped_side_effects,
+                "skipped_context": self.skipped_context,
+                "skipped_page": self.skipped_page,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,312 @@
+import hashlib
+import inspect
+import logging
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config.config import AGENT_TOOL_COMPACTION, AGENT_TOOL_OUTPUT_TOKENS, AGENT_TOOL_OUTPUT_BUDGETS
+from .conversation_memory import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+# Token budgets for tools whose output is usually much larger (or smaller) than the default
+DEFAULT_TOOL_BUDGETS = {
+    "browser_snapshot": 2500,
+    "browser_navigate": 2500,
+    "browser_click": 2000,
+    "browser_type": 2000,
+    "browser_console_messages": 400,
+    "browser_network_requests": 600,
+}
+
+# Accessibility nodes that only group other nodes; without their own text they carry no information
+_EMPTY_CONTAINER = re.compile(
+    r"^\s*- (?:generic|group|list|listitem|region|none|presentation|separator|rowgroup|paragraph)"
+    r"(?: \[[^\]]*\])*:?$"
+)
+_REF = re.compile(r" \[ref=[^\]]+\]")
+_LONG_URL = re.compile(r"(/url: \S{80})\S+")
+_SNAPSHOT_BLOCK = re.compile(r"```yaml\n(.*?)```", re.S)
+_PAGE_FIELD = re.compile(r"^- Page (?:URL|Title): .*$", re.M)
+UNCHANGED_SNAPSHOT = "[Page snapshot unchanged since the previous tool result]"
+
+
+def parse_budgets(spec: str) -> Dict[str, int]:
+    """Parse "tool=tokens,tool=tokens" overrides."""
+    budgets = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        tool, _, tokens = item.partition("=")
+        budgets[tool.strip()] = int(tokens)
+    return budgets
+
+
+class _SnapshotNode:
+    """One accessibility snapshot line and the lines nested under it."""
+
+    __slots__ = ("line", "children", "identity", "has_ref")
+
+    def __init__(self, line: str):
+        """Initialize a node without children."""
+        self.line = line
+        self.children: List["_SnapshotNode"] = []
+        # Filled in by _fingerprint: the subtree without refs, and whether it has any
+        self.identity = None
+        self.has_ref = False
+
+
+def _parse_snapshot(snapshot: str) -> List[_SnapshotNode]:
+    """
+    Parse snapshot lines into a tree by indentation.
+
+    Empty container nodes are unwrapped: their children take their place (and
+    indentation), so nothing ends up nested under the wrong parent.
+    """
+    roots: List[_SnapshotNode] = []
+    # Open ancestors: (input indent, output indent, where their children go, unwrapped)
+    stack = [(-1, 0, roots, True)]
+    for line in snapshot.splitlines():
+        text = line.lstrip(" ")
+        if not text:
+            continue
+        indent = len(line) - len(text)
+        while stack[-1][0] >= indent:
+            stack.pop()
+        parent_indent, parent_out, siblings, unwrapped = stack[-1]
+        out = parent_out if unwrapped else parent_out + indent - parent_indent
+        if _EMPTY_CONTAINER.match(line):
+            stack.append((indent, out, siblings, True))
+            continue
+        node = _SnapshotNode(" " * out + _LONG_URL.sub(r"\1...", text))
+        siblings.append(node)
+        stack.append((indent, out, node.children, False))
+    return roots
+
+
+def _fingerprint(node: _SnapshotNode):
+    """Fill in identity and has_ref for a subtree (post-order)."""
+    for child in node.children:
+        _fingerprint(child)
+    node.identity = (_REF.sub("", node.line), tuple(child.identity for child in node.children))
+    node.has_ref = bool(_REF.search(node.line)) or any(child.has_ref for child in node.children)
+
+
+def _render_snapshot(nodes: List[_SnapshotNode], seen: set, lines: List[str]):
+    """
+    Write out a node list, dropping subtrees identical (but for refs) to one already written.
+
+    Dropped subtrees with refs are elements the agent could act on, so they are
+    not removed silently: each run of them becomes one "N similar items" line.
+    """
+    omitted = 0
+    marker_indent = ""
+    for node in nodes:
+        if node.identity in seen:
+            if node.has_ref:
+                omitted += 1
+                marker_indent = node.line[:len(node.line) - len(node.line.lstrip(" "))]
+            continue
+        if omitted:
+            lines.append(_similar_items(marker_indent, omitted))
+            omitted = 0
+        seen.add(node.identity)
+        lines.append(node.line)
+        _render_snapshot(node.children, seen, lines)
+    if omitted:
+        lines.append(_similar_items(marker_indent, omitted))
+
+
+def _similar_items(indent: str, count: int) -> str:
+    return f"{indent}- ({count} similar item{'s' if count > 1 else ''} omitted)"
+
+
+def prune_snapshot(snapshot: str) -> str:
+    """Drop empty container nodes, repeated subtrees and long URL tails from an accessibility snapshot."""
+    roots = _parse_snapshot(snapshot)
+    for root in roots:
+        _fingerprint(root)
+    # Repeated items (nav bars, cards) differ only by ref; the first one is enough to act on
+    lines: List[str] = []
+    _render_snapshot(roots, set(), lines)
+    return "\n".join(lines) + "\n"
+
+
+class ToolOutputCompactor:
+    """Shrinks tool output to per-tool token budgets and tracks how much it saved."""
+
+    def __init__(self, default_tokens: int = 1500, budgets: Optional[Dict[str, int]] = None):
+        """
+        Initialize the compactor.
+
+        Args:
+            default_tokens: Budget for tools without their own entry
+            budgets: Per-tool token budgets
+        """
+        self.default_tokens = default_tokens
+        self.budgets = {**DEFAULT_TOOL_BUDGETS, **(budgets or {})}
+        self._lock = threading.Lock()
+
+        # Stats
+        self.calls = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.unchanged_snapshots = 0
+
+    def compact(self, tool: str, text: str, previous_snapshot: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        """
+        Compact one text result.
+
+        Args:
+            tool: Tool that produced the text
+            text: The tool's text output
+            previous_snapshot: Digest of the last snapshot this run has already seen
+
+        Returns:
+            The compacted text, and the digest of the snapshot it contained (if any)
+        """
+        digest = None
+        match = _SNAPSHOT_BLOCK.search(text)
+        if match:
+            pruned = prune_snapshot(match.group(1))
+            digest = hashlib.blake2b(pruned.encode("utf-8"), digest_size=8).hexdigest()
+            if digest == previous_snapshot:
+                replacement = UNCHANGED_SNAPSHOT
+                with self._lock:
+                    self.unchanged_snapshots += 1
+            else:
+                replacement = f"```yaml\n{pruned}```"
+            text = text[:match.start()] + replacement + text[match.end():]
+
+        budget = self.budgets.get(tool, self.default_tokens)
+        if count_tokens(text) > budget:
+            text = truncate_to_tokens(text, budget) + "\n[... output truncated]"
+        return text, digest
+
+    def record(self, tool: str, tokens_in: int, tokens_out: int):
+        """Record the size of one result before and after compaction."""
+        with self._lock:
+            self.calls += 1
+            self.tokens_in += tokens_in
+            self.tokens_out += tokens_out
+        logger.info(f"🗜️ {tool} output: {tokens_in} -> {tokens_out} tokens")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get token totals before and after compaction."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "tokens_in": self.tokens_in,
+                "tokens_out": self.tokens_out,
+                "saved_fraction": round(1 - self.tokens_out / self.tokens_in, 3) if self.tokens_in else None,
+                "unchanged_snapshots": self.unchanged_snapshots,
+            }
+
+
+class CompactingSession:
+    """
+    MCP session proxy handed to the LangChain tool wrappers, so every tool
+    result is compacted before it enters the agent's message history.
+    """
+
+    def __init__(self, session, compactor: ToolOutputCompactor):
+        self._session = session
+        self.compactor = compactor
+        # Digest of the last page snapshot of the current run, for deduplication
+        self._last_snapshot: Optional[str] = None
+
+    def new_run(self):
+        """Forget the previous run's snapshot (its tool messages aren't in the new run's context)."""
+        self._last_snapshot = None
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None, *args, **kwargs):
+        result = await self._session.call_tool(name, arguments, *args, **kwargs)
+        contents = getattr(result, "content", None)
+        if not contents:
+            return result
+
+        compacted = []
+        tokens_in = tokens_out = 0
+        for item in contents:
+            if getattr(item, "type", None) == "text":
+                text, digest = self.compactor.compact(name, item.text, self._last_snapshot)
+                if digest is not None:
+                    self._last_snapshot = digest
+                tokens_in += count_tokens(item.text)
+                tokens_out += count_tokens(text)
+                item = item.model_copy(update={"text": text})
+            compacted.append(item)
+        self.compactor.record(name, tokens_in, tokens_out)
+        return result.model_copy(update={"content": compacted})
+
+    def __getattr__(self, name: str):
+        return getattr(self._session, name)
+
+
+def _text(content) -> str:
+    """Text of a message's content (a string, or a list of content blocks)."""
+    if isinstance(content, str):
+        return content
+    return "\n".join(
+        block if isinstance(block, str) else str(block.get("text", "")) if isinstance(block, dict) else str(block)
+        for block in content
+    )
+
+
+def _summarize_tool_message(message, content: str) -> str:
+    """One-line stand-in for an earlier step's tool result."""
+    fields = _PAGE_FIELD.findall(content)
+    gist = "; ".join(field[2:] for field in fields) if fields else " ".join(content.split())[:160]
+    return f"[Earlier {message.name or 'tool'} result, {count_tokens(content)} tokens, omitted. {gist}]"
+
+
+def compact_history(state) -> List[Any]:
+    """
+    Build the messages for one LLM step of a ReAct run.
+
+    Results of the latest tool step are kept verbatim; results of earlier steps
+    are replaced by one-line summaries, except the last full page snapshot when
+    a later result only says the page is unchanged. Tool messages keep their
+    tool_call_id, so the call/result pairing the API requires is preserved.
+    """
+    messages = state["messages"] if isinstance(state, dict) else state.messages
+    last_ai = max((i for i, m in enumerate(messages) if getattr(m, "type", None) == "ai"), default=-1)
+
+    compacted = []
+    before = after = 0
+    needs_snapshot = False
+    # Walk backwards so a later "unchanged" marker can keep the snapshot it refers to
+    for i in range(len(messages) - 1, -1, -1):
+        message = messages[i]
+        content = _text(message.content)
+        tokens = count_tokens(content)
+        before += tokens
+        if getattr(message, "type", None) == "tool":
+            has_snapshot = "```yaml" in content
+            keep = i > last_ai or (needs_snapshot and has_snapshot)
+            if has_snapshot:
+                needs_snapshot = False
+            if UNCHANGED_SNAPSHOT in content:
+                needs_snapshot = True
+            if not keep:
+                message = message.model_copy(update={"content": _summarize_tool_message(message, content)})
+                tokens = count_tokens(message.content)
+        after += tokens
+        compacted.append(message)
+    compacted.reverse()
+
+    logger.info(f"🧠 LLM step with {len(messages)} messages: {before} -> {after} tokens")
+    return compacted
+
+
+def history_compaction_kwargs() -> Dict[str, Any]:
+    """create_react_agent argument that installs compact_history (named prompt, or state_modifier before LangGraph 0.3)."""
+    if not AGENT_TOOL_COMPACTION:
+        return {}
+    from langgraph.prebuilt import create_react_agent
+    parameters = inspect.signature(create_react_agent).parameters
+    name = "prompt" if "prompt" in parameters else "state_modifier"
+    return {name: compact_history}
+
+
+# Shared by every browser session
+tool_compactor = ToolOutputCompactor(AGENT_TOOL_OUTPUT_TOKENS, parse_budgets(AGENT_TOOL_OUTPUT_BUDGETS))
@@ -0,0 +1,177 @@
+import bisect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.config.config import TRACE_CAPACITY
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from websocket hops up to multi-step agent turns
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """Initialize an empty histogram."""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """Record one value."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile as the upper bound of the bucket it falls in."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    """
+    Per-stage timing histograms, event counters and optional per-request traces.
+
+    Stages are labelled by name (and optionally a small, bounded label such as
+    a tool name). The correlation id is deliberately not a label, since it would
+    create one series per request; instead, when tracing is enabled, each
+    observation is also appended to a bounded per-corr trace.
+    """
+
+    def __init__(self, trace_capacity: int = 0):
+        """
+        Initialize the registry.
+
+        Args:
+            trace_capacity: Number of recent request traces kept (0 disables tracing)
+        """
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.counters: Dict[Tuple[str, str], int] = {}
+        self.trace_capacity = trace_capacity
+        self.traces: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        # Observations come from the event loop, the agent runtime thread and worker threads
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float, correlation_id: Optional[str] = None, label: str = ""):
+        """
+        Record how long a stage took.
+
+        Args:
+            stage: Stage name (e.g. 'transcribe', 'agent_turn')
+            seconds: Duration
+            correlation_id: Request the stage belonged to, for the trace
+            label: Optional sub-label (e.g. the tool name of a 'tool_call')
+        """
+        with self._lock:
+            histogram = self.histograms.get((stage, label))
+            if histogram is None:
+                histogram = self.histograms[(stage, label)] = Histogram()
+            histogram.observe(seconds)
+
+            if self.trace_capacity and correlation_id:
+                trace = self.traces.get(correlation_id)
+                if trace is None:
+                    trace = self.traces[correlation_id] = []
+                    while len(self.traces) > self.trace_capacity:
+                        self.traces.popitem(last=False)
+                trace.append({
+                    "stage": stage,
+                    "label": label or None,
+                    "ms": round(seconds * 1000, 2),
+                    "end": time.time()
+                })
+
+    def increment(self, event: str, label: str = "", value: int = 1):
+        """
+        Count an event.
+
+        Args:
+            event: Event name (e.g. 'busy_rejected', 'transcription_cache_hit')
+            label: Optional bounded sub-label (e.g. the websocket lane)
+            value: Amount to add
+        """
+        with self._lock:
+            self.counters[(event, label)] = self.counters.get((event, label), 0) + value
+
+    @contextmanager
+    def timer(self, stage: str, correlation_id: Optional[str] = None, label: str = "") -> Iterator[None]:
+        """Time the enclosed block (works around awaits too) and record it as a stage."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started, correlation_id, label)
+
+    def get_trace(self, correlation_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Get the recorded stages of one request, in completion order."""
+        with self._lock:
+            trace = self.traces.get(correlation_id)
+            return list(trace) if trace is not None else None
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Get count, mean and estimated p50/p95/p99 in ms per stage, and the event counts."""
+        stages = {}
+        with self._lock:
+            for (stage, label), histogram in sorted(self.histograms.items()):
+                stages[_key(stage, label)] = {
+                    "count": histogram.count,
+                    "mean_ms": round(histogram.sum / histogram.count * 1000, 2),
+                    **{f"p{int(q * 100)}_ms": _ms(histogram.quantile(q)) for q in (0.5, 0.95, 0.99)}
+                }
+            counters = {_key(event, label): count for (event, label), count in sorted(self.counters.items())}
+        return {"stages": stages, "counters": counters}
+
+    def render_prometheus(self) -> str:
+        """Render all histograms and counters in the Prometheus text exposition format."""
+        lines = [
+            "# HELP dictate_stage_seconds Time spent in each request processing stage.",
+            "# TYPE dictate_stage_seconds histogram",
+        ]
+        with self._lock:
+            for (stage, label), histogram in sorted(self.histograms.items()):
+                labels = f'stage="{stage}"' + (f',label="{_escape(label)}"' if label else "")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'dictate_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'dictate_stage_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"dictate_stage_seconds_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"dictate_stage_seconds_count{{{labels}}} {histogram.count}")
+            lines.append("# HELP dictate_events_total Count of notable events (rejections, cache hits, errors).")
+            lines.append("# TYPE dictate_events_total counter")
+            for (event, label), count in sorted(self.counters.items()):
+                labels = f'event="{event}"' + (f',label="{_escape(label)}"' if label else "")
+                lines.append(f"dictate_events_total{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _key(name: str, label: str) -> str:
+    return f"{name}:{label}" if label else name
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    # Values past the last bucket have no upper bound (and inf isn't valid JSON)
+    return None if seconds is None or seconds == float("inf") else seconds * 1000
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Global registry instance - shared by the websocket handlers and the /metrics endpoint
+metrics = MetricsRegistry(trace_capacity=TRACE_CAPACITY)
@@ -0,0 +1,76 @@
+import logging
+import time
+from typing import Any, Awaitable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ComponentStatus:
+    """Load state of one heavy backend component."""
+
+    def __init__(self, name: str):
+        """Initialize a component that hasn't started loading yet."""
+        self.name = name
+        self.state = "pending"
+        self.load_time: Optional[float] = None
+        self.error: Optional[str] = None
+        self._started_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the status as a JSON-serializable dict."""
+        return {
+            "state": self.state,
+            "load_time_s": round(self.load_time, 3) if self.load_time is not None else None,
+            "error": self.error
+        }
+
+
+class ReadinessRegistry:
+    """Tracks warm-up of backend components for the readiness endpoint."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self.components: Dict[str, ComponentStatus] = {}
+
+    def register(self, name: str) -> ComponentStatus:
+        """Register a component (idempotent) and return its status."""
+        if name not in self.components:
+            self.components[name] = ComponentStatus(name)
+        return self.components[name]
+
+    async def track(self, name: str, warm_up: Awaitable[Any]):
+        """
+        Await a component's warm-up and record its state and load time.
+
+        Failures are recorded rather than raised, so one broken component
+        doesn't stop the others from warming up.
+        """
+        status = self.register(name)
+        status.state = "loading"
+        status._started_at = time.monotonic()
+        logger.info(f"🔥 Warming up {name}...")
+        try:
+            await warm_up
+            status.state = "ready"
+            logger.info(f"✅ {name} ready in {time.monotonic() - status._started_at:.2f}s")
+        except Exception as e:
+            status.state = "failed"
+            status.error = str(e)
+            logger.error(f"❌ Failed to warm up {name}: {e}")
+        finally:
+            status.load_time = time.monotonic() - status._started_at
+
+    def is_ready(self) -> bool:
+        """Check whether every registered component is ready."""
+        return all(status.state == "ready" for status in self.components.values())
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get overall readiness and per-component state."""
+        return {
+            "ready": self.is_ready(),
+            "components": {name: status.to_dict() for name, status in self.components.items()}
+        }
+
+
+# Global registry instance - shared by the lifespan hook and the readiness endpoint
+readiness = ReadinessRegistry()
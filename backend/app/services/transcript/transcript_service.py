@@ -1,17 +1,261 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import uuid
+from collections import deque
 from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
 
 class TranscriptService:
-    def __init__(self):
-        self.transcripts = []
-    
+    """
+    Bounded, persistent transcript store.
+
+    Recent messages live in a fixed-size ring buffer; every message is also
+    appended to SQLite by a background writer in batches, so storing never
+    blocks the event loop on disk I/O. History is read back with paginated
+    and time-range queries.
+
+    With persistence, SQLite assigns message ids when the writer inserts them,
+    so several workers can share one database; a message's id is None until
+    then, and its uid identifies it meanwhile.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, buffer_size: int = 500, batch_size: int = 50,
+                 flush_interval: float = 0.5, queue_size: int = 10000):
+        """
+        Initialize the store.
+
+        Args:
+            db_path: SQLite file for persistence (None keeps only the ring buffer)
+            buffer_size: Number of recent messages kept in memory
+            batch_size: Maximum rows written per transaction
+            flush_interval: Maximum seconds a message waits before being written
+            queue_size: Messages waiting for the writer; beyond this, messages stay
+                in memory only (and a warning is logged)
+        """
+        self.transcripts = deque(maxlen=buffer_size)
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Ids for the memory-only store; with a database, SQLite assigns them
+        self._next_id = 1
+        self._id_lock = threading.Lock()
+        self._conn = None
+        self._queue: "queue.Queue[Optional[Tuple[Dict[str, Any], float]]]" = queue.Queue(maxsize=queue_size)
+        self._writer = None
+        self.dropped = 0
+
+        if db_path:
+            try:
+                self._open_db(db_path)
+            except Exception as e:
+                logger.error(f"Transcript persistence disabled, failed to open {db_path}: {e}")
+                self._conn = None
+
+    def _open_db(self, db_path: str):
+        """Open the database, load the recent tail into the ring buffer and start the writer."""
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS transcripts ("
+            "id INTEGER PRIMARY KEY, sender TEXT NOT NULL, text TEXT NOT NULL, "
+            "timestamp TEXT NOT NULL, ts REAL NOT NULL)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(transcripts)")}
+        if "uid" not in columns:
+            # Databases written before uids existed
+            self._conn.execute("ALTER TABLE transcripts ADD COLUMN uid TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS transcripts_ts ON transcripts (ts)")
+        self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS transcripts_uid ON transcripts (uid)")
+        self._conn.commit()
+        self._db_lock = threading.Lock()
+
+        rows = self._conn.execute(
+            f"SELECT {self._COLUMNS} FROM transcripts ORDER BY id DESC LIMIT ?",
+            (self.transcripts.maxlen,)
+        ).fetchall()
+        for row in reversed(rows):
+            self.transcripts.append(self._row_to_message(row))
+
+        self._writer = threading.Thread(target=self._write_loop, name="transcript-writer", daemon=True)
+        self._writer.start()
+
+    _COLUMNS = "id, uid, sender, text, timestamp"
+
+    @staticmethod
+    def _row_to_message(row) -> Dict[str, Any]:
+        return {"id": row[0], "uid": row[1], "sender": row[2], "text": row[3], "timestamp": row[4]}
+
     def store_transcript(self, text: str, sender: str = "User"):
         """Store transcript and return formatted message for WebSocket"""
+        now = datetime.now()
         message = {
+            "id": None,
+            "uid": uuid.uuid4().hex,
             "sender": sender,
             "text": text,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now.isoformat()
         }
-        
+
+        if self._writer is None:
+            with self._id_lock:
+                message["id"] = self._next_id
+                self._next_id += 1
+        else:
+            try:
+                self._queue.put_nowait((message, now.timestamp()))
+            except queue.Full:
+                self.dropped += 1
+                logger.warning(f"Transcript writer is behind; message kept in memory only ({self.dropped} dropped)")
+
         self.transcripts.append(message)
         return message
-    
+
+    def _write_loop(self):
+        """Background writer: batch queued messages into single transactions."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            batch = [item]
+            stop = False
+            # Collect whatever else arrives within the flush window, up to batch_size
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            try:
+                with self._db_lock:
+                    ids = [
+                        self._conn.execute(
+                            "INSERT INTO transcripts (uid, sender, text, timestamp, ts) VALUES (?, ?, ?, ?, ?)",
+                            (m["uid"], m["sender"], m["text"], m["timestamp"], ts)
+                        ).lastrowid
+                        for m, ts in batch
+                    ]
+                    self._conn.commit()
+                # The ring buffer holds the same dicts, so recent reads see the ids too
+                for (m, _), message_id in zip(batch, ids):
+                    m["id"] = message_id
+            except Exception as e:
+                with self._db_lock:
+                    self._conn.rollback()
+                logger.error(f"Failed to persist {len(batch)} transcript messages: {e}")
+            finally:
+                for _ in range(len(batch) + (1 if stop else 0)):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def flush(self):
+        """Block until every stored message has been written to disk (reads don't need this)."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self):
+        """Flush pending writes and stop the writer."""
+        if self._writer is not None:
+            try:
+                self._queue.put(None, timeout=5)
+            except queue.Full:
+                logger.error("Transcript writer is stuck; unwritten messages are lost")
+            self._writer.join(timeout=5)
+            self._writer = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def get_recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get the most recent messages from the ring buffer, oldest first."""
+        if limit <= 0:
+            return []
+        return list(self.transcripts)[-limit:]
+
+    def get_page(self, limit: int = 50, before_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Page backwards through history, newest first.
+
+        Args:
+            limit: Maximum number of messages
+            before_id: Only return messages with a smaller id (cursor from the previous page)
+
+        Returns:
+            Dict with 'items' and 'next_before_id' (None on the last page)
+        """
+        newest = None
+        if self._conn is None:
+            items = [m for m in reversed(self.transcripts) if before_id is None or m["id"] < before_id][:limit]
+        else:
+            # Messages still waiting for the writer are the newest, so they lead the first page
+            pending = [m for m in reversed(self.transcripts) if m["id"] is None] if before_id is None else []
+            with self._db_lock:
+                rows = self._conn.execute(
+                    f"SELECT {self._COLUMNS} FROM transcripts WHERE id < ? ORDER BY id DESC LIMIT ?",
+                    (before_id if before_id is not None else 2 ** 63 - 1, limit)
+                ).fetchall()
+                if before_id is None:
+                    newest = self._conn.execute("SELECT MAX(id) FROM transcripts").fetchone()[0]
+            committed = [self._row_to_message(row) for row in rows]
+            # A message may have been written between the two reads
+            seen = {m["uid"] for m in committed}
+            items = ([m for m in pending if m["uid"] not in seen] + committed)[:limit]
+
+        next_before_id = None
+        if len(items) == limit:
+            ids = [m["id"] for m in items if m["id"] is not None]
+            if ids:
+                next_before_id = min(ids)
+            elif newest is not None:
+                # A first page of pending messages only; history continues below them
+                next_before_id = newest + 1
+        return {"items": items, "next_before_id": next_before_id}
+
+    def get_range(self, start: Optional[datetime] = None, end: Optional[datetime] = None, limit: int = 100, after_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get messages within a time range, oldest first.
+
+        Args:
+            start: Inclusive lower bound on the message time
+            end: Exclusive upper bound on the message time
+            limit: Maximum number of messages
+            after_id: Only return messages with a larger id (cursor from the previous page)
+
+        Returns:
+            Dict with 'items' and 'next_after_id' (None on the last page)
+        """
+        start_ts = start.timestamp() if start else float("-inf")
+        end_ts = end.timestamp() if end else float("inf")
+        after = after_id if after_id is not None else 0
+
+        if self._conn is None:
+            items = [
+                m for m in self.transcripts
+                if m["id"] > after and start_ts <= datetime.fromisoformat(m["timestamp"]).timestamp() < end_ts
+            ][:limit]
+        else:
+            # Only committed messages: they have the ids the after_id cursor pages by
+            with self._db_lock:
+                rows = self._conn.execute(
+                    f"SELECT {self._COLUMNS} FROM transcripts "
+                    "WHERE ts >= ? AND ts < ? AND id > ? ORDER BY id ASC LIMIT ?",
+                    (start_ts, end_ts, after, limit)
+                ).fetchall()
+            items = [self._row_to_message(row) for row in rows]
+
+        next_after_id = items[-1]["id"] if len(items) == limit else None
+        return {"items": items, "next_after_id": next_after_id}
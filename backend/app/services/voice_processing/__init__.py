@@ -1,4 +1,9 @@
+from .transcription_pool import TranscriptionPool, TranscriptionQueueFull
+from .engines import ENGINES, DecodeOptions, TranscriptionEngine
 from .whisper_client import WhisperClient
+from .vad import EnergyVAD
+from .streaming_transcriber import StreamingTranscriptionSession
+from .bulk_transcription import BulkTranscriptionJob
 from .audio_transcription_service import AudioTranscriptionService
 
-__all__ = ['WhisperClient', 'AudioTranscriptionService']
+__all__ = ['TranscriptionPool', 'TranscriptionQueueFull', 'ENGINES', 'DecodeOptions', 'TranscriptionEngine', 'WhisperClient', 'EnergyVAD', 'StreamingTranscriptionSession', 'BulkTranscriptionJob', 'AudioTranscriptionService']
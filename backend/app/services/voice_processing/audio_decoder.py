@@ -0,0 +1,219 @@
+import io
+import logging
+import subprocess
+from typing import List, Optional, Tuple, Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# PyAV decodes WebM/Opus in-process; without it we pipe through an ffmpeg subprocess.
+# It loads the FFmpeg libraries, so it's imported on the first compressed decode.
+_av = None
+_av_checked = False
+
+
+def _get_av():
+    """Import PyAV once; None when it isn't installed."""
+    global _av, _av_checked
+    if not _av_checked:
+        try:
+            import av
+            _av = av
+        except ImportError:
+            _av = None
+        _av_checked = True
+    return _av
+
+SAMPLE_RATE = 16000
+
+PCM_FORMATS = {
+    "pcm_f32le": np.dtype("<f4"),
+    "pcm_s16le": np.dtype("<i2"),
+}
+SUPPORTED_FORMATS = ("webm",) + tuple(PCM_FORMATS)
+
+AudioBytes = Union[bytes, bytearray, memoryview]
+
+
+def is_pcm_format(audio_format: str) -> bool:
+    """Check whether the format is raw PCM (no container decode needed)."""
+    return audio_format in PCM_FORMATS
+
+
+def decode_pcm(audio_data: AudioBytes, audio_format: str) -> np.ndarray:
+    """
+    Convert raw 16 kHz mono PCM bytes to float32 samples.
+
+    A trailing partial sample (e.g. a stream chunk split mid-sample) is ignored.
+    """
+    dtype = PCM_FORMATS[audio_format]
+    usable = len(audio_data) - len(audio_data) % dtype.itemsize
+    samples = np.frombuffer(audio_data, dtype=dtype, count=usable // dtype.itemsize)
+    if audio_format == "pcm_s16le":
+        return samples.astype(np.float32) / 32768.0
+    # Whisper hands the array to torch, which wants writable memory
+    return samples if samples.flags.writeable else samples.copy()
+
+
+def _decode_with_av(audio_data: AudioBytes) -> np.ndarray:
+    """Decode a compressed clip in-process with PyAV and resample to 16 kHz mono."""
+    av = _get_av()
+    resampler = av.AudioResampler(format="flt", layout="mono", rate=SAMPLE_RATE)
+    chunks = []
+    with av.open(io.BytesIO(audio_data), mode="r") as container:
+        try:
+            for frame in container.decode(audio=0):
+                for resampled in resampler.resample(frame):
+                    chunks.append(resampled.to_ndarray().reshape(-1))
+        except av.error.FFmpegError as e:
+            # A growing stream usually ends mid-cluster; keep what decoded cleanly
+            if not chunks:
+                raise
+            logger.debug(f"Stopped decoding at truncated data: {e}")
+        for resampled in resampler.resample(None):
+            chunks.append(resampled.to_ndarray().reshape(-1))
+
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(chunks).astype(np.float32, copy=False)
+
+
+def _decode_with_ffmpeg(audio_data: AudioBytes) -> np.ndarray:
+    """Decode a compressed clip by piping it through ffmpeg (stdin to stdout, no temp files)."""
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-loglevel", "error",
+        "pipe:1",
+    ]
+    try:
+        out = subprocess.run(cmd, input=audio_data, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise Exception(f"Failed to decode audio: {e.stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(out, dtype=np.float32).copy()
+
+
+# WebM (Matroska) element ids
+_EBML_HEADER = 0x1A45DFA3
+_SEGMENT = 0x18538067
+_CLUSTER = 0x1F43B675
+# Elements that sit directly in the Segment; one of these ends a cluster written with unknown size
+_SEGMENT_CHILDREN = frozenset({
+    _CLUSTER, 0x114D9B74, 0x1549A966, 0x1654AE6B, 0x1C53BB6B, 0x1941A469, 0x1043A770, 0x1254C367,
+})
+
+
+def _read_vint(data: AudioBytes, pos: int, is_id: bool = False) -> Optional[Tuple[Optional[int], int]]:
+    """
+    Read an EBML variable-length integer.
+
+    Returns:
+        (value, length in bytes), with value None for an unknown size, or None
+        if the data ends before the integer does
+    """
+    if pos >= len(data):
+        return None
+    first = data[pos]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > (4 if is_id else 8):
+        raise ValueError("Invalid EBML integer")
+    if pos + length > len(data):
+        return None
+    value = first if is_id else first & (0xFF >> length)
+    for byte in data[pos + 1:pos + length]:
+        value = (value << 8) | byte
+    if not is_id and value == (1 << (7 * length)) - 1:
+        value = None
+    return value, length
+
+
+def _read_element(data: AudioBytes, pos: int) -> Optional[Tuple[int, Optional[int], int]]:
+    """Read an element header: (id, data size or None if unknown, header length), or None if truncated."""
+    element_id = _read_vint(data, pos, is_id=True)
+    if element_id is None:
+        return None
+    size = _read_vint(data, pos + element_id[1])
+    if size is None:
+        return None
+    return element_id[0], size[0], element_id[1] + size[1]
+
+
+def webm_cluster_starts(data: AudioBytes) -> List[int]:
+    """
+    Find the byte offsets of the clusters in a (possibly still growing) WebM stream.
+
+    Everything before the first cluster is the header (EBML header, segment
+    info, tracks), which together with any run of whole clusters forms a
+    decodable stream. MediaRecorder writes the segment and its clusters with
+    unknown sizes, so clusters are walked child by child.
+
+    Returns:
+        Offsets of the clusters that have started (the last one may be incomplete)
+
+    Raises:
+        ValueError: If the data isn't WebM
+    """
+    header = _read_element(data, 0)
+    if header is None:
+        return []
+    element_id, size, length = header
+    if element_id != _EBML_HEADER or size is None:
+        raise ValueError("Not a WebM stream")
+    pos = length + size
+    segment = _read_element(data, pos)
+    if segment is None:
+        return []
+    if segment[0] != _SEGMENT:
+        raise ValueError("Not a WebM stream")
+    pos += segment[2]
+
+    starts = []
+    while True:
+        element = _read_element(data, pos)
+        if element is None:
+            return starts
+        element_id, size, length = element
+        if element_id == _CLUSTER:
+            starts.append(pos)
+        if size is not None:
+            pos += length + size
+            continue
+        if element_id != _CLUSTER:
+            return starts
+        # Unknown-size cluster: it ends where the next segment-level element begins
+        pos += length
+        while True:
+            child = _read_element(data, pos)
+            if child is None:
+                return starts
+            if child[0] in _SEGMENT_CHILDREN:
+                break
+            if child[1] is None:
+                return starts
+            pos += child[2] + child[1]
+
+
+def decode_audio(audio_data: AudioBytes, audio_format: str = "webm") -> np.ndarray:
+    """
+    Decode audio bytes to 16 kHz mono float32 PCM entirely in memory.
+
+    Args:
+        audio_data: Encoded audio (WebM/Opus) or raw PCM bytes
+        audio_format: One of SUPPORTED_FORMATS
+
+    Returns:
+        Mono float32 samples at 16 kHz
+
+    Raises:
+        Exception: If the format is unsupported or decoding fails
+    """
+    if is_pcm_format(audio_format):
+        return decode_pcm(audio_data, audio_format)
+    if audio_format != "webm":
+        raise Exception(f"Unsupported audio format: {audio_format}")
+    if _get_av() is not None:
+        return _decode_with_av(audio_data)
+    return _decode_with_ffmpeg(audio_data)
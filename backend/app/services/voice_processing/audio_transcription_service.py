@@ -1,7 +1,19 @@
+import asyncio
 import base64
 import logging
 from typing import Dict, Any, Optional
+from app.config.config import (
+    WHISPER_MODEL, STREAM_PARTIAL_INTERVAL, STREAM_MAX_SECONDS, STREAM_MAX_WINDOW_SECONDS, VAD_MIN_SILENCE_MS, BULK_BATCH_SIZE, BULK_SORT_WINDOW,
+    TRANSCRIPTION_CACHE_SIZE, TRANSCRIPTION_CACHE_TTL, TRANSCRIPTION_CACHE_PATH, TRANSCRIPTION_CACHE_DISK_SIZE
+)
+from app.services.metrics import metrics
+from .audio_decoder import AudioBytes, SUPPORTED_FORMATS
+from .transcription_cache import TranscriptionCache, cache_key
+from .transcription_pool import TranscriptionQueueFull
 from .whisper_client import WhisperClient
+from .vad import EnergyVAD
+from .streaming_transcriber import StreamingTranscriptionSession
+from .bulk_transcription import BulkTranscriptionJob
 
 logger = logging.getLogger(__name__)
 
@@ -11,9 +23,18 @@ class AudioTranscriptionService:
     Manages Whisper client and provides clean interface for audio-to-text conversion.
     """
     
-    def __init__(self, model_name: str = "base"):
+    def __init__(self, model_name: str = WHISPER_MODEL):
         """Initialize the audio transcription service."""
         self.whisper_client = WhisperClient(model_name)
+        self.vad = EnergyVAD(min_silence_ms=VAD_MIN_SILENCE_MS)
+        self.cache = TranscriptionCache(
+            max_entries=TRANSCRIPTION_CACHE_SIZE,
+            ttl=TRANSCRIPTION_CACHE_TTL,
+            disk_path=TRANSCRIPTION_CACHE_PATH or None,
+            disk_max_entries=TRANSCRIPTION_CACHE_DISK_SIZE
+        )
+        # Identical clips already being decoded, so concurrent retries share one decode
+        self._inflight: Dict[str, asyncio.Future] = {}
         logger.info("✅ Audio transcription service initialized")
     
     async def transcribe_audio_message(self, message_data: Dict[str, Any]) -> str:
@@ -30,29 +51,116 @@ class AudioTranscriptionService:
             Exception: If audio data is missing or transcription fails
         """
         try:
-            # Get audio data from message
-            audio_data_b64 = message_data.get("audio_data")
-            if not audio_data_b64:
-                raise Exception("Missing 'audio_data' field in audio message")
+            audio_data = self.decode_audio_payload(message_data)
+        except Exception as e:
+            logger.error(f"Error in audio transcription service: {e}")
+            raise Exception(f"Audio transcription failed: {str(e)}")
+        
+        return await self.transcribe_audio(audio_data, message_data.get("format", "webm"))
+    
+    async def transcribe_audio(self, audio_data: AudioBytes, audio_format: str = "webm") -> str:
+        """
+        Transcribe raw audio bytes (e.g., the payload of a binary frame).
+        
+        Results are cached by content, so a repeated clip costs one hash.
+        
+        Args:
+            audio_data: Audio bytes; a memoryview is passed through without copying
+            audio_format: "webm", or 16 kHz mono "pcm_f32le" / "pcm_s16le"
             
-            # Decode base64 audio data
-            try:
-                audio_data = base64.b64decode(audio_data_b64)
-            except Exception as e:
-                raise Exception(f"Failed to decode base64 audio data: {str(e)}")
+        Returns:
+            Transcribed text string
+            
+        Raises:
+            TranscriptionQueueFull: If the transcription pool is saturated
+            Exception: If the format is unsupported or transcription fails
+        """
+        try:
+            self._check_format(audio_format)
+            
+            key = cache_key(
+                audio_data, self.whisper_client.model_name,
+                {"format": audio_format, **self.whisper_client.cache_options}
+            )
+            cached_text = await self.cache.get(key)
+            if cached_text is not None:
+                logger.info("Transcription served from cache")
+                metrics.increment("transcription_cache_hit")
+                return cached_text
+            
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                metrics.increment("transcription_coalesced")
+                return await asyncio.shield(inflight)
             
             # Transcribe using Whisper client
-            transcribed_text = await self.whisper_client.transcribe_audio(audio_data)
+            task = asyncio.ensure_future(self.whisper_client.transcribe_audio(audio_data, audio_format))
+            self._inflight[key] = task
+            try:
+                transcribed_text = await asyncio.shield(task)
+            finally:
+                self._inflight.pop(key, None)
             
+            await self.cache.put(key, transcribed_text)
             return transcribed_text
             
+        except TranscriptionQueueFull:
+            raise
         except Exception as e:
             logger.error(f"Error in audio transcription service: {e}")
             raise Exception(f"Audio transcription failed: {str(e)}")
     
+    def _check_format(self, audio_format: str):
+        """Reject audio formats the transcriber can't decode."""
+        if audio_format not in SUPPORTED_FORMATS:
+            raise Exception(f"Unsupported audio format: {audio_format}")
+    
+    def decode_audio_payload(self, message_data: Dict[str, Any]) -> bytes:
+        """
+        Extract and decode the base64 'audio_data' field of an audio message.
+        
+        Raises:
+            Exception: If audio data is missing or not valid base64
+        """
+        audio_data_b64 = message_data.get("audio_data")
+        if not audio_data_b64:
+            raise Exception("Missing 'audio_data' field in audio message")
+        
+        try:
+            return base64.b64decode(audio_data_b64)
+        except Exception as e:
+            raise Exception(f"Failed to decode base64 audio data: {str(e)}")
+    
+    def create_stream(self, audio_format: str = "webm") -> StreamingTranscriptionSession:
+        """Start a new streaming transcription session (one per utterance)."""
+        self._check_format(audio_format)
+        return StreamingTranscriptionSession(
+            self.whisper_client, self.vad, STREAM_PARTIAL_INTERVAL, audio_format,
+            max_seconds=STREAM_MAX_SECONDS, max_window_seconds=STREAM_MAX_WINDOW_SECONDS
+        )
+    
+    def create_bulk_job(self, default_format: str = "webm") -> BulkTranscriptionJob:
+        """
+        Start a bulk transcription job (many clips, batched by length).
+
+        The transcription cache is bypassed: bulk jobs re-transcribe on purpose,
+        e.g. to evaluate a model change.
+        """
+        self._check_format(default_format)
+        return BulkTranscriptionJob(self.whisper_client, BULK_BATCH_SIZE, BULK_SORT_WINDOW, default_format)
+    
+    async def warm_up(self):
+        """Preload Whisper in the worker pool so the first audio message doesn't pay for it."""
+        await self.whisper_client.warm_up()
+    
     def get_service_info(self) -> Dict[str, Any]:
         """Get information about the transcription service."""
         return {
             "service": "AudioTranscriptionService",
-            "whisper_client": self.whisper_client.get_model_info()
+            "whisper_client": self.whisper_client.get_model_info(),
+            "cache": self.cache.get_stats()
         }
+
+    async def get_daemon_stats(self) -> Optional[Dict[str, Any]]:
+        """Get the shared transcription daemon's batching stats, if one is serving this worker."""
+        return await self.whisper_client.get_daemon_stats()
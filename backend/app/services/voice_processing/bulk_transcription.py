@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from app.services.metrics import metrics
+from .audio_decoder import AudioBytes, SAMPLE_RATE
+from .transcription_pool import TranscriptionQueueFull
+from .whisper_client import WhisperClient
+
+logger = logging.getLogger(__name__)
+
+# Raw PCM files are recognized by extension; anything else goes through the container decoder
+PCM_EXTENSIONS = {
+    ".f32": "pcm_f32le",
+    ".pcm_f32le": "pcm_f32le",
+    ".s16": "pcm_s16le",
+    ".pcm_s16le": "pcm_s16le",
+    ".pcm": "pcm_s16le",
+    ".raw": "pcm_s16le",
+}
+
+
+# Backoff while live traffic has the transcription pool's queue full; bulk work waits instead of failing
+QUEUE_RETRY_INITIAL = 0.05
+QUEUE_RETRY_MAX = 2.0
+
+
+def clip_format(name: str, default: str = "webm") -> str:
+    """Audio format of an uploaded or archived file, from its extension."""
+    return PCM_EXTENSIONS.get(os.path.splitext(name)[1].lower(), default)
+
+
+def length_batches(clips: List[Tuple[str, np.ndarray]], batch_size: int) -> List[List[Tuple[str, np.ndarray]]]:
+    """Sort clips by duration and cut them into batches, so the clips of a batch finish decoding together."""
+    clips = sorted(clips, key=lambda clip: len(clip[1]))
+    return [clips[i:i + batch_size] for i in range(0, len(clips), batch_size)]
+
+
+class BulkTranscriptionJob:
+    """
+    Transcription of many clips for offline jobs (re-transcribing archives, evaluations).
+
+    Clips are decoded concurrently as they arrive; decoded clips are collected
+    in a window, sorted by length and sent to the model in batches. Results are
+    yielded as each batch finishes, followed by a summary with the throughput
+    in audio-seconds per wall-second.
+    """
+
+    def __init__(self, whisper_client: WhisperClient, batch_size: int = 8, sort_window: int = 64,
+                 default_format: str = "webm"):
+        """
+        Initialize a job.
+
+        Args:
+            whisper_client: Client the batches run on
+            batch_size: Clips per model batch
+            sort_window: Decoded clips collected and sorted by length before batching
+            default_format: Format of files without a raw PCM extension
+        """
+        self.whisper_client = whisper_client
+        self.batch_size = max(1, batch_size)
+        self.sort_window = max(self.batch_size, sort_window)
+        self.default_format = default_format
+
+        # Stats
+        self.clips = 0
+        self.failed = 0
+        self.batches = 0
+        self.audio_seconds = 0.0
+        self.queue_full_retries = 0
+
+    async def _admitted(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a pool call, retrying with backoff while the pool's queue is full."""
+        delay = QUEUE_RETRY_INITIAL
+        while True:
+            try:
+                return await call()
+            except TranscriptionQueueFull:
+                self.queue_full_retries += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, QUEUE_RETRY_MAX)
+
+    async def _decode_all(self, files: AsyncIterator[Tuple[str, AudioBytes]], decoded: asyncio.Queue):
+        """Decode incoming files (a few at a time on the pool) and queue the PCM, then None."""
+        # Leaves the model's batches room on the pool
+        slots = asyncio.Semaphore(max(1, self.whisper_client.pool.workers))
+
+        async def decode(name: str, data: AudioBytes):
+            try:
+                pcm = await self._admitted(
+                    lambda: self.whisper_client.decode_audio(data, clip_format(name, self.default_format))
+                )
+                await decoded.put((name, pcm, None))
+            except Exception as e:
+                await decoded.put((name, None, f"Decoding failed: {e}"))
+            finally:
+                slots.release()
+
+        tasks = set()
+        try:
+            async for name, data in files:
+                await slots.acquire()
+                task = asyncio.create_task(decode(name, data))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except Exception as e:
+            # A truncated or corrupt upload ends the job after the clips read so far
+            logger.error(f"Reading bulk upload failed: {e}")
+            await decoded.put(("", None, f"Reading upload failed: {e}"))
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            await decoded.put(None)
+
+    async def _transcribe_batch(self, batch: List[Tuple[str, np.ndarray]]) -> List[Dict[str, Any]]:
+        """Run one batch through the model and build its result lines."""
+        started = time.perf_counter()
+        try:
+            texts = await self._admitted(lambda: self.whisper_client.transcribe_batch([pcm for _, pcm in batch]))
+        except Exception as e:
+            logger.error(f"Bulk batch of {len(batch)} clips failed: {e}")
+            self.failed += len(batch)
+            return [{"name": name, "error": f"Transcription failed: {e}"} for name, _ in batch]
+        metrics.observe("bulk_batch", time.perf_counter() - started)
+        self.batches += 1
+
+        lines = []
+        for (name, pcm), text in zip(batch, texts):
+            seconds = len(pcm) / SAMPLE_RATE
+            self.audio_seconds += seconds
+            lines.append({"name": name, "text": text, "audio_seconds": round(seconds, 3)})
+        return lines
+
+    async def run(self, files: AsyncIterator[Tuple[str, AudioBytes]]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Transcribe every file.
+
+        Args:
+            files: (name, audio bytes) pairs
+
+        Yields:
+            One {"name", "text", "audio_seconds"} (or {"name", "error"}) per clip,
+            then {"summary": {...}}
+        """
+        started = time.perf_counter()
+        decoded: asyncio.Queue = asyncio.Queue(maxsize=self.sort_window)
+        decoder = asyncio.create_task(self._decode_all(files, decoded))
+        try:
+            done = False
+            while not done:
+                window = []
+                while len(window) < self.sort_window:
+                    # Once a batch is ready, don't leave the model idle waiting for a full window
+                    if len(window) >= self.batch_size and decoded.empty():
+                        break
+                    item = await decoded.get()
+                    if item is None:
+                        done = True
+                        break
+                    name, pcm, error = item
+                    self.clips += 1
+                    if error is not None:
+                        self.failed += 1
+                        yield {"name": name, "error": error}
+                    else:
+                        window.append((name, pcm))
+
+                for batch in length_batches(window, self.batch_size):
+                    for line in await self._transcribe_batch(batch):
+                        yield line
+        finally:
+            decoder.cancel()
+
+        summary = self.get_stats(time.perf_counter() - started)
+        logger.info(f"Bulk transcription finished: {summary}")
+        yield {"summary": summary}
+
+    def get_stats(self, wall_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """Get clip counts and throughput."""
+        stats = {
+            "clips": self.clips,
+            "failed": self.failed,
+            "batches": self.batches,
+            "queue_full_retries": self.queue_full_retries,
+            "audio_seconds": round(self.audio_seconds, 3),
+        }
+        if wall_seconds is not None:
+            stats["wall_seconds"] = round(wall_seconds, 3)
+            stats["audio_seconds_per_second"] = round(self.audio_seconds / wall_seconds, 2) if wall_seconds else None
+        return stats
@@ -0,0 +1,313 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+from app.config.config import (
+    WHISPER_LANGUAGE, WHISPER_BEAM_SIZE, WHISPER_WITHOUT_TIMESTAMPS, WHISPER_THREADS, WHISPER_COMPUTE_TYPE,
+    WHISPER_CASCADE_MIN_LOGPROB, WHISPER_CASCADE_MAX_NO_SPEECH, WHISPER_CASCADE_MAX_COMPRESSION,
+    WHISPER_CASCADE_MAX_SECONDS
+)
+from .audio_decoder import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+
+class DecodeOptions(NamedTuple):
+    """Tunable decode settings shared by all engines."""
+    # Pinned language code (e.g. "en"); empty auto-detects on every clip
+    language: str = ""
+    # Beam width; 0 decodes greedily
+    beam_size: int = 0
+    # Skip timestamp tokens (commands are short and timestamps aren't used)
+    without_timestamps: bool = False
+    # Intra-op CPU threads; 0 keeps the library default
+    threads: int = 0
+    # Weight precision (faster-whisper only)
+    compute_type: str = "int8"
+
+    @classmethod
+    def from_config(cls) -> "DecodeOptions":
+        return cls(WHISPER_LANGUAGE, WHISPER_BEAM_SIZE, WHISPER_WITHOUT_TIMESTAMPS, WHISPER_THREADS, WHISPER_COMPUTE_TYPE)
+
+
+class EngineSpec(NamedTuple):
+    """Picklable description of an engine, so process workers can build their own copy."""
+    engine: str
+    model_name: str
+    options: DecodeOptions
+
+    def cache_options(self) -> Dict[str, Any]:
+        """Settings that can change the transcript (thread count can't), for cache keys."""
+        options = self.options._asdict()
+        del options["threads"]
+        if self.engine != "faster-whisper":
+            del options["compute_type"]
+        return {"engine": self.engine, **options}
+
+
+class TranscriptionResult(NamedTuple):
+    """Transcript plus the confidence of its least confident segment."""
+    text: str
+    avg_logprob: float
+    no_speech_prob: float
+    compression_ratio: float
+
+    @classmethod
+    def from_segments(cls, text: str, segments: Iterable[Tuple[float, float, float]]) -> "TranscriptionResult":
+        """Build from (avg_logprob, no_speech_prob, compression_ratio) per segment."""
+        segments = list(segments)
+        if not segments:
+            return cls(text.strip(), float("-inf"), 1.0, 0.0)
+        return cls(
+            text.strip(),
+            min(segment[0] for segment in segments),
+            max(segment[1] for segment in segments),
+            max(segment[2] for segment in segments),
+        )
+
+
+class CascadePolicy(NamedTuple):
+    """When a draft transcript from the small model is not trusted and the large model reruns the clip."""
+    min_avg_logprob: float = -0.5
+    max_no_speech_prob: float = 0.5
+    max_compression_ratio: float = 2.4
+    # Longer clips go straight to the large model
+    max_seconds: float = 5.0
+
+    @classmethod
+    def from_config(cls) -> "CascadePolicy":
+        return cls(WHISPER_CASCADE_MIN_LOGPROB, WHISPER_CASCADE_MAX_NO_SPEECH,
+                   WHISPER_CASCADE_MAX_COMPRESSION, WHISPER_CASCADE_MAX_SECONDS)
+
+    def escalation_reason(self, draft: TranscriptionResult) -> Optional[str]:
+        """Why the draft must be redone by the large model, or None to accept it."""
+        if not draft.text:
+            return "empty"
+        if draft.avg_logprob < self.min_avg_logprob:
+            return "logprob"
+        if draft.no_speech_prob > self.max_no_speech_prob:
+            return "no_speech"
+        if draft.compression_ratio > self.max_compression_ratio:
+            return "compression"
+        return None
+
+
+class Cascade(NamedTuple):
+    """Small draft engine tried first, and the policy deciding when to escalate."""
+    draft: EngineSpec
+    policy: CascadePolicy
+
+    def run(self, draft: "TranscriptionEngine", large: "TranscriptionEngine", pcm: np.ndarray,
+            initial_prompt: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        """
+        Transcribe with the draft engine, escalating to the large one when needed.
+
+        Returns:
+            The transcript, and why the clip escalated (None if the draft was kept)
+        """
+        return self.run_batch(draft, large, [pcm], initial_prompt)[0]
+
+    def run_batch(self, draft: "TranscriptionEngine", large: "TranscriptionEngine", pcms: List[np.ndarray],
+                  initial_prompt: Optional[str] = None) -> List[Tuple[str, Optional[str]]]:
+        """Cascade several clips: one draft batch, then one large batch for the clips that escalate."""
+        outcomes: List[Optional[Tuple[str, Optional[str]]]] = [None] * len(pcms)
+        reasons: Dict[int, str] = {}
+        short = []
+        for i, pcm in enumerate(pcms):
+            if len(pcm) / SAMPLE_RATE > self.policy.max_seconds:
+                reasons[i] = "long"
+            else:
+                short.append(i)
+
+        drafts = draft.transcribe_batch([pcms[i] for i in short], initial_prompt, fallback=False)
+        for i, result in zip(short, drafts):
+            reason = self.policy.escalation_reason(result)
+            if reason is None:
+                outcomes[i] = (result.text, None)
+            else:
+                reasons[i] = reason
+
+        escalated = sorted(reasons)
+        for i, result in zip(escalated, large.transcribe_batch([pcms[i] for i in escalated], initial_prompt)):
+            outcomes[i] = (result.text, reasons[i])
+        return outcomes
+
+
+def pad_batch(pcms: List[np.ndarray], length: int) -> np.ndarray:
+    """Stack clips into one zero-padded (clips, length) float32 array; longer clips are cut."""
+    batch = np.zeros((len(pcms), length), dtype=np.float32)
+    for row, pcm in zip(batch, pcms):
+        row[:min(len(pcm), length)] = pcm[:length]
+    return batch
+
+
+class TranscriptionEngine(ABC):
+    """A loaded speech-to-text model. Each pool worker owns its own instance."""
+
+    def __init__(self, model_name: str, options: DecodeOptions):
+        self.model_name = model_name
+        self.options = options
+
+    def transcribe(self, pcm: np.ndarray, initial_prompt: Optional[str] = None) -> str:
+        """
+        Transcribe 16 kHz mono float32 PCM.
+
+        Args:
+            pcm: Audio samples
+            initial_prompt: Previously committed text, to keep context across windows
+
+        Returns:
+            Transcribed text, stripped (possibly empty)
+        """
+        return self.transcribe_detailed(pcm, initial_prompt).text
+
+    @abstractmethod
+    def transcribe_detailed(self, pcm: np.ndarray, initial_prompt: Optional[str] = None,
+                            fallback: bool = True) -> TranscriptionResult:
+        """
+        Transcribe and report segment confidence.
+
+        Args:
+            pcm: Audio samples
+            initial_prompt: Previously committed text
+            fallback: Re-decode at higher temperatures when confidence is low; a
+                cascade draft turns this off, since escalating is its fallback
+
+        Returns:
+            Transcript and confidence
+        """
+
+    def transcribe_batch(self, pcms: List[np.ndarray], initial_prompt: Optional[str] = None,
+                         fallback: bool = True) -> List[TranscriptionResult]:
+        """
+        Transcribe several clips that share a prompt.
+
+        Engines that can run clips through the model together override this;
+        the default decodes them one by one.
+        """
+        return [self.transcribe_detailed(pcm, initial_prompt, fallback) for pcm in pcms]
+
+
+class WhisperEngine(TranscriptionEngine):
+    """Reference engine: openai-whisper in fp32 on CPU (fp16 on CUDA)."""
+
+    def __init__(self, model_name: str, options: DecodeOptions):
+        super().__init__(model_name, options)
+        # Imported here so torch and whisper load in the pool workers on first use, not at app import
+        import torch
+        import whisper
+        if options.threads > 0:
+            torch.set_num_threads(options.threads)
+        self.model = whisper.load_model(model_name)
+        self._decode_options = {
+            # Explicit, so CPU decodes don't warn and fall back from fp16 on every call
+            "fp16": self.model.device.type == "cuda",
+            "language": options.language or None,
+            "without_timestamps": options.without_timestamps,
+        }
+        if options.beam_size > 0:
+            self._decode_options["beam_size"] = options.beam_size
+
+    def transcribe_detailed(self, pcm: np.ndarray, initial_prompt: Optional[str] = None,
+                            fallback: bool = True) -> TranscriptionResult:
+        decode_options = self._decode_options if fallback else {**self._decode_options, "temperature": 0.0}
+        result = self.model.transcribe(pcm, initial_prompt=initial_prompt, **decode_options)
+        return TranscriptionResult.from_segments(result["text"], (
+            (segment["avg_logprob"], segment["no_speech_prob"], segment["compression_ratio"])
+            for segment in result["segments"]
+        ))
+
+    def transcribe_batch(self, pcms: List[np.ndarray], initial_prompt: Optional[str] = None,
+                         fallback: bool = True) -> List[TranscriptionResult]:
+        """
+        Run clips of up to 30 s through the model as one padded batch.
+
+        Whisper's encoder only accepts full 30 s windows, so every clip is padded
+        to 30 s whatever the batch holds (as transcribe() does one clip at a time);
+        the batch saves by running the encoder once for all of them. The decoder
+        steps until the longest transcript in the batch ends, which is where
+        grouping clips of similar length pays off. Longer clips, and (with
+        fallback) clips the single greedy pass wasn't confident about, go through
+        transcribe_detailed.
+        """
+        import torch
+        import whisper
+        results: List[Optional[TranscriptionResult]] = [None] * len(pcms)
+        batch = [i for i, pcm in enumerate(pcms) if len(pcm) <= whisper.audio.N_SAMPLES]
+        if len(batch) > 1:
+            padded = torch.from_numpy(pad_batch([pcms[i] for i in batch], whisper.audio.N_SAMPLES))
+            mel = torch.stack([
+                whisper.log_mel_spectrogram(audio, self.model.dims.n_mels) for audio in padded
+            ]).to(self.model.device)
+            options = whisper.DecodingOptions(prompt=initial_prompt, **self._decode_options)
+            for i, decoded in zip(batch, whisper.decode(self.model, mel, options)):
+                # Same thresholds transcribe() uses to retry at a higher temperature, or to call a window silent
+                if fallback and (decoded.avg_logprob < -1.0 or decoded.compression_ratio > 2.4):
+                    continue
+                silent = decoded.no_speech_prob > 0.6 and decoded.avg_logprob < -1.0
+                results[i] = TranscriptionResult(
+                    "" if silent else decoded.text.strip(),
+                    decoded.avg_logprob, decoded.no_speech_prob, decoded.compression_ratio
+                )
+        return [
+            result if result is not None else self.transcribe_detailed(pcm, initial_prompt, fallback)
+            for pcm, result in zip(pcms, results)
+        ]
+
+
+class FasterWhisperEngine(TranscriptionEngine):
+    """
+    CTranslate2 port of Whisper with int8-quantized weights on CPU.
+
+    Has no batched path: transcribe_batch decodes the clips one by one.
+    """
+
+    def __init__(self, model_name: str, options: DecodeOptions):
+        super().__init__(model_name, options)
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise ImportError("The faster-whisper engine requires the faster-whisper package") from e
+        self.model = WhisperModel(
+            model_name,
+            device="cpu",
+            compute_type=options.compute_type,
+            cpu_threads=options.threads,
+        )
+
+    def transcribe_detailed(self, pcm: np.ndarray, initial_prompt: Optional[str] = None,
+                            fallback: bool = True) -> TranscriptionResult:
+        kwargs = {} if fallback else {"temperature": 0.0}
+        segments, _ = self.model.transcribe(
+            pcm,
+            language=self.options.language or None,
+            beam_size=max(1, self.options.beam_size),
+            without_timestamps=self.options.without_timestamps,
+            initial_prompt=initial_prompt,
+            **kwargs,
+        )
+        # Segments are generated lazily; listing them runs the decode
+        segments = list(segments)
+        return TranscriptionResult.from_segments(
+            "".join(segment.text for segment in segments),
+            ((segment.avg_logprob, segment.no_speech_prob, segment.compression_ratio) for segment in segments)
+        )
+
+
+ENGINES = {
+    "whisper": WhisperEngine,
+    "faster-whisper": FasterWhisperEngine,
+}
+
+
+def check_engine(engine: str):
+    """Reject unknown engine names before any worker tries to load one."""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown transcription engine: {engine} (expected one of {', '.join(ENGINES)})")
+
+
+def create_engine(spec: EngineSpec) -> TranscriptionEngine:
+    """Load the engine described by spec (blocking; call from a pool worker)."""
+    check_engine(spec.engine)
+    logger.info(f"Loading {spec.engine} engine with model {spec.model_name} ({spec.options})")
+    return ENGINES[spec.engine](spec.model_name, spec.options)
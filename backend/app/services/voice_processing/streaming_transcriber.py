@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from .audio_decoder import PCM_FORMATS, SAMPLE_RATE, is_pcm_format, webm_cluster_starts
+from .vad import EnergyVAD
+from .whisper_client import WhisperClient
+
+logger = logging.getLogger(__name__)
+
+# Whisper only uses the last ~224 prompt tokens; keep the committed context short
+PROMPT_CHARS = 200
+
+# Generous upper bound on MediaRecorder Opus bitrates (256 kbit/s), to cap undecoded WebM bytes
+WEBM_MAX_BYTES_PER_SECOND = 32000
+
+
+class StreamingTranscriptionSession:
+    """
+    Incremental transcription of one audio stream.
+
+    Audio chunks are appended to a buffer. Speech segments that VAD has closed
+    (followed by enough silence) are decoded once and committed; only the
+    still-open tail is re-decoded for each partial result.
+
+    Audio is decoded once: raw PCM bytes are converted as they arrive, and
+    WebM clusters are decoded when the next cluster starts, after which their
+    bytes are dropped. Only the uncommitted PCM is kept, so the work per
+    partial depends on the open window, not on the length of the utterance.
+    """
+
+    def __init__(self, whisper_client: WhisperClient, vad: EnergyVAD, partial_interval: float = 0.5,
+                 audio_format: str = "webm", max_seconds: float = 120.0, max_window_seconds: float = 30.0):
+        """
+        Initialize an empty stream.
+
+        Args:
+            whisper_client: Client that decodes and transcribes
+            vad: Voice activity detector that closes segments
+            partial_interval: Minimum seconds between partial results
+            audio_format: "webm" or a raw PCM format
+            max_seconds: Audio after which the stream is exhausted and should be finalized
+            max_window_seconds: Uncommitted audio after which it is committed even without a pause
+        """
+        self.whisper_client = whisper_client
+        self.audio_format = audio_format
+        self.vad = vad
+        self.partial_interval = partial_interval
+        self.max_window = int(max_window_seconds * SAMPLE_RATE)
+        self.max_samples = int(max_seconds * SAMPLE_RATE)
+        # Undecoded WebM has no known duration, so its bytes are capped instead
+        self.max_buffer_bytes = int(max_seconds * WEBM_MAX_BYTES_PER_SECOND)
+        # Bytes not decoded for good yet (for WebM: the header plus the clusters still open)
+        self.buffer = bytearray()
+        # Decoded, uncommitted audio whose bytes have left the buffer
+        self.pcm = np.zeros(0, dtype=np.float32)
+        # Samples at the start of the buffer's audio that were already committed
+        self._skip = 0
+        self.committed_samples = 0
+        self.committed_text: List[str] = []
+        self._lock = asyncio.Lock()
+        self._last_update = 0.0
+        self._bytes_added = 0
+        self._bytes_at_last_update = 0
+
+    def add_chunk(self, chunk: bytes):
+        """Append a chunk of the (container-encoded) audio stream."""
+        self.buffer.extend(chunk)
+        self._bytes_added += len(chunk)
+
+    def partial_due(self) -> bool:
+        """Check whether new audio arrived and enough time passed for another partial result."""
+        if self._lock.locked() or self._bytes_added == self._bytes_at_last_update:
+            return False
+        return time.monotonic() - self._last_update >= self.partial_interval
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether the stream has reached its length limit and should be finalized."""
+        samples = self.committed_samples + len(self.pcm)
+        if is_pcm_format(self.audio_format):
+            return samples + len(self.buffer) // PCM_FORMATS[self.audio_format].itemsize >= self.max_samples
+        return samples >= self.max_samples or len(self.buffer) > self.max_buffer_bytes
+
+    def _prompt(self) -> Optional[str]:
+        """Committed text tail used as decoding context for the next window."""
+        text = " ".join(self.committed_text)
+        return text[-PROMPT_CHARS:] if text else None
+
+    async def _decode_new(self, final: bool) -> Tuple[np.ndarray, int]:
+        """
+        Decode the buffer's audio, dropping the bytes that never need decoding again.
+
+        Returns:
+            PCM from the start of the buffer's audio, and how many of its samples
+            came from the dropped bytes (the rest is re-decoded next time)
+        """
+        if is_pcm_format(self.audio_format):
+            itemsize = PCM_FORMATS[self.audio_format].itemsize
+            usable = len(self.buffer) - len(self.buffer) % itemsize
+            pcm = await self.whisper_client.decode_audio(bytes(self.buffer[:usable]), self.audio_format)
+            del self.buffer[:usable]
+            return pcm, len(pcm)
+
+        try:
+            starts = webm_cluster_starts(self.buffer)
+        except ValueError:
+            # Not parseable as WebM: decode the whole stream every time, as a plain decoder would
+            return await self.whisper_client.decode_audio(bytes(self.buffer), self.audio_format), 0
+        if not starts:
+            # Header still incomplete
+            return np.zeros(0, dtype=np.float32), 0
+
+        # WebM/Opus frames are not independently decodable, but the header plus whole clusters is.
+        # A cluster is complete once the next one starts (or the stream has ended)
+        header = bytes(self.buffer[:starts[0]])
+        cut = len(self.buffer) if final else starts[-1]
+        done = np.zeros(0, dtype=np.float32)
+        if cut > starts[0]:
+            done = await self.whisper_client.decode_audio(header + bytes(self.buffer[starts[0]:cut]), self.audio_format)
+            del self.buffer[starts[0]:cut]
+        if len(self.buffer) == len(header):
+            return done, len(done)
+        try:
+            tail = await self.whisper_client.decode_audio(bytes(self.buffer), self.audio_format)
+        except Exception as e:
+            # A cluster that has barely started may not hold a whole frame yet; it is decoded again next time
+            logger.debug(f"Open cluster not decodable yet: {e}")
+            tail = np.zeros(0, dtype=np.float32)
+        return np.concatenate([done, tail]), len(done)
+
+    async def update(self, final: bool = False) -> Dict[str, Any]:
+        """
+        Decode new audio and return the current transcript.
+
+        Args:
+            final: Treat the end of the buffer as end of utterance and commit everything
+
+        Returns:
+            Dictionary with 'text' (committed + unstable), 'stable_text' and 'final'
+        """
+        async with self._lock:
+            self._last_update = time.monotonic()
+            self._bytes_at_last_update = self._bytes_added
+
+            fresh, dropped = await self._decode_new(final)
+            skip = self._skip
+            # Whisper only sees the uncommitted window
+            window = np.concatenate([self.pcm, fresh[skip:]])
+            kept = len(self.pcm) + max(0, dropped - skip)
+
+            # A window that never pauses is committed once it reaches the limit
+            segments, consumed = self.vad.segment(window, final=final or len(window) >= self.max_window)
+            for start, end in segments:
+                text = await self.whisper_client.transcribe_pcm(window[start:end], self._prompt())
+                if text:
+                    self.committed_text.append(text)
+            self.committed_samples += consumed
+            self.pcm = window[consumed:kept].copy() if consumed < kept else np.zeros(0, dtype=np.float32)
+            self._skip = max(0, skip - dropped) + max(0, consumed - kept)
+
+            stable_text = " ".join(self.committed_text)
+            unstable_text = ""
+            if not final:
+                tail = window[consumed:]
+                if self.vad.has_speech(tail):
+                    unstable_text = await self.whisper_client.transcribe_pcm(tail, self._prompt())
+
+            return {
+                "text": " ".join(t for t in (stable_text, unstable_text) if t),
+                "stable_text": stable_text,
+                "final": final
+            }
@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from .audio_decoder import AudioBytes
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(audio_data: AudioBytes, model_name: str, options: Optional[Dict[str, Any]] = None) -> str:
+    """Content address of a transcription: hash of the audio bytes, model and decode options."""
+    digest = hashlib.blake2b(audio_data, digest_size=16)
+    digest.update(b"\0" + model_name.encode("utf-8"))
+    digest.update(b"\0" + json.dumps(options or {}, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class _DiskTier:
+    """SQLite-backed second cache tier that survives restarts."""
+
+    # Expired and excess rows are pruned after this many writes
+    PRUNE_EVERY = 64
+
+    def __init__(self, path: str, max_rows: int = 10000, ttl: float = 0.0):
+        """Open (or create) the cache database."""
+        self.path = path
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.evictions = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS transcriptions (key TEXT PRIMARY KEY, text TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS transcriptions_created ON transcriptions (created)")
+        self._conn.commit()
+
+    def get(self, key: str, ttl: float) -> Optional[Tuple[str, float]]:
+        """Look up an unexpired entry, returning (text, created)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, created FROM transcriptions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if ttl and time.time() - row[1] > ttl:
+                self._conn.execute("DELETE FROM transcriptions WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return row[0], row[1]
+
+    def put(self, key: str, text: str, created: float):
+        """Insert or replace an entry, pruning the table every PRUNE_EVERY writes."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcriptions (key, text, created) VALUES (?, ?, ?)",
+                (key, text, created)
+            )
+            self._conn.commit()
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune_locked()
+
+    def prune(self):
+        """Delete expired entries, then the oldest entries beyond max_rows."""
+        with self._lock:
+            self._prune_locked()
+
+    def _prune_locked(self):
+        deleted = 0
+        if self.ttl:
+            deleted += self._conn.execute(
+                "DELETE FROM transcriptions WHERE created < ?", (time.time() - self.ttl,)
+            ).rowcount
+        if self.max_rows > 0:
+            deleted += self._conn.execute(
+                "DELETE FROM transcriptions WHERE key IN "
+                "(SELECT key FROM transcriptions ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,)
+            ).rowcount
+        self._conn.commit()
+        self.evictions += deleted
+
+
+class TranscriptionCache:
+    """
+    Content-addressed LRU cache of transcription results with TTL expiry.
+    Optionally backed by an on-disk SQLite tier that survives restarts.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600.0, disk_path: Optional[str] = None,
+                 disk_max_entries: int = 10000):
+        """Initialize the cache (max_entries=0 disables it; disk_max_entries=0 leaves the disk tier unbounded)."""
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._disk: Optional[_DiskTier] = None
+        if disk_path and max_entries > 0:
+            try:
+                self._disk = _DiskTier(disk_path, disk_max_entries, ttl)
+                self._disk.prune()
+            except Exception as e:
+                logger.error(f"Transcription disk cache unavailable at {disk_path}: {e}")
+
+        # Stats
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _expired(self, created: float) -> bool:
+        return bool(self.ttl) and time.time() - created > self.ttl
+
+    def _remember(self, key: str, text: str, created: float):
+        """Insert into the memory tier, evicting least recently used entries."""
+        self._entries[key] = (text, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, key: str) -> Optional[str]:
+        """Look up a transcription by key (memory first, then disk)."""
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if not self._expired(entry[1]):
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+            del self._entries[key]
+
+        if self._disk is not None:
+            loop = asyncio.get_running_loop()
+            row = await loop.run_in_executor(None, self._disk.get, key, self.ttl)
+            if row is not None:
+                self._remember(key, row[0], row[1])
+                self.disk_hits += 1
+                return row[0]
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, text: str):
+        """Store a transcription under key in both tiers."""
+        if not self.enabled:
+            return
+        created = time.time()
+        self._remember(key, text, created)
+        if self._disk is not None:
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, self._disk.put, key, text, created)
+            except Exception as e:
+                logger.warning(f"Failed to write transcription to disk cache: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size and hit/miss counters."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl,
+            "disk_path": self._disk.path if self._disk is not None else None,
+            "disk_max_entries": self._disk.max_rows if self._disk is not None else None,
+            "disk_evictions": self._disk.evictions if self._disk is not None else 0,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,419 @@
+"""
+Shared transcription daemon.
+
+One process loads the Whisper engine(s) once and serves every uvicorn worker
+over a Unix socket. Requests from all connections go into one queue; the
+scheduler collects whatever arrives within a short window (up to a maximum
+batch size) and runs it through the model together.
+
+    python -m app.services.voice_processing.transcription_daemon --socket /tmp/dictate-whisper.sock
+
+Wire format, both directions: a frame is two big-endian uint32 lengths (JSON
+header, binary payload) followed by the header and the payload. Requests carry
+an id and responses echo it, so one connection can have many requests in flight.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config.config import (
+    WHISPER_MODEL, WHISPER_ENGINE, WHISPER_CASCADE_MODEL, WHISPER_DAEMON_SOCKET, WHISPER_DAEMON_MAX_BATCH,
+    WHISPER_DAEMON_BATCH_WINDOW_MS, WHISPER_DAEMON_QUEUE_SIZE
+)
+from .audio_decoder import SAMPLE_RATE, decode_audio, is_pcm_format
+from .engines import Cascade, CascadePolicy, DecodeOptions, EngineSpec, create_engine
+from .transcription_pool import TranscriptionQueueFull
+
+logger = logging.getLogger(__name__)
+
+_FRAME_HEADER = struct.Struct("!II")
+# Largest accepted header and payload (about 25 minutes of 16 kHz float32 audio)
+MAX_HEADER_BYTES = 64 * 1024
+MAX_PAYLOAD_BYTES = 100 * 1024 * 1024
+
+
+class DaemonUnavailable(Exception):
+    """Raised when the transcription daemon can't be reached."""
+
+
+def write_frame(writer: asyncio.StreamWriter, header: Dict[str, Any], payload=b""):
+    """Queue one frame on a stream (the caller drains)."""
+    encoded = json.dumps(header).encode("utf-8")
+    # nbytes, not len(): a typed memoryview (e.g. over float32 PCM) counts elements
+    size = memoryview(payload).nbytes
+    writer.write(_FRAME_HEADER.pack(len(encoded), size) + encoded)
+    if size:
+        writer.write(payload)
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[Dict[str, Any], bytes]:
+    """
+    Read one frame.
+
+    Raises:
+        asyncio.IncompleteReadError: If the stream ends mid-frame
+        ValueError: If the frame is too large
+    """
+    header_len, payload_len = _FRAME_HEADER.unpack(await reader.readexactly(_FRAME_HEADER.size))
+    if header_len > MAX_HEADER_BYTES or payload_len > MAX_PAYLOAD_BYTES:
+        raise ValueError(f"Frame too large ({header_len} + {payload_len} bytes)")
+    header = json.loads(await reader.readexactly(header_len))
+    payload = await reader.readexactly(payload_len) if payload_len else b""
+    return header, payload
+
+
+class _Job:
+    """One queued decode."""
+
+    __slots__ = ("pcm", "prompt", "future", "enqueued_at")
+
+    def __init__(self, pcm: np.ndarray, prompt: Optional[str], future: asyncio.Future):
+        self.pcm = pcm
+        self.prompt = prompt
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class TranscriptionDaemon:
+    """Holds the engines and batches decode requests from every connected worker."""
+
+    def __init__(self, socket_path: str, spec: EngineSpec, cascade: Optional[Cascade] = None,
+                 max_batch: int = 8, batch_window_ms: float = 10.0, queue_size: int = 64):
+        """
+        Initialize the daemon (engines load in serve()).
+
+        Args:
+            socket_path: Unix socket to listen on
+            spec: Main engine
+            cascade: Optional draft engine tried first
+            max_batch: Most requests decoded together
+            batch_window_ms: How long to wait for more requests once one has arrived
+            queue_size: Requests waiting beyond this are rejected as busy
+        """
+        self.socket_path = socket_path
+        self.spec = spec
+        self.cascade = cascade
+        self.max_batch = max(1, max_batch)
+        self.batch_window = batch_window_ms / 1000
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        # The model runs on one dedicated thread; batching, not threads, provides the parallelism
+        self._model_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="daemon-model")
+        self._decode_executor = ThreadPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) // 2),
+                                                   thread_name_prefix="daemon-decode")
+        self._engine = None
+        self._draft = None
+        self._writers = set()
+
+        # Stats
+        self.requests = 0
+        self.rejected = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.max_batch_seen = 0
+        self._total_wait = 0.0
+        self._total_decode = 0.0
+
+    def _load(self):
+        """Load and warm up the engines (blocking; runs on the model thread)."""
+        self._engine = create_engine(self.spec)
+        silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+        self._engine.transcribe(silence)
+        if self.cascade is not None:
+            self._draft = create_engine(self.cascade.draft)
+            self._draft.transcribe(silence)
+
+    def _run_batch(self, pcms: List[np.ndarray], prompt: Optional[str]) -> List[Tuple[str, Optional[str]]]:
+        """Decode one batch of clips sharing a prompt (blocking; runs on the model thread)."""
+        if self.cascade is not None:
+            return self.cascade.run_batch(self._draft, self._engine, pcms, prompt)
+        return [(result.text, None) for result in self._engine.transcribe_batch(pcms, prompt)]
+
+    async def _schedule(self):
+        """Collect requests into batches and run them through the model, one batch at a time."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            batch = [job for job in batch if not job.future.done()]
+            if not batch:
+                continue
+            started = time.monotonic()
+            self.batches += 1
+            self.batched_requests += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            for job in batch:
+                self._total_wait += started - job.enqueued_at
+
+            # Whisper takes one prompt per batch, so clips with different prompts run as sub-batches
+            groups: Dict[Optional[str], List[_Job]] = {}
+            for job in batch:
+                groups.setdefault(job.prompt, []).append(job)
+            for prompt, jobs in groups.items():
+                try:
+                    outcomes = await loop.run_in_executor(
+                        self._model_executor, self._run_batch, [job.pcm for job in jobs], prompt
+                    )
+                except Exception as e:
+                    logger.error(f"Batch of {len(jobs)} failed: {e}")
+                    for job in jobs:
+                        if not job.future.done():
+                            job.future.set_exception(e)
+                    continue
+                for job, outcome in zip(jobs, outcomes):
+                    if not job.future.done():
+                        job.future.set_result(outcome)
+            self._total_decode += time.monotonic() - started
+
+    async def _transcribe(self, header: Dict[str, Any], payload: bytes) -> Dict[str, Any]:
+        """Decode the request's audio, queue it and wait for its batch."""
+        if header["op"] == "transcribe_pcm":
+            # Copied: frombuffer over bytes is read-only, and engines may write to their input
+            pcm = np.frombuffer(payload, dtype=np.float32).copy()
+        else:
+            audio_format = header.get("format", "webm")
+            if is_pcm_format(audio_format):
+                pcm = decode_audio(payload, audio_format)
+            else:
+                loop = asyncio.get_running_loop()
+                pcm = await loop.run_in_executor(self._decode_executor, decode_audio, payload, audio_format)
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait(_Job(pcm, header.get("initial_prompt"), future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return {"error": f"Transcription daemon queue is full ({self._queue.qsize()} waiting)", "busy": True}
+        text, escalation = await future
+        return {"text": text, "escalation": escalation}
+
+    async def _respond(self, header: Dict[str, Any], payload: bytes, writer: asyncio.StreamWriter):
+        """Serve one request and write its response."""
+        op = header.get("op")
+        self.requests += 1
+        try:
+            if op in ("transcribe", "transcribe_pcm"):
+                response = await self._transcribe(header, payload)
+            elif op == "ping":
+                response = {"engine": self.spec.engine, "model": self.spec.model_name,
+                            "cascade": self.cascade.draft.model_name if self.cascade else None}
+            elif op == "stats":
+                response = {"stats": self.get_stats()}
+            else:
+                response = {"error": f"Unknown op: {op}"}
+        except Exception as e:
+            response = {"error": str(e)}
+        response["id"] = header.get("id")
+        if not writer.is_closing():
+            write_frame(writer, response)
+            await writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Read requests from one worker connection; each is served concurrently."""
+        self._writers.add(writer)
+        tasks = set()
+        try:
+            while True:
+                header, payload = await read_frame(reader)
+                task = asyncio.create_task(self._respond(header, payload, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.warning(f"Dropping daemon connection: {e}")
+        finally:
+            self._writers.discard(writer)
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def serve(self):
+        """Load the engines, then serve until cancelled."""
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        await loop.run_in_executor(self._model_executor, self._load)
+        logger.info(f"Engines loaded in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        if os.path.exists(self.socket_path):
+            # Left behind by a daemon that didn't shut down cleanly
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        scheduler = asyncio.create_task(self._schedule())
+        logger.info(f"Transcription daemon listening on {self.socket_path} "
+                    f"(max batch {self.max_batch}, window {self.batch_window * 1000:.0f} ms)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            scheduler.cancel()
+            # Clients see the connection drop and fall back to local transcription
+            for writer in list(self._writers):
+                writer.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request, batching and timing statistics."""
+        return {
+            "engine": self.spec.engine,
+            "model": self.spec.model_name,
+            "connections": len(self._writers),
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "queue_depth": self._queue.qsize(),
+            "batches": self.batches,
+            "avg_batch": round(self.batched_requests / self.batches, 2) if self.batches else 0.0,
+            "max_batch": self.max_batch_seen,
+            "avg_wait_ms": round(self._total_wait / self.batched_requests * 1000, 2) if self.batched_requests else 0.0,
+            "avg_batch_ms": round(self._total_decode / self.batches * 1000, 2) if self.batches else 0.0,
+        }
+
+
+class TranscriptionDaemonClient:
+    """
+    Multiplexed connection from one worker to the daemon.
+
+    After a connection failure or a response that takes longer than timeout,
+    requests fail fast with DaemonUnavailable for retry_interval seconds, so
+    callers fall back without paying a connect attempt on every clip.
+    """
+
+    def __init__(self, socket_path: str, retry_interval: float = 5.0, timeout: float = 60.0):
+        self.socket_path = socket_path
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count()
+        self._down_until = 0.0
+
+    async def _connect(self) -> asyncio.StreamWriter:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Streams are bound to the loop that opened them
+            self._writer, self._loop, self._connect_lock = None, loop, asyncio.Lock()
+        async with self._connect_lock:
+            if self._writer is None or self._writer.is_closing():
+                reader, self._writer = await asyncio.open_unix_connection(self.socket_path)
+                loop.create_task(self._read_responses(reader, self._writer))
+                logger.info(f"Connected to transcription daemon at {self.socket_path}")
+            return self._writer
+
+    async def _read_responses(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Resolve pending requests as their responses arrive."""
+        try:
+            while True:
+                header, _ = await read_frame(reader)
+                future = self._pending.pop(header.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(header)
+        except Exception as e:
+            self._mark_down(writer, e)
+
+    def _mark_down(self, writer: Optional[asyncio.StreamWriter], error: BaseException):
+        """Fail in-flight requests and back off before the next connection attempt."""
+        if self._down_until < time.monotonic():
+            logger.warning(f"Transcription daemon unavailable ({error!r}); using in-process transcription "
+                           f"for {self.retry_interval:.0f}s")
+        self._down_until = time.monotonic() + self.retry_interval
+        if writer is not None:
+            writer.close()
+        if writer is self._writer:
+            self._writer = None
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(DaemonUnavailable(str(error)))
+
+    async def request(self, op: str, payload=b"", **fields) -> Dict[str, Any]:
+        """
+        Send one request and wait for its response.
+
+        Raises:
+            DaemonUnavailable: If the daemon can't be reached or doesn't answer in time
+                (or recently couldn't)
+            TranscriptionQueueFull: If the daemon's queue is full
+            Exception: If the daemon reports an error
+        """
+        if time.monotonic() < self._down_until:
+            raise DaemonUnavailable("Transcription daemon was unreachable recently")
+        writer = None
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            writer = await self._connect()
+            write_frame(writer, {"id": request_id, "op": op, **fields}, payload)
+            await asyncio.wait_for(writer.drain(), self.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            self._pending.pop(request_id, None)
+            self._mark_down(writer, e)
+            raise DaemonUnavailable(str(e) or "Transcription daemon is not reading requests") from e
+
+        try:
+            response = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError as e:
+            # A stuck daemon would hold every request; drop the connection and fall back until retry
+            self._mark_down(writer, TimeoutError(f"no response within {self.timeout:.0f}s"))
+            raise DaemonUnavailable(f"Transcription daemon didn't respond within {self.timeout:.0f}s") from e
+        finally:
+            self._pending.pop(request_id, None)
+        if "error" in response:
+            if response.get("busy"):
+                raise TranscriptionQueueFull(response["error"])
+            raise Exception(response["error"])
+        return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve transcription to every backend worker over a Unix socket")
+    parser.add_argument("--socket", default=WHISPER_DAEMON_SOCKET or "/tmp/dictate-whisper.sock")
+    parser.add_argument("--model", default=WHISPER_MODEL)
+    parser.add_argument("--engine", default=WHISPER_ENGINE)
+    parser.add_argument("--cascade-model", default=WHISPER_CASCADE_MODEL)
+    parser.add_argument("--max-batch", type=int, default=WHISPER_DAEMON_MAX_BATCH)
+    parser.add_argument("--batch-window-ms", type=float, default=WHISPER_DAEMON_BATCH_WINDOW_MS)
+    parser.add_argument("--queue-size", type=int, default=WHISPER_DAEMON_QUEUE_SIZE)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    options = DecodeOptions.from_config()
+    spec = EngineSpec(args.engine, args.model, options)
+    cascade = None
+    if args.cascade_model and args.cascade_model != args.model:
+        cascade = Cascade(EngineSpec(args.engine, args.cascade_model, options), CascadePolicy.from_config())
+    daemon = TranscriptionDaemon(args.socket, spec, cascade, args.max_batch, args.batch_window_ms, args.queue_size)
+    try:
+        asyncio.run(daemon.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptionQueueFull(Exception):
+    """Raised when every worker is busy and the wait queue is at capacity."""
+
+
+def _init_process_worker(torch_threads: int):
+    """Limit intra-op threads so process workers don't oversubscribe the CPU."""
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except Exception:
+        pass
+
+
+def _run_timed(fn: Callable, *args):
+    """Run fn in a worker and report when it actually started (for queue wait metrics)."""
+    started_at = time.monotonic()
+    return started_at, fn(*args)
+
+
+class TranscriptionPool:
+    """
+    Bounded worker pool for CPU-bound transcription.
+    Runs jobs off the event loop on threads or processes and tracks queue depth and wait time.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = 1, queue_size: int = 8):
+        """Initialize the pool (executor is created on first use)."""
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown transcription pool kind: {kind}")
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self._executor: Optional[Executor] = None
+
+        # Stats
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._last_wait = 0.0
+        logger.info(f"Initializing TranscriptionPool ({kind}, workers={self.workers}, queue={self.queue_size})")
+
+    def _get_executor(self) -> Executor:
+        """Get or create the underlying executor (lazy creation)."""
+        if self._executor is None:
+            if self.kind == "process":
+                torch_threads = max(1, (os.cpu_count() or 1) // self.workers)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_process_worker,
+                    initargs=(torch_threads,),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="transcribe",
+                )
+        return self._executor
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run fn(*args) on a worker and await its result.
+
+        Args:
+            fn: Module-level callable (must be picklable for the process pool)
+            *args: Arguments passed to fn
+
+        Returns:
+            Whatever fn returns
+
+        Raises:
+            TranscriptionQueueFull: If all workers are busy and the queue is full
+        """
+        if self._pending >= self.workers + self.queue_size:
+            self._rejected += 1
+            raise TranscriptionQueueFull(
+                f"Transcription queue is full ({self.queue_depth} waiting, {self.workers} workers busy)"
+            )
+
+        self._pending += 1
+        enqueued_at = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            started_at, result = await loop.run_in_executor(self._get_executor(), _run_timed, fn, *args)
+            wait = max(0.0, started_at - enqueued_at)
+            self._last_wait = wait
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            self._completed += 1
+            return result
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._pending -= 1
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a free worker."""
+        return max(0, self._pending - self.workers)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue and timing statistics for the pool."""
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "in_flight": min(self._pending, self.workers),
+            "queue_depth": self.queue_depth,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "last_wait_ms": round(self._last_wait * 1000, 2),
+            "avg_wait_ms": round(self._total_wait / self._completed * 1000, 2) if self._completed else 0.0,
+            "max_wait_ms": round(self._max_wait * 1000, 2),
+        }
+
+    def shutdown(self):
+        """Shut down the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,108 @@
+import logging
+from typing import List, Tuple
+import numpy as np
+from .audio_decoder import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+
+class EnergyVAD:
+    """
+    Lightweight energy-based voice activity detector for 16 kHz mono float32 PCM.
+    Splits audio into speech segments separated by sustained silence.
+    """
+
+    def __init__(
+        self,
+        frame_ms: int = 30,
+        min_energy: float = 0.01,
+        max_energy: float = 0.05,
+        noise_ratio: float = 3.0,
+        min_speech_ms: int = 150,
+        min_silence_ms: int = 600,
+        pad_ms: int = 200,
+    ):
+        """Initialize the detector with frame size and segmentation thresholds."""
+        self.frame_len = SAMPLE_RATE * frame_ms // 1000
+        self.min_energy = min_energy
+        self.max_energy = max_energy
+        self.noise_ratio = noise_ratio
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.min_silence_frames = max(1, min_silence_ms // frame_ms)
+        self.pad = SAMPLE_RATE * pad_ms // 1000
+
+    def speech_frames(self, pcm: np.ndarray) -> np.ndarray:
+        """Return a boolean speech flag per frame."""
+        n_frames = len(pcm) // self.frame_len
+        if n_frames == 0:
+            return np.zeros(0, dtype=bool)
+        frames = pcm[:n_frames * self.frame_len].reshape(n_frames, self.frame_len)
+        rms = np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1))
+        # Adapt to the background level of this window, clamped so that a window
+        # of continuous speech can't raise the threshold above speech itself
+        noise_floor = float(np.percentile(rms, 10))
+        threshold = min(max(self.min_energy, noise_floor * self.noise_ratio), self.max_energy)
+        return rms > threshold
+
+    def has_speech(self, pcm: np.ndarray) -> bool:
+        """Check whether the audio contains at least one speech run."""
+        return self._speech_runs(self.speech_frames(pcm)) != []
+
+    def _speech_runs(self, flags: np.ndarray) -> List[Tuple[int, int]]:
+        """Find [start, end) frame runs of speech, ignoring runs shorter than min_speech."""
+        runs = []
+        start = None
+        for i, is_speech in enumerate(flags):
+            if is_speech and start is None:
+                start = i
+            elif not is_speech and start is not None:
+                runs.append((start, i))
+                start = None
+        if start is not None:
+            runs.append((start, len(flags)))
+        return [(s, e) for s, e in runs if e - s >= self.min_speech_frames]
+
+    def segment(self, pcm: np.ndarray, final: bool = False) -> Tuple[List[Tuple[int, int]], int]:
+        """
+        Split audio into closed speech segments.
+
+        A segment is closed once it is followed by min_silence of non-speech
+        (or by the end of the audio when final is set).
+
+        Args:
+            pcm: 16 kHz mono float32 samples
+            final: Treat the end of the buffer as end of speech
+
+        Returns:
+            Tuple of (closed segments as [start, end) sample ranges, samples consumed).
+            Audio before the consumed offset never needs to be looked at again.
+        """
+        flags = self.speech_frames(pcm)
+        runs = self._speech_runs(flags)
+        n_frames = len(flags)
+
+        # Merge runs separated by short pauses into utterance segments
+        merged: List[List[int]] = []
+        for s, e in runs:
+            if merged and s - merged[-1][1] < self.min_silence_frames:
+                merged[-1][1] = e
+            else:
+                merged.append([s, e])
+
+        segments = []
+        consumed = 0
+        for s, e in merged:
+            closed = final or n_frames - e >= self.min_silence_frames
+            if not closed:
+                break
+            start = max(0, s * self.frame_len - self.pad)
+            end = min(len(pcm), e * self.frame_len + self.pad)
+            segments.append((start, end))
+            consumed = end
+
+        if final:
+            consumed = len(pcm)
+        elif not merged:
+            # Pure silence: drop everything except a short lead-in for the next word
+            consumed = max(0, n_frames * self.frame_len - self.pad)
+        return segments, consumed
@@ -1,76 +1,372 @@
-import whisper
-import tempfile
-import os
+import asyncio
+import threading
 import logging
-from typing import Optional
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from app.config.config import (
+    WHISPER_ENGINE, WHISPER_POOL_KIND, WHISPER_WORKERS, WHISPER_QUEUE_SIZE, WHISPER_CASCADE_MODEL,
+    WHISPER_DAEMON_SOCKET, WHISPER_DAEMON_RETRY_INTERVAL, WHISPER_DAEMON_TIMEOUT
+)
+from app.services.metrics import metrics
+from .audio_decoder import AudioBytes, SAMPLE_RATE, decode_audio, is_pcm_format
+from .engines import Cascade, CascadePolicy, DecodeOptions, EngineSpec, TranscriptionEngine, check_engine, create_engine
+from .transcription_daemon import DaemonUnavailable, TranscriptionDaemonClient
+from .transcription_pool import TranscriptionPool, TranscriptionQueueFull
 
 logger = logging.getLogger(__name__)
 
+# Each pool worker (thread or process) keeps its own loaded engines here
+_worker_state = threading.local()
+
+
+def _get_worker_engine(spec: EngineSpec) -> TranscriptionEngine:
+    """Get or load the engine owned by the current worker (lazy loading)."""
+    engines = getattr(_worker_state, "engines", None)
+    if engines is None:
+        engines = _worker_state.engines = {}
+    if spec not in engines:
+        logger.info(f"Loading transcription engine in worker {threading.current_thread().name}: {spec.engine}/{spec.model_name}")
+        engines[spec] = create_engine(spec)
+        logger.info("Transcription engine loaded successfully")
+    return engines[spec]
+
+
+def _run_engines(spec: EngineSpec, cascade: Optional[Cascade], pcm: np.ndarray,
+                 initial_prompt: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """
+    Transcribe PCM, trying the cascade's draft model first when one is configured.
+
+    Returns:
+        The transcript, and why the clip escalated to the large model (None if it
+        didn't, or there is no cascade)
+    """
+    if cascade is None:
+        return _get_worker_engine(spec).transcribe(pcm, initial_prompt), None
+    return cascade.run(_get_worker_engine(cascade.draft), _get_worker_engine(spec), pcm, initial_prompt)
+
+
+def _run_engines_batch(spec: EngineSpec, cascade: Optional[Cascade], pcms: List[np.ndarray],
+                       initial_prompt: Optional[str] = None) -> List[Tuple[str, Optional[str]]]:
+    """Transcribe several clips as one model batch (see _run_engines)."""
+    if cascade is None:
+        return [(result.text, None) for result in _get_worker_engine(spec).transcribe_batch(pcms, initial_prompt)]
+    return cascade.run_batch(_get_worker_engine(cascade.draft), _get_worker_engine(spec), pcms, initial_prompt)
+
+
+def _timed(fn: Callable, *args) -> Tuple[Any, float]:
+    """
+    Run fn and return its result with how long it took.
+
+    Workers time themselves so the duration excludes the pool queue, and so it
+    reaches the caller's metrics from process workers too.
+    """
+    started = time.perf_counter()
+    return fn(*args), time.perf_counter() - started
+
+
+def _transcribe_in_worker(spec: EngineSpec, cascade: Optional[Cascade], audio_data: AudioBytes,
+                          audio_format: str = "webm") -> Tuple[Tuple[str, Optional[str]], float, float]:
+    """
+    Blocking decode + transcription of a single clip; runs on a pool worker.
+
+    Returns:
+        The transcript and escalation reason, then the seconds spent decoding the
+        audio container and running the model
+    """
+    # Decode in memory; the engine gets the PCM array, so it never spawns ffmpeg itself
+    pcm, decode_seconds = _timed(decode_audio, audio_data, audio_format)
+    logger.info(f"Transcribing audio data ({len(audio_data)} bytes, {len(pcm) / SAMPLE_RATE:.2f}s)")
+    outcome, model_seconds = _timed(_run_engines, spec, cascade, pcm)
+    return outcome, decode_seconds, model_seconds
+
+
+def _warm_up_worker(spec: EngineSpec, cascade: Optional[Cascade]) -> str:
+    """Load the worker's engines and run a dummy decode on each so first-request kernels are compiled."""
+    silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    _get_worker_engine(spec).transcribe(silence)
+    if cascade is not None:
+        _get_worker_engine(cascade.draft).transcribe(silence)
+    return threading.current_thread().name
+
+
+def _decode_in_worker(audio_data: AudioBytes, audio_format: str = "webm") -> np.ndarray:
+    """Decode a compressed clip to 16 kHz mono float32 PCM; runs on a pool worker."""
+    return decode_audio(audio_data, audio_format)
+
+
 class WhisperClient:
-    def __init__(self, model_name: str = "base"):
-        """Initialize Whisper client with specified model."""
+    def __init__(self, model_name: str = "base", pool: Optional[TranscriptionPool] = None,
+                 engine: str = WHISPER_ENGINE, options: Optional[DecodeOptions] = None,
+                 cascade_model: str = WHISPER_CASCADE_MODEL, cascade_policy: Optional[CascadePolicy] = None,
+                 daemon_socket: str = WHISPER_DAEMON_SOCKET):
+        """
+        Initialize Whisper client with specified model.
+
+        Args:
+            model_name: Whisper model size (e.g. "tiny", "base")
+            pool: Worker pool to run on (a bounded pool from config by default)
+            engine: Transcription engine name (see engines.ENGINES)
+            options: Decode options (from config by default)
+            cascade_model: Smaller model to try first, keeping model_name for low-confidence
+                or long clips (empty disables the cascade)
+            cascade_policy: Escalation thresholds (from config by default)
+            daemon_socket: Transcription daemon to send decodes to, falling back to the
+                local pool while it is unreachable (empty always uses the local pool)
+        """
+        check_engine(engine)
         self.model_name = model_name
-        self._model = None
-        logger.info(f"Initializing WhisperClient with model: {model_name}")
-    
-    def _get_model(self):
-        """Get or load the Whisper model (lazy loading)."""
-        if self._model is None:
-            logger.info(f"Loading Whisper model: {self.model_name}")
-            self._model = whisper.load_model(self.model_name)
-            logger.info("Whisper model loaded successfully")
-        return self._model
-    
-    async def transcribe_audio(self, audio_data: bytes) -> str:
+        self.spec = EngineSpec(engine, model_name, options or DecodeOptions.from_config())
+        self.cascade: Optional[Cascade] = None
+        if cascade_model and cascade_model != model_name:
+            self.cascade = Cascade(
+                EngineSpec(engine, cascade_model, self.spec.options),
+                cascade_policy or CascadePolicy.from_config()
+            )
+
+        self.pool = pool or TranscriptionPool(
+            kind=WHISPER_POOL_KIND,
+            workers=WHISPER_WORKERS,
+            queue_size=WHISPER_QUEUE_SIZE,
+        )
+
+        self.daemon = (
+            TranscriptionDaemonClient(daemon_socket, WHISPER_DAEMON_RETRY_INTERVAL, WHISPER_DAEMON_TIMEOUT) if daemon_socket else None
+        )
+
+        # Daemon stats
+        self._daemon_decodes = 0
+        self._local_fallbacks = 0
+
+        # Cascade stats
+        self._decodes = 0
+        self._escalations: Dict[str, int] = {}
+        logger.info(
+            f"Initializing WhisperClient with model: {model_name} ({engine} engine"
+            + (f", cascading from {cascade_model})" if self.cascade else ")")
+        )
+
+    async def transcribe_audio(self, audio_data: AudioBytes, audio_format: str = "webm") -> str:
         """
         Transcribe audio data to text using Whisper.
-        
+
+        Decoding runs on the transcription daemon when one is configured and
+        reachable, otherwise on the transcription pool, so the event loop stays
+        free while the model works.
+
         Args:
-            audio_data: Raw audio bytes (e.g., from WebM file)
-            
+            audio_data: Raw audio bytes (e.g., from WebM file); memoryviews are
+                handed to thread workers without copying
+            audio_format: "webm" or a raw PCM format ("pcm_f32le", "pcm_s16le")
+
         Returns:
             Transcribed text string
-            
+
         Raises:
+            TranscriptionQueueFull: If the pool (or daemon) queue is full
             Exception: If transcription fails
         """
         try:
-            # Get Whisper model
-            model = self._get_model()
-            
-            # Create temporary file for audio data
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".webm") as temp_file:
-                temp_file.write(audio_data)
-                temp_file_path = temp_file.name
-            
-            try:
-                # Transcribe using Whisper
-                logger.info(f"Transcribing audio data ({len(audio_data)} bytes)")
-                result = model.transcribe(temp_file_path)
-                
-                # Extract text from result
-                transcribed_text = result["text"].strip()
-                
-                if not transcribed_text:
-                    raise Exception("No speech detected in audio data")
-                
-                logger.info(f"Transcription successful: {len(transcribed_text)} characters")
-                return transcribed_text
-                
-            finally:
-                # Clean up temp file
-                try:
-                    os.unlink(temp_file_path)
-                except OSError:
-                    pass
-                    
+            outcome = await self._via_daemon("transcribe", audio_data, format=audio_format)
+            if outcome is None:
+                if self.pool.kind == "process" and isinstance(audio_data, memoryview):
+                    # memoryviews can't be pickled across the process boundary
+                    audio_data = audio_data.tobytes()
+                outcome, decode_seconds, model_seconds = await self.pool.run(
+                    _transcribe_in_worker, self.spec, self.cascade, audio_data, audio_format
+                )
+                metrics.observe("audio_decode", decode_seconds, label=audio_format)
+                metrics.observe("model_decode", model_seconds)
+            transcribed_text = self._count(outcome)
+
+            if not transcribed_text:
+                raise Exception("No speech detected in audio data")
+
+            logger.info(f"Transcription successful: {len(transcribed_text)} characters")
+            return transcribed_text
+
+        except TranscriptionQueueFull:
+            # Overload, not a failed decode; callers answer it with backpressure
+            raise
         except Exception as e:
             logger.error(f"Error transcribing audio: {e}")
             raise Exception(f"Transcription failed: {str(e)}")
-    
+
+    async def decode_audio(self, audio_data: bytes, audio_format: str = "webm") -> np.ndarray:
+        """
+        Decode audio (e.g., a growing WebM stream) to 16 kHz float32 PCM.
+
+        Raw PCM is converted inline since it is only a reinterpretation of the
+        bytes; compressed audio is decoded on the pool.
+
+        Args:
+            audio_data: Raw audio bytes
+            audio_format: "webm" or a raw PCM format
+
+        Returns:
+            Mono float32 samples at 16 kHz
+        """
+        if is_pcm_format(audio_format):
+            with metrics.timer("audio_decode", label=audio_format):
+                return decode_audio(audio_data, audio_format)
+        pcm, seconds = await self.pool.run(_timed, _decode_in_worker, audio_data, audio_format)
+        metrics.observe("audio_decode", seconds, label=audio_format)
+        return pcm
+
+    async def transcribe_pcm(self, pcm: np.ndarray, initial_prompt: Optional[str] = None) -> str:
+        """
+        Transcribe a window of decoded PCM.
+
+        Unlike transcribe_audio, an empty result is not an error since streaming
+        windows routinely contain no words yet.
+
+        Args:
+            pcm: Mono float32 samples at 16 kHz
+            initial_prompt: Previously committed text, to keep context across windows
+
+        Returns:
+            Transcribed text string (possibly empty)
+        """
+        payload = np.ascontiguousarray(pcm, dtype=np.float32).data
+        outcome = await self._via_daemon("transcribe_pcm", payload, initial_prompt=initial_prompt)
+        if outcome is None:
+            outcome, seconds = await self.pool.run(_timed, _run_engines, self.spec, self.cascade, pcm, initial_prompt)
+            metrics.observe("model_decode", seconds)
+        return self._count(outcome)
+
+    async def transcribe_batch(self, pcms: List[np.ndarray], initial_prompt: Optional[str] = None) -> List[str]:
+        """
+        Transcribe several decoded clips together.
+
+        Locally the clips go to one pool worker as a single model batch; with a
+        daemon they are sent concurrently and the daemon batches them.
+
+        Args:
+            pcms: Mono float32 clips at 16 kHz, ideally of similar length
+            initial_prompt: Decoding context shared by all clips
+
+        Returns:
+            One transcript per clip (possibly empty)
+        """
+        outcomes = [None] * len(pcms)
+        if self.daemon is not None:
+            outcomes = await asyncio.gather(*(
+                self._via_daemon("transcribe_pcm", np.ascontiguousarray(pcm, dtype=np.float32).data,
+                                 initial_prompt=initial_prompt)
+                for pcm in pcms
+            ))
+        local = [i for i, outcome in enumerate(outcomes) if outcome is None]
+        if local:
+            decoded, seconds = await self.pool.run(
+                _timed, _run_engines_batch, self.spec, self.cascade, [pcms[i] for i in local], initial_prompt
+            )
+            metrics.observe("model_decode", seconds, label="batch")
+            for i, outcome in zip(local, decoded):
+                outcomes[i] = outcome
+        return [self._count(outcome) for outcome in outcomes]
+
+    async def _via_daemon(self, op: str, payload, **fields) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Run a decode on the transcription daemon.
+
+        Returns:
+            The transcript and escalation reason, or None if the caller should
+            decode locally (no daemon configured, or it is unreachable)
+        """
+        if self.daemon is None:
+            return None
+        started = time.perf_counter()
+        try:
+            response = await self.daemon.request(op, payload, **fields)
+        except DaemonUnavailable:
+            self._local_fallbacks += 1
+            metrics.increment("daemon_fallback")
+            return None
+        metrics.observe("daemon_request", time.perf_counter() - started, label=op)
+        self._daemon_decodes += 1
+        return response["text"], response.get("escalation")
+
+    def _count(self, outcome: Tuple[str, Optional[str]]) -> str:
+        """Record whether a decode escalated past the cascade's draft model."""
+        text, escalation = outcome
+        if self.cascade is not None:
+            self._decodes += 1
+            if escalation is not None:
+                self._escalations[escalation] = self._escalations.get(escalation, 0) + 1
+        return text
+
+    @property
+    def cache_options(self) -> dict:
+        """Engine settings that affect transcripts, for transcription cache keys."""
+        options = self.spec.cache_options()
+        if self.cascade is not None:
+            options["cascade"] = [self.cascade.draft.model_name, *self.cascade.policy]
+        return options
+
+    async def warm_up(self):
+        """
+        Load the model in every pool worker and run a dummy decode on each.
+
+        With a reachable daemon the local pool is left cold; it loads lazily if
+        the daemon later goes away.
+        """
+        if self.daemon is not None:
+            try:
+                served = await self.daemon.request("ping")
+            except DaemonUnavailable:
+                pass
+            else:
+                expected = (self.spec.engine, self.model_name, self.cascade.draft.model_name if self.cascade else None)
+                if (served["engine"], served["model"], served["cascade"]) != expected:
+                    logger.warning(f"Transcription daemon serves {served['engine']}/{served['model']} "
+                                   f"(cascade {served['cascade']}), but this worker is configured for "
+                                   f"{expected[0]}/{expected[1]} (cascade {expected[2]})")
+                return
+        await asyncio.gather(*(
+            self.pool.run(_warm_up_worker, self.spec, self.cascade)
+            for _ in range(self.pool.workers)
+        ))
+
     def get_model_info(self) -> dict:
-        """Get information about the loaded model."""
+        """Get information about the model and its worker pool."""
         return {
             "model_name": self.model_name,
-            "loaded": self._model is not None
+            "engine": self.spec.engine,
+            "options": self.spec.options._asdict(),
+            "cascade": self._get_cascade_stats(),
+            "daemon": self._get_daemon_stats(),
+            "pool": self.pool.get_stats()
+        }
+
+    def _get_daemon_stats(self) -> Optional[dict]:
+        """Decodes served by the daemon versus the local fallback."""
+        if self.daemon is None:
+            return None
+        return {
+            "socket": self.daemon.socket_path,
+            "decodes": self._daemon_decodes,
+            "local_fallbacks": self._local_fallbacks,
+        }
+
+    async def get_daemon_stats(self) -> Optional[dict]:
+        """The daemon's own batching stats (None without a reachable daemon)."""
+        if self.daemon is None:
+            return None
+        try:
+            return (await self.daemon.request("stats"))["stats"]
+        except DaemonUnavailable:
+            return None
+
+    def _get_cascade_stats(self) -> Optional[dict]:
+        """Share of decodes that escalated from the draft model, by reason."""
+        if self.cascade is None:
+            return None
+        escalated = sum(self._escalations.values())
+        return {
+            "draft_model": self.cascade.draft.model_name,
+            "policy": self.cascade.policy._asdict(),
+            "decodes": self._decodes,
+            "escalated": escalated,
+            "escalation_fraction": round(escalated / self._decodes, 3) if self._decodes else None,
+            "reasons": dict(self._escalations)
         }
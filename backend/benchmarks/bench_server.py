@@ -0,0 +1,55 @@
+"""
+Run the backend with stand-in agent and/or Whisper backends for load tests.
+
+Started as a subprocess by ws_load_bench, so the server's memory can be
+measured on its own:
+
+    python -m benchmarks.bench_server --port 8765 --agent fake --whisper fake
+"""
+import argparse
+import os
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--agent", choices=("fake", "real"), default="fake")
+    parser.add_argument("--agent-delay", type=float, default=0.2, help="Fake agent seconds before the first token")
+    parser.add_argument("--agent-tokens", type=int, default=20, help="Fake agent tokens per reply")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="Fake agent seconds between tokens")
+    parser.add_argument("--whisper", choices=("fake", "real"), default="fake")
+    parser.add_argument("--whisper-delay", type=float, default=0.02, help="Fake Whisper fixed seconds per decode")
+    parser.add_argument("--whisper-rtf", type=float, default=0.05, help="Fake Whisper seconds per audio second")
+    parser.add_argument("--transcription-cache", action="store_true", help="Keep the transcription cache on (repeated clips become hits)")
+    args = parser.parse_args()
+
+    # Must be set before the app modules read their config
+    os.environ["DICTATE_TRANSCRIPT_DB_PATH"] = ""
+    os.environ["DICTATE_WARMUP_ON_STARTUP"] = "1"
+    if not args.transcription_cache:
+        os.environ["DICTATE_TRANSCRIPTION_CACHE_SIZE"] = "0"
+
+    import uvicorn
+    from app import app as app_module
+    from app.dependencies import get_agent_service, get_audio_transcription_service
+    from benchmarks.fakes import FakeAgentService, FakeWhisperClient
+
+    app = app_module.app
+    if args.agent == "fake":
+        agent = FakeAgentService(args.agent_delay, args.agent_tokens, args.token_delay)
+        app.dependency_overrides[get_agent_service] = lambda: agent
+        # Startup warm-up calls the getter directly rather than through Depends
+        app_module.get_agent_service = lambda: agent
+    if args.whisper == "fake":
+        # Keep the real service (cache, VAD, decoding) and swap only the model
+        service = get_audio_transcription_service()
+        fake = FakeWhisperClient(args.whisper_delay, args.whisper_rtf)
+        fake.pool = service.whisper_client.pool
+        service.whisper_client = fake
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
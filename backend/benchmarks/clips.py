@@ -0,0 +1,72 @@
+"""
+Short spoken-command clips for benchmarks.
+
+Clips are listed in clips/manifest.json with their reference transcripts.
+The WAV files are generated locally with make_clips (text-to-speech), or
+you can drop in your own recordings with the same names. When no WAV files
+are present, load_clips() can synthesize speech-like noise bursts instead.
+Those bursts are only useful with the fake Whisper backend.
+"""
+import json
+import os
+import wave
+from typing import List, NamedTuple
+
+import numpy as np
+
+CLIPS_DIR = os.path.join(os.path.dirname(__file__), "clips")
+SAMPLE_RATE = 16000
+
+
+class Clip(NamedTuple):
+    name: str
+    pcm_s16le: bytes
+    text: str
+
+    @property
+    def seconds(self) -> float:
+        return len(self.pcm_s16le) / 2 / SAMPLE_RATE
+
+
+def _read_wav(path: str) -> bytes:
+    with wave.open(path, "rb") as f:
+        if f.getframerate() != SAMPLE_RATE or f.getnchannels() != 1 or f.getsampwidth() != 2:
+            raise ValueError(f"{path} must be 16 kHz mono 16-bit PCM")
+        return f.readframes(f.getnframes())
+
+
+def _synthesize(seconds: float, seed: int) -> bytes:
+    """Syllable-like bursts of a noisy tone, separated by short gaps, with silence at both ends."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    envelope = (np.sin(2 * np.pi * 4 * t) > 0).astype(np.float32)
+    envelope[: SAMPLE_RATE // 4] = envelope[-SAMPLE_RATE // 4:] = 0
+    signal = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.05 * rng.standard_normal(len(t))
+    return (signal * envelope * 32767).astype(np.int16).tobytes()
+
+
+def load_clips(directory: str = CLIPS_DIR, synthesize: bool = False) -> List[Clip]:
+    """
+    Load the manifest's clips.
+
+    Args:
+        directory: Directory holding manifest.json and the WAV files
+        synthesize: Generate stand-in audio for missing files instead of failing
+
+    Raises:
+        FileNotFoundError: If a clip is missing and synthesize is False
+    """
+    with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    clips = []
+    for i, entry in enumerate(manifest["clips"]):
+        path = os.path.join(directory, entry["file"])
+        if os.path.isfile(path):
+            pcm = _read_wav(path)
+        elif synthesize:
+            pcm = _synthesize(1.0 + 0.25 * len(entry["text"].split()), seed=i)
+        else:
+            raise FileNotFoundError(f"{path} is missing; run python -m benchmarks.make_clips first")
+        clips.append(Clip(entry["file"], pcm, entry["text"]))
+    return clips
@@ -0,0 +1,150 @@
+"""
+Side-by-side speed and accuracy of transcription engines on the bundled clips.
+
+Each configuration is loaded in-process, warmed up, then run over every clip
+in clips/manifest.json. Reports load time, per-clip latency, real-time factor
+(decode seconds per audio second) and word error rate against the manifest's
+reference texts. With --cascade, each configuration is also run behind a
+confidence cascade from a smaller model, reporting how many clips escalated.
+
+    python -m benchmarks.make_clips
+    python -m benchmarks.engine_bench --engine whisper:base --engine faster-whisper:base \\
+        --beam-size 0 --beam-size 5 --language en --without-timestamps --cascade tiny
+"""
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+from app.services.voice_processing.audio_decoder import decode_audio
+from app.services.voice_processing.engines import Cascade, CascadePolicy, DecodeOptions, EngineSpec, create_engine
+
+from .clips import CLIPS_DIR, load_clips
+
+
+def normalize(text: str) -> List[str]:
+    """Lowercase words without punctuation, the usual normalization before scoring WER."""
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_errors(reference: List[str], hypothesis: List[str]) -> int:
+    """Word-level edit distance (substitutions + deletions + insertions)."""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            ))
+        previous = current
+    return previous[-1]
+
+
+def run_config(spec: EngineSpec, clips, repeat: int, cascade: Optional[Cascade] = None) -> Dict:
+    """Load one engine configuration (optionally behind a cascade) and measure it over all clips."""
+    started = time.perf_counter()
+    engine = create_engine(spec)
+    draft = create_engine(cascade.draft) if cascade else None
+    load_s = time.perf_counter() - started
+
+    def transcribe(pcm):
+        if cascade is None:
+            return engine.transcribe(pcm), None
+        return cascade.run(draft, engine, pcm)
+
+    pcm_clips = [(clip, decode_audio(clip.pcm_s16le, "pcm_s16le")) for clip in clips]
+
+    # Warm-up decode, so kernel selection and allocations aren't billed to the first clip
+    transcribe(pcm_clips[0][1])
+
+    latencies = []
+    errors = words = 0
+    audio_s = 0.0
+    escalated = 0
+    samples = []
+    for clip, pcm in pcm_clips:
+        for _ in range(repeat):
+            t = time.perf_counter()
+            text, escalation = transcribe(pcm)
+            latencies.append(time.perf_counter() - t)
+            escalated += escalation is not None
+        audio_s += clip.seconds * repeat
+        reference = normalize(clip.text)
+        errors += word_errors(reference, normalize(text))
+        words += len(reference)
+        samples.append({"clip": clip.name, "reference": clip.text, "hypothesis": text})
+
+    latencies.sort()
+    return {
+        "engine": spec.engine,
+        "model": f"{cascade.draft.model_name}>{spec.model_name}" if cascade else spec.model_name,
+        "options": spec.options._asdict(),
+        "load_s": round(load_s, 2),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000, 1),
+        "rtf": round(sum(latencies) / audio_s, 3),
+        "wer": round(errors / max(1, words), 3),
+        "escalation_fraction": round(escalated / len(latencies), 3) if cascade else None,
+        "samples": samples,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare transcription engines on the bundled clips")
+    parser.add_argument("--engine", action="append", default=[],
+                        help="Engine and model as ENGINE[:MODEL] (repeatable; default whisper:base)")
+    parser.add_argument("--beam-size", type=int, action="append", default=[],
+                        help="Beam size to try (repeatable; 0 is greedy)")
+    parser.add_argument("--language", default="", help="Pin the language (empty auto-detects)")
+    parser.add_argument("--without-timestamps", action="store_true")
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--compute-type", default="int8", help="faster-whisper weight precision")
+    parser.add_argument("--cascade", metavar="MODEL",
+                        help="Also run each configuration behind a confidence cascade from this smaller model")
+    parser.add_argument("--repeat", type=int, default=3, help="Decodes per clip")
+    parser.add_argument("--clips", default=CLIPS_DIR, help="Directory with manifest.json and WAV files")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--show-text", action="store_true", help="Print each hypothesis next to its reference")
+    args = parser.parse_args()
+
+    clips = load_clips(args.clips)
+    specs = []
+    for entry in args.engine or ["whisper:base"]:
+        engine, _, model = entry.partition(":")
+        for beam_size in args.beam_size or [0]:
+            options = DecodeOptions(args.language, beam_size, args.without_timestamps, args.threads, args.compute_type)
+            spec = EngineSpec(engine, model or "base", options)
+            specs.append((spec, None))
+            if args.cascade:
+                specs.append((spec, Cascade(spec._replace(model_name=args.cascade), CascadePolicy.from_config())))
+
+    results = []
+    for spec, cascade in specs:
+        print(f"Running {spec.engine}:{spec.model_name} beam={spec.options.beam_size}"
+              f"{f' cascade={cascade.draft.model_name}' if cascade else ''}...", file=sys.stderr)
+        results.append(run_config(spec, clips, args.repeat, cascade))
+
+    print(f"{sum(c.seconds for c in clips):.1f}s of audio in {len(clips)} clips, {args.repeat} decodes each\n")
+    print(f"{'engine':<16}{'model':<12}{'beam':>5}{'load s':>8}{'p50 ms':>8}{'mean ms':>9}{'p95 ms':>8}"
+          f"{'RTF':>7}{'WER':>7}{'escalated':>10}")
+    for r in results:
+        escalated = "" if r["escalation_fraction"] is None else f"{r['escalation_fraction']:.0%}"
+        print(f"{r['engine']:<16}{r['model']:<12}{r['options']['beam_size']:>5}{r['load_s']:>8}{r['p50_ms']:>8}"
+              f"{r['mean_ms']:>9}{r['p95_ms']:>8}{r['rtf']:>7}{r['wer']:>7}{escalated:>10}")
+        if args.show_text:
+            for sample in r["samples"]:
+                print(f"    {sample['reference']!r} -> {sample['hypothesis']!r}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"clips": len(clips), "repeat": args.repeat, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
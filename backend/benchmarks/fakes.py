@@ -0,0 +1,110 @@
+"""
+Local stand-ins for the agent and Whisper, so /ws/dictate can be load-tested
+without OpenAI, a browser or a GPU.
+"""
+import asyncio
+from typing import Any, AsyncIterator, Dict
+
+import numpy as np
+
+from app.services.voice_processing.audio_decoder import SAMPLE_RATE, decode_audio, is_pcm_format
+
+
+class FakeAgentService:
+    """AgentService stand-in that streams a canned reply after a configurable delay."""
+
+    def __init__(self, delay: float = 0.2, tokens: int = 20, token_delay: float = 0.01):
+        """
+        Args:
+            delay: Seconds before the first token (LLM and tool latency)
+            tokens: Number of streamed tokens in each reply
+            token_delay: Seconds between tokens
+        """
+        self.delay = delay
+        self.tokens = tokens
+        self.token_delay = token_delay
+
+    def _reply(self, text: str) -> str:
+        return f"Done: {text[:40]}"
+
+    def process_text(self, text: str) -> str:
+        return self._reply(text)
+
+    async def aprocess_text(self, text: str, session_id: str = "default") -> str:
+        await asyncio.sleep(self.delay + self.tokens * self.token_delay)
+        return self._reply(text)
+
+    async def astream_text(self, text: str, session_id: str = "default") -> AsyncIterator[Dict[str, Any]]:
+        await asyncio.sleep(self.delay)
+        for i in range(self.tokens):
+            await asyncio.sleep(self.token_delay)
+            yield {"type": "delta", "text": f"tok{i} "}
+        yield {"type": "final", "text": self._reply(text)}
+
+    async def close_session(self, session_id: str):
+        pass
+
+    async def close(self):
+        pass
+
+    async def warm_up(self):
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {}
+
+    def is_ready(self) -> bool:
+        return True
+
+
+class FakeWhisperClient:
+    """WhisperClient stand-in whose decode time scales with the audio duration."""
+
+    def __init__(self, delay: float = 0.02, rtf: float = 0.05, text: str = "open the news website"):
+        """
+        Args:
+            delay: Fixed seconds per decode
+            rtf: Additional seconds per second of audio (real-time factor)
+            text: Transcript returned for every clip
+        """
+        self.model_name = "fake"
+        self.cache_options = {"engine": "fake"}
+        # Set by the bench server to the replaced client's pool, which app shutdown closes
+        self.pool = None
+        self.delay = delay
+        self.rtf = rtf
+        self.text = text
+        self.calls = 0
+
+    async def _work(self, seconds: float):
+        self.calls += 1
+        await asyncio.sleep(self.delay + self.rtf * seconds)
+
+    async def transcribe_audio(self, audio_data, audio_format: str = "webm") -> str:
+        pcm = await self.decode_audio(audio_data, audio_format)
+        await self._work(len(pcm) / SAMPLE_RATE)
+        return self.text
+
+    async def decode_audio(self, audio_data, audio_format: str = "webm") -> np.ndarray:
+        if is_pcm_format(audio_format):
+            return decode_audio(audio_data, audio_format)
+        # Compressed audio isn't decoded; assume roughly 32 kbit/s Opus
+        return np.zeros(int(len(audio_data) / 4000 * SAMPLE_RATE), dtype=np.float32)
+
+    async def transcribe_pcm(self, pcm: np.ndarray, initial_prompt=None) -> str:
+        await self._work(len(pcm) / SAMPLE_RATE)
+        return self.text
+
+    async def transcribe_batch(self, pcms, initial_prompt=None) -> list:
+        # One padded batch costs about as much as its longest clip
+        await self._work(max(len(pcm) for pcm in pcms) / SAMPLE_RATE)
+        return [self.text] * len(pcms)
+
+    async def warm_up(self):
+        pass
+
+    async def get_daemon_stats(self):
+        return None
+
+    def get_model_info(self) -> dict:
+        return {"model_name": self.model_name, "calls": self.calls}
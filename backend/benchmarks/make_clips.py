@@ -0,0 +1,54 @@
+"""
+Generate the benchmark clips in clips/manifest.json with a local TTS engine.
+
+Uses espeak-ng/espeak (Linux) or say (macOS), plus ffmpeg to resample
+to 16 kHz mono 16-bit WAV. Existing files are kept unless --force is given.
+
+    python -m benchmarks.make_clips [--force]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+
+from benchmarks.clips import CLIPS_DIR
+
+
+def _tts_command(text: str, out_path: str):
+    for engine in ("espeak-ng", "espeak"):
+        if shutil.which(engine):
+            return [engine, "-s", "160", "-w", out_path, text]
+    if shutil.which("say"):
+        return ["say", "-o", out_path, "--file-format=WAVE", "--data-format=LEI16@16000", text]
+    raise SystemExit("No TTS engine found (install espeak-ng, or run on macOS with say)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--force", action="store_true", help="Regenerate existing clips")
+    args = parser.parse_args()
+
+    if not shutil.which("ffmpeg"):
+        raise SystemExit("ffmpeg is required to resample the clips")
+
+    with open(os.path.join(CLIPS_DIR, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for entry in manifest["clips"]:
+            target = os.path.join(CLIPS_DIR, entry["file"])
+            if os.path.isfile(target) and not args.force:
+                continue
+            raw = os.path.join(tmp, "raw.wav")
+            subprocess.run(_tts_command(entry["text"], raw), check=True)
+            subprocess.run(
+                ["ffmpeg", "-y", "-loglevel", "error", "-i", raw, "-ac", "1", "-ar", "16000", "-sample_fmt", "s16", target],
+                check=True
+            )
+            print(f"Wrote {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Startup import-time report for the backend.
+
+Imports app.app in a fresh interpreter under -X importtime, then reports the
+total import time and the slowest modules. It fails if heavy ML or agent
+libraries were pulled in at import time or the total exceeds the budget.
+Optionally it also starts uvicorn and times the first HTTP response and
+the first websocket pong.
+
+    python -m benchmarks.startup_bench [--budget-ms 800] [--serve] [--json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Top-level packages that must only load on first use or during background warm-up
+HEAVY_MODULES = ("torch", "whisper", "langchain", "langchain_core", "langchain_openai", "langgraph", "mcp", "openai", "tiktoken", "av")
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure_imports(module: str = "app.app") -> Tuple[float, List[Tuple[str, float, int]]]:
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        Wall time of the import in ms, and (module, cumulative ms, depth) per imported module
+    """
+    env = dict(os.environ, DICTATE_WARMUP_ON_STARTUP="0")
+    code = f"import time; t = time.perf_counter(); import {module}; print((time.perf_counter() - t) * 1000)"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            modules.append((match.group(4), int(match.group(2)) / 1000, len(match.group(3)) // 2))
+    return float(result.stdout.strip().splitlines()[-1]), modules
+
+
+def measure_first_response(timeout: float = 30.0) -> Dict[str, float]:
+    """Start uvicorn and time the first HTTP response and websocket pong."""
+    import websockets
+    from app.config.config import SECRET_KEY
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    env = dict(os.environ, DICTATE_WARMUP_ON_STARTUP="1", DICTATE_TRANSCRIPT_DB_PATH="")
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+    timings = {}
+    try:
+        request = urllib.request.Request(f"http://127.0.0.1:{port}/", headers={"x-app-secret": SECRET_KEY})
+        while "http_ms" not in timings:
+            if time.perf_counter() - started > timeout:
+                raise SystemExit("Server did not answer HTTP in time")
+            try:
+                with urllib.request.urlopen(request, timeout=1):
+                    timings["http_ms"] = (time.perf_counter() - started) * 1000
+            except Exception:
+                time.sleep(0.02)
+
+        async def ping():
+            async with websockets.connect(f"ws://127.0.0.1:{port}/ws/dictate") as ws:
+                await ws.send(json.dumps({"type": "ping", "corr": "startup", "data": {}}))
+                while json.loads(await ws.recv()).get("type") != "pong":
+                    pass
+
+        asyncio.run(ping())
+        timings["ws_pong_ms"] = (time.perf_counter() - started) * 1000
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    return {k: round(v, 1) for k, v in timings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="app.app")
+    parser.add_argument("--budget-ms", type=float, default=800.0, help="Fail if importing the module takes longer")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest modules to list")
+    parser.add_argument("--serve", action="store_true", help="Also time the first HTTP response and websocket pong")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    total_ms, modules = measure_imports(args.module)
+    heavy = sorted({name.split(".")[0] for name, _, _ in modules if name.split(".")[0] in HEAVY_MODULES})
+    # Slowest top-level imports (depth 0), which is what each direct import actually costs
+    slowest = sorted((m for m in modules if m[2] == 0), key=lambda m: m[1], reverse=True)[:args.top]
+
+    report = {
+        "module": args.module,
+        "import_ms": round(total_ms, 1),
+        "budget_ms": args.budget_ms,
+        "modules_imported": len(modules),
+        "heavy_modules": heavy,
+        "slowest": [{"module": name, "cumulative_ms": round(ms, 1)} for name, ms, _ in slowest],
+    }
+    if args.serve:
+        report["serve"] = measure_first_response()
+
+    failures = []
+    if heavy:
+        failures.append(f"heavy modules imported at startup: {', '.join(heavy)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"import took {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    report["ok"] = not failures
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import {args.module}: {total_ms:.0f} ms, {len(modules)} modules")
+        for entry in report["slowest"]:
+            print(f"  {entry['cumulative_ms']:>8.1f} ms  {entry['module']}")
+        if "serve" in report:
+            print(f"first HTTP response {report['serve']['http_ms']} ms, first websocket pong {report['serve']['ws_pong_ms']} ms")
+        for failure in failures:
+            print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
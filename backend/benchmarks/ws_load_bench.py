@@ -0,0 +1,321 @@
+"""
+Load and latency benchmark for /ws/dictate.
+
+Starts the backend (benchmarks.bench_server) in a subprocess with stand-in
+backends, drives N concurrent websocket clients sending transcript, audio and
+ping traffic, and reports throughput, p50/p95/p99 latency per message type,
+ping jitter and server memory growth.
+
+    python -m benchmarks.ws_load_bench --clients 20 --duration 30
+    python -m benchmarks.ws_load_bench --whisper real --mix audio=1 --output results.json
+
+Results written with --output can be compared across runs with --baseline.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import websockets
+
+from app.api.binary_frames import encode_binary_frame
+from app.config.config import SECRET_KEY
+from benchmarks.clips import load_clips
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process in MB (Linux /proc; None elsewhere)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"count": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+    return {
+        "count": len(ordered),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+    }
+
+
+class Recorder:
+    """Latencies and errors collected by all clients."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.ping_rtts: Dict[int, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.completed = 0
+
+
+async def run_client(client_id: int, uri: str, args, clips, recorder: Recorder, deadline: float):
+    """One websocket client: a request loop waiting for each reply, plus a concurrent pinger."""
+    mix_types = list(args.mix)
+    mix_weights = [args.mix[t] for t in mix_types]
+    rng = random.Random(client_id)
+    sent_at: Dict[str, float] = {}
+    waiters: Dict[str, asyncio.Future] = {}
+    first_token_seen = set()
+
+    async with websockets.connect(uri, max_size=None) as ws:
+
+        async def receive():
+            async for raw in ws:
+                message = json.loads(raw)
+                corr = message.get("corr")
+                kind = message.get("type")
+                data = message.get("data") or {}
+                now = time.perf_counter()
+                if kind == "pong" and corr in sent_at:
+                    recorder.ping_rtts[client_id].append(now - sent_at.pop(corr))
+                elif kind == "transcript_delta" and corr in sent_at and corr not in first_token_seen:
+                    first_token_seen.add(corr)
+                    recorder.latencies["agent_first_token"].append(now - sent_at[corr])
+                elif kind == "transcript" and data.get("sender") == "User" and corr in sent_at and corr.startswith("a"):
+                    recorder.latencies["audio_transcribed"].append(now - sent_at[corr])
+                elif kind == "transcript" and data.get("sender") == "Dictate" and corr in waiters:
+                    waiters.pop(corr).set_result(True)
+                elif kind == "error":
+                    recorder.errors[data.get("code", "UNKNOWN")] += 1
+                    if corr in waiters:
+                        waiters.pop(corr).set_result(False)
+
+        async def ping():
+            n = 0
+            while time.perf_counter() < deadline:
+                corr = f"p{client_id}-{n}"
+                n += 1
+                sent_at[corr] = time.perf_counter()
+                await ws.send(json.dumps({"type": "ping", "corr": corr, "data": {}}))
+                await asyncio.sleep(args.ping_interval)
+
+        receiver = asyncio.create_task(receive())
+        pinger = asyncio.create_task(ping()) if args.ping_interval > 0 else None
+        n = 0
+        try:
+            while time.perf_counter() < deadline:
+                kind = rng.choices(mix_types, mix_weights)[0]
+                corr = f"{kind[0]}{client_id}-{n}"
+                n += 1
+                waiter = waiters[corr] = asyncio.get_running_loop().create_future()
+                sent_at[corr] = time.perf_counter()
+                if kind == "audio":
+                    clip = clips[n % len(clips)]
+                    await ws.send(encode_binary_frame("audio", clip.pcm_s16le, corr, "pcm_s16le"))
+                else:
+                    await ws.send(json.dumps({
+                        "type": "transcript",
+                        "corr": corr,
+                        "data": {"text": f"open example page number {n}", "sender": "User"}
+                    }))
+                try:
+                    ok = await asyncio.wait_for(waiter, timeout=args.timeout)
+                except asyncio.TimeoutError:
+                    waiters.pop(corr, None)
+                    recorder.errors["TIMEOUT"] += 1
+                    continue
+                if ok:
+                    recorder.latencies[kind].append(time.perf_counter() - sent_at.pop(corr))
+                    recorder.completed += 1
+                if args.think_time:
+                    await asyncio.sleep(rng.uniform(0, 2 * args.think_time))
+        finally:
+            if pinger is not None:
+                pinger.cancel()
+            receiver.cancel()
+
+
+def _wait_ready(port: int, server: subprocess.Popen, timeout: float):
+    """Poll /ready until every component has warmed up."""
+    started = time.monotonic()
+    request = urllib.request.Request(f"http://127.0.0.1:{port}/ready", headers={"x-app-secret": SECRET_KEY})
+    while time.monotonic() - started < timeout:
+        if server.poll() is not None:
+            raise SystemExit(f"Benchmark server exited with code {server.returncode}")
+        try:
+            with urllib.request.urlopen(request, timeout=1) as response:
+                if response.status == 200:
+                    return
+        except Exception:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"Benchmark server not ready after {timeout:.0f}s")
+
+
+async def run_load(args, port: int, server_pid: int, clips) -> dict:
+    recorder = Recorder()
+    rss_samples: List[float] = []
+
+    async def sample_memory():
+        while True:
+            rss = _rss_mb(server_pid)
+            if rss is not None:
+                rss_samples.append(rss)
+            await asyncio.sleep(1.0)
+
+    sampler = asyncio.create_task(sample_memory())
+    await asyncio.sleep(0)
+    uri = f"ws://127.0.0.1:{port}/ws/dictate"
+    started = time.perf_counter()
+    deadline = started + args.duration
+    results = await asyncio.gather(
+        *(run_client(i, uri, args, clips, recorder, deadline) for i in range(args.clients)),
+        return_exceptions=True
+    )
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+    rss_end = _rss_mb(server_pid)
+    if rss_end is not None:
+        rss_samples.append(rss_end)
+
+    for result in results:
+        if isinstance(result, Exception):
+            recorder.errors[f"CLIENT_{type(result).__name__}"] += 1
+
+    rtts = [rtt for client in recorder.ping_rtts.values() for rtt in client]
+    # Jitter as the mean difference between consecutive pings of the same client (RFC 3550 style)
+    deltas = [abs(b - a) for client in recorder.ping_rtts.values() for a, b in zip(client, client[1:])]
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "completed": recorder.completed,
+        "throughput_per_s": round(recorder.completed / elapsed, 2),
+        "latency": {kind: _percentiles(values) for kind, values in sorted(recorder.latencies.items())},
+        "ping": {
+            **_percentiles(rtts),
+            "jitter_ms": round(statistics.fmean(deltas) * 1000, 2) if deltas else None,
+            "stdev_ms": round(statistics.pstdev(rtts) * 1000, 2) if len(rtts) > 1 else None,
+        },
+        "errors": dict(recorder.errors),
+        "memory_mb": {
+            "start": round(rss_samples[0], 1) if rss_samples else None,
+            "peak": round(max(rss_samples), 1) if rss_samples else None,
+            "end": round(rss_samples[-1], 1) if rss_samples else None,
+            "growth": round(rss_samples[-1] - rss_samples[0], 1) if rss_samples else None,
+        },
+    }
+
+
+def _parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in ("transcript", "audio"):
+            raise argparse.ArgumentTypeError(f"Unknown message type in mix: {kind}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def _print_report(results: dict, baseline: Optional[dict]):
+    print(f"\n{results['completed']} requests in {results['elapsed_s']}s "
+          f"({results['throughput_per_s']}/s), errors: {results['errors'] or 'none'}")
+    print(f"{'type':<20}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}   (ms)")
+    rows = dict(results["latency"], ping=results["ping"])
+    for kind, row in rows.items():
+        line = f"{kind:<20}{row['count']:>8}" + "".join(
+            f"{row[k]:>10.1f}" if row[k] is not None else f"{'-':>10}" for k in ("p50_ms", "p95_ms", "p99_ms")
+        )
+        base = (baseline or {}).get("latency", {}).get(kind) or ((baseline or {}).get("ping") if kind == "ping" else None)
+        if base and base.get("p95_ms") and row["p95_ms"]:
+            line += f"   p95 {100 * (row['p95_ms'] / base['p95_ms'] - 1):+.0f}% vs baseline"
+        print(line)
+    print(f"ping jitter {results['ping']['jitter_ms']} ms, memory {results['memory_mb']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load")
+    parser.add_argument("--mix", type=_parse_mix, default=_parse_mix("transcript=1,audio=1"),
+                        help="Weighted request types, e.g. transcript=3,audio=1")
+    parser.add_argument("--ping-interval", type=float, default=0.5, help="Seconds between pings per client (0 disables)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean seconds between a reply and the next request")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for a reply")
+    parser.add_argument("--clips", default=None, help="Clip directory (default: bundled benchmarks/clips)")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    parser.add_argument("--baseline", help="Earlier --output file to compare p95 latencies against")
+    parser.add_argument("--ready-timeout", type=float, default=300.0)
+    # Passed through to the server
+    parser.add_argument("--agent", choices=("fake", "real"), default="fake")
+    parser.add_argument("--agent-delay", type=float, default=0.2)
+    parser.add_argument("--agent-tokens", type=int, default=20)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--whisper", choices=("fake", "real"), default="fake")
+    parser.add_argument("--whisper-delay", type=float, default=0.02)
+    parser.add_argument("--whisper-rtf", type=float, default=0.05)
+    parser.add_argument("--transcription-cache", action="store_true")
+    args = parser.parse_args()
+
+    # Real Whisper needs real speech; the fake one only needs audio of the right length
+    clip_args = {"synthesize": args.whisper == "fake"}
+    if args.clips:
+        clip_args["directory"] = args.clips
+    clips = load_clips(**clip_args)
+
+    port = _free_port()
+    server_args = [
+        sys.executable, "-m", "benchmarks.bench_server", "--port", str(port),
+        "--agent", args.agent, "--agent-delay", str(args.agent_delay),
+        "--agent-tokens", str(args.agent_tokens), "--token-delay", str(args.token_delay),
+        "--whisper", args.whisper, "--whisper-delay", str(args.whisper_delay), "--whisper-rtf", str(args.whisper_rtf),
+    ] + (["--transcription-cache"] if args.transcription_cache else [])
+    server = subprocess.Popen(server_args, cwd=BACKEND_DIR)
+    try:
+        _wait_ready(port, server, args.ready_timeout)
+        results = asyncio.run(run_load(args, port, server.pid, clips))
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "results": results,
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    _print_report(results, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
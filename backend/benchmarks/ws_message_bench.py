@@ -0,0 +1,84 @@
+"""
+Micro-benchmark of the per-message cost of /ws/dictate sends.
+
+Compares the old path (json.dumps plus an eager f-string INFO log of the full
+payload) with each available codec plus the sampled, truncated message log.
+
+Run from backend/:
+
+    python -m benchmarks.ws_message_bench [--iterations N] [--json]
+"""
+import argparse
+import io
+import json
+import logging
+import time
+
+from app.api.ws_codec import JsonCodec, MsgpackCodec, OrjsonCodec, create_message, msgpack, orjson
+from app.api.ws_logging import MessageLog
+
+PAYLOADS = {
+    "transcript_delta": {"text": "Sure", "sender": "Dictate"},
+    "tool_end": {"tool": "browser_snapshot", "output": "- generic [ref=e2]: " * 10},
+    "transcript": {"id": 42, "sender": "Dictate", "text": "The page lists the following results. " * 60, "timestamp": "2025-01-01T12:00:00"},
+}
+
+
+def _logger() -> logging.Logger:
+    """A logger at INFO writing to memory, standing in for the console handler."""
+    logger = logging.getLogger("ws_message_bench")
+    logger.handlers = [logging.StreamHandler(io.StringIO())]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+def bench_legacy(message_type: str, data: dict, iterations: int, logger: logging.Logger) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        _ = json.dumps(create_message(message_type, data))
+        logger.info(f"Sent {message_type}: {data}")
+    return (time.perf_counter() - started) / iterations
+
+
+def bench_codec(codec, message_type: str, data: dict, iterations: int, logger: logging.Logger) -> float:
+    message_log = MessageLog(logger)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        _ = codec.encode(create_message(message_type, data))
+        message_log.sent(message_type, data)
+    return (time.perf_counter() - started) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    logger = _logger()
+    codecs = [JsonCodec()]
+    if orjson is not None:
+        codecs.append(OrjsonCodec())
+    if msgpack is not None:
+        codecs.append(MsgpackCodec())
+
+    results = {}
+    for message_type, data in PAYLOADS.items():
+        row = {"legacy": bench_legacy(message_type, data, args.iterations, logger)}
+        for codec in codecs:
+            row[codec.name] = bench_codec(codec, message_type, data, args.iterations, logger)
+        results[message_type] = {name: round(seconds * 1e6, 2) for name, seconds in row.items()}
+
+    if args.json:
+        print(json.dumps({"unit": "us_per_message", "iterations": args.iterations, "results": results}))
+        return
+
+    names = list(next(iter(results.values())))
+    print(f"{'message':<20}" + "".join(f"{name:>12}" for name in names) + "   (us/message)")
+    for message_type, row in results.items():
+        print(f"{message_type:<20}" + "".join(f"{row[name]:>12.2f}" for name in names))
+
+
+if __name__ == "__main__":
+    main()
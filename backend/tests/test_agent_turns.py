@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from app.api.agent_turns import AgentTurnTracker, TurnLimitReached
+
+
+def recorder(log, name, gate: asyncio.Event = None):
+    """A turn factory that records its start and end, optionally waiting on gate in between."""
+    async def run():
+        log.append(f"start {name}")
+        if gate is not None:
+            await gate.wait()
+        log.append(f"end {name}")
+    return run
+
+
+async def settle(tracker: AgentTurnTracker):
+    while tracker.turns:
+        await asyncio.sleep(0)
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        AgentTurnTracker("fifo")
+
+
+def test_supersede_cancels_the_running_turn():
+    async def run():
+        log, gate = [], asyncio.Event()
+        tracker = AgentTurnTracker("supersede")
+        tracker.start(recorder(log, "a", gate), "a")
+        await asyncio.sleep(0)
+        superseded = tracker.start(recorder(log, "b"), "b")
+        await settle(tracker)
+        return log, superseded, tracker.get_stats()
+
+    log, superseded, stats = asyncio.run(run())
+    assert superseded == ["a"]
+    assert log == ["start a", "start b", "end b"]
+    assert stats["cancelled"] == 1 and stats["active"] == 0
+
+
+def test_queue_runs_in_order_even_after_a_failure():
+    async def run():
+        log, gate = [], asyncio.Event()
+        tracker = AgentTurnTracker("queue")
+
+        async def failing():
+            log.append("start a")
+            await gate.wait()
+            raise RuntimeError("boom")
+
+        tracker.start(failing, "a")
+        tracker.start(recorder(log, "b"), "b")
+        await asyncio.sleep(0)
+        assert log == ["start a"]
+        gate.set()
+        await settle(tracker)
+        return log
+
+    assert asyncio.run(run()) == ["start a", "start b", "end b"]
+
+
+def test_queue_skips_a_cancelled_turn():
+    async def run():
+        log, gate = [], asyncio.Event()
+        tracker = AgentTurnTracker("queue")
+        tracker.start(recorder(log, "a", gate), "a")
+        tracker.start(recorder(log, "b"), "b")
+        tracker.start(recorder(log, "c"), "c")
+        await asyncio.sleep(0)
+        assert tracker.cancel("b") == ["b"]
+        gate.set()
+        await settle(tracker)
+        return log
+
+    assert asyncio.run(run()) == ["start a", "end a", "start c", "end c"]
+
+
+def test_parallel_turns_overlap_and_are_limited():
+    async def run():
+        log, gate = [], asyncio.Event()
+        tracker = AgentTurnTracker("parallel", max_turns=2)
+        tracker.start(recorder(log, "a", gate), "a")
+        tracker.start(recorder(log, "b", gate), "b")
+        with pytest.raises(TurnLimitReached):
+            tracker.start(recorder(log, "c"), "c")
+        await asyncio.sleep(0)
+        assert log == ["start a", "start b"]
+        gate.set()
+        await settle(tracker)
+        return tracker.get_stats()
+
+    stats = asyncio.run(run())
+    assert stats["started"] == 2 and stats["rejected"] == 1
+
+
+def test_close_cancels_everything_and_refuses_new_turns():
+    async def run():
+        log, gate = [], asyncio.Event()
+        tracker = AgentTurnTracker("parallel")
+        tracker.start(recorder(log, "a", gate), "a")
+        await asyncio.sleep(0)
+        await tracker.close()
+        assert tracker.start(recorder(log, "b"), "b") == []
+        await asyncio.sleep(0)
+        return log, tracker
+
+    log, tracker = asyncio.run(run())
+    assert log == ["start a"]
+    assert tracker.turns == {} and tracker.started == 1
@@ -0,0 +1,61 @@
+import pytest
+
+from app.api.binary_frames import (
+    AUDIO_FORMATS, FRAME_TYPES, FRAME_VERSION, HEADER_SIZE, BinaryFrameError, encode_binary_frame, parse_binary_frame
+)
+
+
+@pytest.mark.parametrize("message_type", sorted(FRAME_TYPES.values()))
+@pytest.mark.parametrize("audio_format", sorted(AUDIO_FORMATS.values()))
+def test_round_trip(message_type, audio_format):
+    frame = parse_binary_frame(encode_binary_frame(message_type, b"\x01\x02\x03", "req-1", audio_format))
+    assert frame.message_type == message_type
+    assert frame.audio_format == audio_format
+    assert frame.correlation_id == "req-1"
+    assert bytes(frame.payload) == b"\x01\x02\x03"
+
+
+def test_payload_is_a_view_into_the_frame():
+    data = bytearray(encode_binary_frame("audio_chunk", b"abcd"))
+    frame = parse_binary_frame(data)
+    data[-1:] = b"z"
+    assert bytes(frame.payload) == b"abcz"
+
+
+def test_no_correlation_id_and_empty_payload():
+    frame = parse_binary_frame(encode_binary_frame("audio_end", b""))
+    assert frame.correlation_id is None
+    assert len(frame.payload) == 0
+
+
+def test_unicode_correlation_id_at_the_length_limit():
+    corr = "é" * 127 + "x"
+    assert len(corr.encode("utf-8")) == 255
+    assert parse_binary_frame(encode_binary_frame("audio", b"", corr)).correlation_id == corr
+    with pytest.raises(BinaryFrameError):
+        encode_binary_frame("audio", b"", corr + "x")
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"\x01\x01\x00",
+    bytes((FRAME_VERSION + 1, 1, 0, 0)),
+    bytes((FRAME_VERSION, 99, 0, 0)),
+    bytes((FRAME_VERSION, 1, 99, 0)),
+    bytes((FRAME_VERSION, 1, 0, 5)) + b"abc",
+    bytes((FRAME_VERSION, 1, 0, 2)) + b"\xff\xfe",
+])
+def test_malformed_headers(data):
+    with pytest.raises(BinaryFrameError):
+        parse_binary_frame(data)
+
+
+def test_unknown_names_are_not_encoded():
+    with pytest.raises(BinaryFrameError):
+        encode_binary_frame("video", b"")
+    with pytest.raises(BinaryFrameError):
+        encode_binary_frame("audio", b"", audio_format="mp3")
+
+
+def test_header_size_matches_layout():
+    assert len(encode_binary_frame("audio", b"")) == HEADER_SIZE
@@ -0,0 +1,102 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.voice_processing import bulk_transcription
+from app.services.voice_processing.audio_decoder import SAMPLE_RATE
+from app.services.voice_processing.bulk_transcription import BulkTranscriptionJob, clip_format, length_batches
+from app.services.voice_processing.engines import pad_batch
+from app.services.voice_processing.transcription_pool import TranscriptionQueueFull
+
+
+def test_pad_batch_pads_and_cuts():
+    batch = pad_batch([np.ones(2, dtype=np.float32), np.full(5, 2.0, dtype=np.float32), np.zeros(0, dtype=np.float32)], 4)
+    assert batch.shape == (3, 4) and batch.dtype == np.float32
+    assert batch[0].tolist() == [1, 1, 0, 0]
+    assert batch[1].tolist() == [2, 2, 2, 2]
+    assert batch[2].tolist() == [0, 0, 0, 0]
+
+
+def test_pad_batch_of_nothing():
+    assert pad_batch([], 4).shape == (0, 4)
+
+
+def test_length_batches_sorts_by_duration():
+    clips = [(name, np.zeros(n, dtype=np.float32)) for name, n in (("c", 30), ("a", 10), ("d", 40), ("b", 20), ("e", 5))]
+    batches = length_batches(clips, 2)
+    assert [[name for name, _ in batch] for batch in batches] == [["e", "a"], ["b", "c"], ["d"]]
+    assert length_batches([], 2) == []
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("clip.F32", "pcm_f32le"),
+    ("dir/clip.s16", "pcm_s16le"),
+    ("clip.raw", "pcm_s16le"),
+    ("clip.webm", "webm"),
+    ("clip", "webm"),
+])
+def test_clip_format(name, expected):
+    assert clip_format(name) == expected
+
+
+class FakeWhisperClient:
+    """Decodes bytes as float32 PCM; the first few pool calls find the queue full."""
+
+    def __init__(self, busy_calls: int = 0):
+        self.pool = SimpleNamespace(workers=2)
+        self.busy_calls = busy_calls
+        self.batches = []
+
+    def _admit(self):
+        if self.busy_calls:
+            self.busy_calls -= 1
+            raise TranscriptionQueueFull("busy")
+
+    async def decode_audio(self, data, audio_format):
+        self._admit()
+        if data == b"corrupt":
+            raise ValueError("not audio")
+        return np.frombuffer(data, dtype=np.float32)
+
+    async def transcribe_batch(self, pcms):
+        self._admit()
+        self.batches.append(len(pcms))
+        return [f"{len(pcm)} samples" for pcm in pcms]
+
+
+def run_job(client, files, batch_size=2):
+    async def stream():
+        for item in files:
+            yield item
+
+    async def run():
+        job = BulkTranscriptionJob(client, batch_size=batch_size, sort_window=4)
+        return job, [line async for line in job.run(stream())]
+
+    return asyncio.run(run())
+
+
+def clip(seconds: float) -> bytes:
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32).tobytes()
+
+
+def test_job_transcribes_and_summarizes():
+    client = FakeWhisperClient()
+    job, lines = run_job(client, [("a.f32", clip(1)), ("bad.webm", b"corrupt"), ("b.f32", clip(0.5)), ("c.f32", clip(2))])
+    results = {line["name"]: line for line in lines if "name" in line}
+    assert results["a.f32"] == {"name": "a.f32", "text": f"{SAMPLE_RATE} samples", "audio_seconds": 1.0}
+    assert results["bad.webm"]["error"].startswith("Decoding failed")
+    summary = lines[-1]["summary"]
+    assert summary["clips"] == 4 and summary["failed"] == 1
+    assert sum(client.batches) == 3
+
+
+def test_full_queue_is_retried_not_failed(monkeypatch):
+    monkeypatch.setattr(bulk_transcription, "QUEUE_RETRY_INITIAL", 0.001)
+    client = FakeWhisperClient(busy_calls=3)
+    job, lines = run_job(client, [("a.f32", clip(0.1)), ("b.f32", clip(0.2))])
+    assert [line.get("error") for line in lines if "name" in line] == [None, None]
+    assert job.queue_full_retries == 3
+    assert lines[-1]["summary"]["failed"] == 0
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from app.services.agent.intent_router import IntentRouter, load_rules, normalize_command
+
+
+@pytest.fixture
+def router():
+    return IntentRouter.from_grammar_file()
+
+
+@pytest.mark.parametrize("spoken, expected", [
+    ("  Okay, please SCROLL   down, thanks. ", "scroll down"),
+    ("Can you go back?", "go back"),
+    ("hey now open youtube dot com please", "open youtube dot com"),
+    ("...", ""),
+])
+def test_normalize_command(spoken, expected):
+    assert normalize_command(spoken) == expected
+
+
+@pytest.mark.parametrize("spoken, rule, tool, arguments", [
+    ("Go back.", "back", "browser_navigate_back", {}),
+    ("forward a page", "forward", "browser_navigate_forward", {}),
+    ("Refresh the page", "reload", "browser_press_key", {"key": "F5"}),
+    ("page down", "scroll_down", "browser_press_key", {"key": "PageDown"}),
+    ("scroll to the top of the page", "scroll_top", "browser_press_key", {"key": "Home"}),
+    ("go down to the bottom", "scroll_bottom", "browser_press_key", {"key": "End"}),
+    ("open a new tab", "new_tab", "browser_tab_new", {}),
+    ("close this tab", "close_tab", "browser_tab_close", {}),
+    ("hit enter", "press_enter", "browser_press_key", {"key": "Enter"}),
+])
+def test_builtin_commands(router, spoken, rule, tool, arguments):
+    match = router.match(spoken)
+    assert (match.rule, match.tool, match.arguments) == (rule, tool, arguments)
+
+
+@pytest.mark.parametrize("spoken, url, host", [
+    ("Open YouTube dot com.", "https://youtube.com", "youtube.com"),
+    ("go to the website news.ycombinator.com", "https://news.ycombinator.com", "news.ycombinator.com"),
+    ("visit http://example.org/docs/intro", "http://example.org/docs/intro", "example.org"),
+])
+def test_open_url(router, spoken, url, host):
+    match = router.match(spoken)
+    assert match.tool == "browser_navigate"
+    assert match.arguments == {"url": url}
+    assert match.reply == f"Opened {host}."
+
+
+@pytest.mark.parametrize("spoken", [
+    "what's the weather",
+    "go back to the search results and open the second one",
+    "open the first link",
+    "scroll down a bit until you see the pricing table",
+])
+def test_everything_else_goes_to_the_agent(router, spoken):
+    assert router.match(spoken) is None
+
+
+def test_ambiguous_commands_go_to_the_agent():
+    router = IntentRouter(load_rules([
+        {"name": "a", "patterns": ["stop"], "tool": "browser_press_key", "arguments": {"key": "Escape"}},
+        {"name": "b", "patterns": ["st.p"], "tool": "browser_close"},
+    ]))
+    assert router.match("stop") is None
+    assert router.get_stats()["ambiguous"] == 1
+
+
+def test_grammar_file_overrides_builtin_rules(tmp_path):
+    path = tmp_path / "grammar.json"
+    path.write_text(json.dumps([
+        {"name": "back", "patterns": ["undo"], "tool": "browser_navigate_back", "reply": "Undone."},
+        {"name": "search", "patterns": [r"search for (?P<query>.+)"], "tool": "browser_navigate",
+         "arguments": {"url": "https://duckduckgo.com/?q={query}"}, "reply": "Searching for {query}."},
+    ]))
+    router = IntentRouter.from_grammar_file(str(path))
+    assert router.match("go back") is None
+    assert router.match("undo").reply == "Undone."
+    match = router.match("Search for cheap flights")
+    assert match.arguments == {"url": "https://duckduckgo.com/?q=cheap flights"}
+    assert match.reply == "Searching for cheap flights."
+
+
+def test_invalid_grammar(tmp_path):
+    with pytest.raises(ValueError):
+        load_rules([{"name": "broken", "patterns": ["("], "tool": "x"}])
+    with pytest.raises(ValueError):
+        load_rules([{"name": "no tool", "patterns": ["x"]}])
+    path = tmp_path / "grammar.json"
+    path.write_text(json.dumps({"name": "not a list"}))
+    with pytest.raises(ValueError):
+        IntentRouter.from_grammar_file(str(path))
+
+
+def test_restrict_to_available_tools(router):
+    router.restrict_to(["browser_navigate", "browser_press_key"])
+    assert router.match("go back") is None
+    assert router.match("scroll down").tool == "browser_press_key"
+
+
+def test_stats(router):
+    match = router.match("scroll up")
+    router.match("what's the weather")
+    router.record(match, 0.02, ok=True)
+    router.record(match, 0.04, ok=False)
+    stats = router.get_stats()
+    assert stats["checked"] == 2 and stats["missed"] == 1
+    assert stats["by_rule"]["scroll_up"] == {"hits": 1, "failed": 1, "mean_ms": 30.0}
@@ -0,0 +1,104 @@
+from types import SimpleNamespace
+
+from app.services.agent.response_cache import (
+    NAVIGATE_TOOL, CachedAnswer, ResponseCache, context_fingerprint, page_after, tool_calls
+)
+
+FINGERPRINT = context_fingerprint("gpt-4o-mini", "prompt", "0.0.41")
+WEATHER = "https://weather.example/today"
+NEWS = "https://news.example/"
+
+
+def navigate(url: str):
+    return (NAVIGATE_TOOL, {"url": url})
+
+
+SNAPSHOT = ("browser_snapshot", {})
+CLICK = ("browser_click", {"ref": "e12"})
+
+
+def test_navigate_then_read_is_served_to_any_connection():
+    cache = ResponseCache(max_entries=8)
+    first = cache.keys("What's the weather?", FINGERPRINT, page_url=None)
+    assert cache.get(first) is None
+    assert cache.put(first, "Sunny, 21 degrees.", [navigate(WEATHER), SNAPSHOT])
+
+    # Another connection, with some other page open, asks the same question
+    later = cache.keys("whats the weather", FINGERPRINT, page_url=NEWS)
+    assert cache.get(later) == CachedAnswer("Sunny, 21 degrees.", WEATHER)
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_answers_about_the_open_page_are_keyed_on_its_url():
+    cache = ResponseCache(max_entries=8)
+    keys = cache.keys("what are the top headlines", FINGERPRINT, page_url=NEWS)
+    assert cache.put(keys, "Three stories.", [SNAPSHOT])
+
+    assert cache.get(cache.keys("What are the top headlines?", FINGERPRINT, page_url=NEWS)) == CachedAnswer("Three stories.")
+    assert cache.get(cache.keys("what are the top headlines", FINGERPRINT, page_url=WEATHER)) is None
+    assert cache.get(cache.keys("what are the top headlines", FINGERPRINT, page_url=None)) is None
+
+
+def test_read_of_an_unknown_page_is_not_cached():
+    cache = ResponseCache(max_entries=8)
+    keys = cache.keys("what are the top headlines", FINGERPRINT, page_url=None)
+    assert not cache.put(keys, "Three stories.", [SNAPSHOT])
+    assert cache.get_stats()["skipped_page"] == 1
+
+
+def test_read_then_navigate_is_not_cached():
+    cache = ResponseCache(max_entries=8)
+    keys = cache.keys("open the top story", FINGERPRINT, page_url=NEWS)
+    assert not cache.put(keys, "Opened.", [SNAPSHOT, navigate(NEWS + "story/1")])
+
+
+def test_side_effects_are_not_cached():
+    cache = ResponseCache(max_entries=8)
+    keys = cache.keys("search for shoes", FINGERPRINT, page_url=NEWS)
+    assert not cache.put(keys, "Done.", [navigate(NEWS), CLICK, SNAPSHOT])
+    assert cache.get_stats()["skipped_side_effects"] == 1
+    assert cache.get(keys) is None
+
+
+def test_context_words_and_disabled_cache_have_no_keys():
+    assert ResponseCache(max_entries=0).keys("what's the weather", FINGERPRINT) is None
+    cache = ResponseCache(max_entries=8)
+    assert cache.keys("read that again", FINGERPRINT, page_url=NEWS) is None
+    assert cache.get_stats()["skipped_context"] == 1
+
+
+def test_fingerprint_change_misses():
+    cache = ResponseCache(max_entries=8)
+    cache.put(cache.keys("what's the weather", FINGERPRINT), "Sunny.", [navigate(WEATHER), SNAPSHOT])
+    other = context_fingerprint("gpt-4o", "prompt", "0.0.41")
+    assert cache.get(cache.keys("what's the weather", other)) is None
+
+
+def test_expiry_and_eviction():
+    cache = ResponseCache(max_entries=2)
+    expired = cache.keys("what's the weather", FINGERPRINT)
+    cache.put(expired, "Sunny.", [], ttl=0)
+    assert cache.get(expired) is None
+    assert cache.get_stats()["expired"] == 1
+
+    for question in ("how far away is the moon", "how tall is everest", "who wrote hamlet"):
+        cache.put(cache.keys(question, FINGERPRINT), question, [])
+    assert cache.get(cache.keys("how far away is the moon", FINGERPRINT)) is None
+    assert cache.get(cache.keys("who wrote hamlet", FINGERPRINT)) == CachedAnswer("who wrote hamlet")
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_page_after_tracks_known_urls():
+    assert page_after([navigate(WEATHER), SNAPSHOT], None) == WEATHER
+    assert page_after([SNAPSHOT], NEWS) == NEWS
+    assert page_after([navigate(WEATHER), CLICK], None) is None
+    assert page_after([("browser_navigate_back", {})], NEWS) is None
+
+
+def test_tool_calls_reads_agent_messages():
+    result = {"messages": [
+        SimpleNamespace(tool_calls=[{"name": NAVIGATE_TOOL, "args": {"url": WEATHER}}]),
+        SimpleNamespace(tool_calls=None),
+        SimpleNamespace(tool_calls=[{"name": "browser_snapshot", "args": {}}]),
+    ]}
+    assert tool_calls(result) == [navigate(WEATHER), SNAPSHOT]
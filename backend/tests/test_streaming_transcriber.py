@@ -0,0 +1,187 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services.voice_processing.audio_decoder import SAMPLE_RATE, decode_audio, is_pcm_format, webm_cluster_starts
+from app.services.voice_processing.streaming_transcriber import StreamingTranscriptionSession
+from app.services.voice_processing.vad import EnergyVAD
+
+UNKNOWN_SIZE = b"\x01\xff\xff\xff\xff\xff\xff\xff"
+
+
+def element(element_id: bytes, payload: bytes = b"", unknown_size: bool = False) -> bytes:
+    size = UNKNOWN_SIZE if unknown_size else b"\x01" + len(payload).to_bytes(7, "big")
+    return element_id + size + payload
+
+
+HEADER = (
+    element(b"\x1a\x45\xdf\xa3", b"\x42\x86\x81\x01")
+    + element(b"\x18\x53\x80\x67", unknown_size=True)
+    + element(b"\x16\x54\xae\x6b", b"tracks")
+)
+
+
+def cluster(pcm: np.ndarray, unknown_size: bool = True) -> bytes:
+    """A cluster whose one SimpleBlock carries raw float32 samples (enough for the fake decoder)."""
+    children = element(b"\xe7", b"\x00") + element(b"\xa3", pcm.astype(np.float32).tobytes())
+    if unknown_size:
+        return element(b"\x1f\x43\xb6\x75", unknown_size=True) + children
+    return element(b"\x1f\x43\xb6\x75", children)
+
+
+def fake_webm_decode(data: bytes) -> np.ndarray:
+    """Decode the test WebM: the samples of every complete SimpleBlock."""
+    assert data.startswith(HEADER), "every decode must start with the stream header"
+    samples = []
+    for start in webm_cluster_starts(data):
+        pos = start + 12
+        while pos + 9 <= len(data) and data[pos:pos + 4] != b"\x1f\x43\xb6\x75":
+            element_id = data[pos:pos + 1]
+            size = int.from_bytes(data[pos + 2:pos + 9], "big")
+            if pos + 9 + size > len(data):
+                break
+            if element_id == b"\xa3":
+                samples.append(np.frombuffer(data[pos + 9:pos + 9 + size], dtype=np.float32))
+            pos += 9 + size
+    return np.concatenate(samples) if samples else np.zeros(0, dtype=np.float32)
+
+
+class FakeWhisperClient:
+    def __init__(self):
+        self.decoded_bytes = 0
+        self.windows = []
+
+    async def decode_audio(self, audio_data, audio_format="webm"):
+        self.decoded_bytes += len(audio_data)
+        if is_pcm_format(audio_format):
+            return decode_audio(audio_data, audio_format)
+        return fake_webm_decode(bytes(audio_data))
+
+    async def transcribe_pcm(self, pcm, initial_prompt=None):
+        self.windows.append(len(pcm))
+        return "word"
+
+
+def speech(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def make_session(client, audio_format="pcm_f32le", **kwargs) -> StreamingTranscriptionSession:
+    return StreamingTranscriptionSession(client, EnergyVAD(min_silence_ms=300), 0.0, audio_format, **kwargs)
+
+
+def test_cluster_starts_of_growing_stream():
+    first, second = cluster(speech(0.1)), cluster(speech(0.1))
+    data = HEADER + first + second
+    assert webm_cluster_starts(data) == [len(HEADER), len(HEADER) + len(first)]
+    # Cut inside the second cluster: both have started
+    assert webm_cluster_starts(data[:-10]) == [len(HEADER), len(HEADER) + len(first)]
+    # Header not complete yet
+    assert webm_cluster_starts(HEADER[:10]) == []
+    assert webm_cluster_starts(HEADER) == []
+
+
+def test_cluster_starts_with_known_sizes():
+    first, second = cluster(speech(0.1), unknown_size=False), cluster(speech(0.1), unknown_size=False)
+    assert webm_cluster_starts(HEADER + first + second) == [len(HEADER), len(HEADER) + len(first)]
+
+
+def test_cluster_starts_rejects_other_data():
+    with pytest.raises(ValueError):
+        webm_cluster_starts(b"RIFF\x00\x00\x00\x00WAVEfmt ")
+
+
+def test_pcm_bytes_are_decoded_once_and_dropped():
+    async def run():
+        client = FakeWhisperClient()
+        session = make_session(client)
+        audio = np.concatenate([speech(0.5), silence(0.5)] * 4)
+        data = audio.tobytes()
+        # Chunks split mid-sample
+        for i in range(0, len(data), 3001):
+            session.add_chunk(data[i:i + 3001])
+            await session.update()
+            assert len(session.buffer) < 4
+        result = await session.update(final=True)
+        return client, session, result, len(data)
+
+    client, session, result, total = asyncio.run(run())
+    assert client.decoded_bytes == total
+    assert result["stable_text"] == " ".join(["word"] * 4)
+    assert session.committed_samples == total // 4
+
+
+def test_webm_clusters_are_decoded_once_their_successor_starts():
+    async def run():
+        client = FakeWhisperClient()
+        session = make_session(client, "webm")
+        session.add_chunk(HEADER)
+        pieces = [speech(0.5), silence(0.5), speech(0.5), silence(0.5)]
+        for piece in pieces:
+            session.add_chunk(cluster(piece))
+            await session.update()
+            # Only the header and the open cluster remain
+            assert webm_cluster_starts(session.buffer) == [len(HEADER)]
+        result = await session.update(final=True)
+        return session, result, sum(len(piece) for piece in pieces)
+
+    session, result, total = asyncio.run(run())
+    assert result["stable_text"] == "word word"
+    assert session.committed_samples == total
+    assert len(session.pcm) == 0
+
+
+def test_open_cluster_is_not_committed_twice():
+    async def run():
+        client = FakeWhisperClient()
+        session = make_session(client, "webm")
+        # One long cluster: its speech closes while the cluster is still open
+        first = cluster(np.concatenate([speech(0.5), silence(0.6)]))
+        session.add_chunk(HEADER + first)
+        partial = await session.update()
+        session.add_chunk(cluster(silence(0.2)))
+        final = await session.update(final=True)
+        return partial, final
+
+    partial, final = asyncio.run(run())
+    assert partial["stable_text"] == "word"
+    assert final["stable_text"] == "word"
+
+
+def test_window_without_pause_is_committed_at_the_limit():
+    async def run():
+        client = FakeWhisperClient()
+        session = make_session(client, max_window_seconds=2.0)
+        for _ in range(6):
+            session.add_chunk(speech(1.0).tobytes())
+            await session.update()
+        return client, session
+
+    client, session = asyncio.run(run())
+    assert session.committed_samples >= 4 * SAMPLE_RATE
+    assert len(session.pcm) < 2 * SAMPLE_RATE
+    assert max(client.windows) <= 2 * SAMPLE_RATE + 1
+
+
+def test_stream_is_exhausted_at_its_length_limit():
+    async def run():
+        session = make_session(FakeWhisperClient(), max_seconds=2.0)
+        session.add_chunk(speech(1.0).tobytes())
+        await session.update()
+        before = session.exhausted
+        session.add_chunk(silence(1.5).tobytes())
+        return before, session.exhausted
+
+    assert asyncio.run(run()) == (False, True)
+
+
+def test_undecodable_webm_buffer_is_capped():
+    session = make_session(FakeWhisperClient(), "webm", max_seconds=1.0)
+    session.add_chunk(b"\x00" * 40000)
+    assert session.exhausted
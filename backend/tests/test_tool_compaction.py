@@ -0,0 +1,107 @@
+from app.services.agent.tool_compaction import (
+    UNCHANGED_SNAPSHOT, ToolOutputCompactor, parse_budgets, prune_snapshot
+)
+
+
+def snapshot(*lines: str) -> str:
+    return "\n".join(lines) + "\n"
+
+
+def test_empty_containers_are_unwrapped():
+    pruned = prune_snapshot(snapshot(
+        "- main [ref=e1]:",
+        "  - generic [ref=e2]:",
+        "    - group:",
+        "      - heading \"Title\" [level=1] [ref=e3]",
+        "      - button \"Buy\" [ref=e4]",
+        "  - link \"Help\" [ref=e5]",
+    ))
+    assert pruned == snapshot(
+        "- main [ref=e1]:",
+        "  - heading \"Title\" [level=1] [ref=e3]",
+        "  - button \"Buy\" [ref=e4]",
+        "  - link \"Help\" [ref=e5]",
+    )
+
+
+def test_nodes_under_a_kept_node_keep_their_relative_indent():
+    pruned = prune_snapshot(snapshot(
+        "- list:",
+        "  - listitem:",
+        "    - link \"A\" [ref=e1]:",
+        "      - /url: /a",
+    ))
+    assert pruned == snapshot("- link \"A\" [ref=e1]:", "  - /url: /a")
+
+
+def test_repeated_subtrees_collapse_into_one_marker_with_their_children():
+    pruned = prune_snapshot(snapshot(
+        "- navigation [ref=e1]:",
+        "  - link \"Story\" [ref=e2]:",
+        "    - /url: /s",
+        "    - img \"thumb\" [ref=e3]",
+        "  - link \"Story\" [ref=e4]:",
+        "    - /url: /s",
+        "    - img \"thumb\" [ref=e5]",
+        "  - link \"Story\" [ref=e6]:",
+        "    - /url: /s",
+        "    - img \"thumb\" [ref=e7]",
+        "  - link \"About\" [ref=e8]",
+    ))
+    assert pruned == snapshot(
+        "- navigation [ref=e1]:",
+        "  - link \"Story\" [ref=e2]:",
+        "    - /url: /s",
+        "    - img \"thumb\" [ref=e3]",
+        "  - (2 similar items omitted)",
+        "  - link \"About\" [ref=e8]",
+    )
+
+
+def test_subtrees_that_differ_below_the_top_are_kept():
+    pruned = prune_snapshot(snapshot(
+        "- link \"Story\" [ref=e1]:",
+        "  - /url: /one",
+        "- link \"Story\" [ref=e2]:",
+        "  - /url: /two",
+    ))
+    assert "/url: /two" in pruned and "omitted" not in pruned
+
+
+def test_repeats_without_refs_are_dropped_silently():
+    pruned = prune_snapshot(snapshot("- text: Sponsored", "- text: Sponsored", "- button \"Next\" [ref=e1]"))
+    assert pruned == snapshot("- text: Sponsored", "- button \"Next\" [ref=e1]")
+
+
+def test_long_urls_are_cut():
+    url = "https://example.com/" + "a" * 200
+    pruned = prune_snapshot(snapshot("- link \"Docs\" [ref=e1]:", f"  - /url: {url}"))
+    assert pruned.endswith("...\n")
+    assert len(pruned.splitlines()[1]) < 100
+
+
+def test_unchanged_snapshot_is_replaced():
+    compactor = ToolOutputCompactor()
+    text = "- Page URL: https://example.com\n```yaml\n- button \"Go\" [ref=e1]\n```"
+    first, digest = compactor.compact("browser_snapshot", text)
+    assert "button \"Go\"" in first and digest is not None
+    second, again = compactor.compact("browser_click", text, previous_snapshot=digest)
+    assert again == digest
+    assert UNCHANGED_SNAPSHOT in second and "button" not in second
+    assert compactor.get_stats()["unchanged_snapshots"] == 1
+
+
+def test_output_is_cut_to_the_tool_budget():
+    compactor = ToolOutputCompactor(default_tokens=10, budgets={"browser_console_messages": 5})
+    text, digest = compactor.compact("browser_evaluate", "word " * 500)
+    assert digest is None
+    assert text.endswith("[... output truncated]") and len(text) < 200
+    short, _ = compactor.compact("browser_console_messages", "word " * 500)
+    assert len(short) < len(text)
+
+
+def test_parse_budgets():
+    assert parse_budgets(" browser_snapshot=3000, ,browser_click = 100") == {
+        "browser_snapshot": 3000, "browser_click": 100
+    }
+    assert parse_budgets("") == {}
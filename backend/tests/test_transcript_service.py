@@ -0,0 +1,85 @@
+from app.services.transcript.transcript_service import TranscriptService
+
+
+def texts(page):
+    return [m["text"] for m in page["items"]]
+
+
+def stop_writer(service: TranscriptService):
+    """Stop the background writer so that further messages stay pending (id None)."""
+    service._queue.put(None)
+    service._writer.join()
+
+
+def test_memory_pages_newest_first():
+    service = TranscriptService()
+    for i in range(1, 6):
+        service.store_transcript(f"m{i}")
+
+    first = service.get_page(limit=2)
+    assert texts(first) == ["m5", "m4"]
+    second = service.get_page(limit=2, before_id=first["next_before_id"])
+    assert texts(second) == ["m3", "m2"]
+    last = service.get_page(limit=2, before_id=second["next_before_id"])
+    assert texts(last) == ["m1"]
+    assert last["next_before_id"] is None
+
+
+def test_committed_pages(tmp_path):
+    service = TranscriptService(db_path=str(tmp_path / "t.db"), flush_interval=0.01)
+    for i in range(1, 5):
+        service.store_transcript(f"m{i}")
+    service.flush()
+
+    first = service.get_page(limit=2)
+    assert texts(first) == ["m4", "m3"]
+    second = service.get_page(limit=2, before_id=first["next_before_id"])
+    assert texts(second) == ["m2", "m1"]
+    assert service.get_page(limit=2, before_id=second["next_before_id"])["items"] == []
+    service.close()
+
+
+def test_pending_messages_lead_the_first_page(tmp_path):
+    service = TranscriptService(db_path=str(tmp_path / "t.db"), flush_interval=0.01)
+    for i in range(1, 4):
+        service.store_transcript(f"m{i}")
+    service.flush()
+    stop_writer(service)
+    service.store_transcript("pending")
+
+    first = service.get_page(limit=2)
+    assert texts(first) == ["pending", "m3"]
+    assert first["next_before_id"] == first["items"][1]["id"]
+    assert texts(service.get_page(limit=2, before_id=first["next_before_id"])) == ["m2", "m1"]
+
+
+def test_first_page_of_only_pending_messages_has_a_cursor(tmp_path):
+    service = TranscriptService(db_path=str(tmp_path / "t.db"), flush_interval=0.01)
+    for i in range(1, 4):
+        service.store_transcript(f"m{i}")
+    service.flush()
+    stop_writer(service)
+    service.store_transcript("p1")
+    service.store_transcript("p2")
+
+    first = service.get_page(limit=2)
+    assert texts(first) == ["p2", "p1"]
+    assert all(m["id"] is None for m in first["items"])
+    assert first["next_before_id"] is not None
+
+    second = service.get_page(limit=2, before_id=first["next_before_id"])
+    assert texts(second) == ["m3", "m2"]
+    last = service.get_page(limit=2, before_id=second["next_before_id"])
+    assert texts(last) == ["m1"]
+    assert last["next_before_id"] is None
+
+
+def test_only_pending_messages_and_empty_history(tmp_path):
+    service = TranscriptService(db_path=str(tmp_path / "t.db"), flush_interval=0.01)
+    stop_writer(service)
+    service.store_transcript("p1")
+
+    page = service.get_page(limit=1)
+    assert texts(page) == ["p1"]
+    # Nothing is committed, so there is nothing further back
+    assert page["next_before_id"] is None
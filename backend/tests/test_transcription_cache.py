@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+from app.services.voice_processing.transcription_cache import TranscriptionCache, _DiskTier, cache_key
+
+
+def test_cache_key_covers_audio_model_and_options():
+    key = cache_key(b"audio", "base", {"language": "en", "beam_size": 0})
+    assert key == cache_key(bytearray(b"audio"), "base", {"beam_size": 0, "language": "en"})
+    assert key != cache_key(b"audio!", "base", {"language": "en", "beam_size": 0})
+    assert key != cache_key(b"audio", "small", {"language": "en", "beam_size": 0})
+    assert key != cache_key(b"audio", "base", {"language": "de", "beam_size": 0})
+
+
+def test_lru_eviction():
+    async def run():
+        cache = TranscriptionCache(max_entries=2)
+        await cache.put("a", "A")
+        await cache.put("b", "B")
+        assert await cache.get("a") == "A"
+        await cache.put("c", "C")
+        return cache, await cache.get("a"), await cache.get("b"), await cache.get("c")
+
+    cache, a, b, c = asyncio.run(run())
+    # "a" was used more recently than "b", so "b" went
+    assert (a, b, c) == ("A", None, "C")
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_expiry(monkeypatch):
+    async def run():
+        cache = TranscriptionCache(max_entries=4, ttl=10)
+        await cache.put("a", "A")
+        later = time.time() + 11
+        monkeypatch.setattr(time, "time", lambda: later)
+        return cache, await cache.get("a")
+
+    cache, hit = asyncio.run(run())
+    assert hit is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    async def run():
+        cache = TranscriptionCache(max_entries=0, disk_path=str(tmp_path / "cache.db"))
+        await cache.put("a", "A")
+        return cache, await cache.get("a")
+
+    cache, hit = asyncio.run(run())
+    assert hit is None
+    assert cache.get_stats()["disk_path"] is None
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+
+    async def run():
+        await TranscriptionCache(max_entries=4, disk_path=path).put("a", "A")
+        restarted = TranscriptionCache(max_entries=4, disk_path=path)
+        return restarted, await restarted.get("a"), await restarted.get("a")
+
+    cache, first, second = asyncio.run(run())
+    assert first == second == "A"
+    stats = cache.get_stats()
+    assert (stats["disk_hits"], stats["memory_hits"]) == (1, 1)
+
+
+def test_disk_prune_drops_expired_then_oldest_rows(tmp_path):
+    disk = _DiskTier(str(tmp_path / "cache.db"), max_rows=2, ttl=100)
+    now = time.time()
+    disk.put("expired", "x", now - 200)
+    for i, key in enumerate(("old", "mid", "new")):
+        disk.put(key, key, now - 30 + i)
+    disk.prune()
+    assert disk.get("expired", 0) is None
+    assert disk.get("old", 0) is None
+    assert disk.get("mid", 0)[0] == "mid" and disk.get("new", 0)[0] == "new"
+    assert disk.evictions == 2
+
+
+def test_disk_prunes_every_few_writes(tmp_path):
+    disk = _DiskTier(str(tmp_path / "cache.db"), max_rows=3)
+    now = time.time()
+    for i in range(_DiskTier.PRUNE_EVERY):
+        disk.put(f"k{i}", "t", now + i)
+    count = disk._conn.execute("SELECT COUNT(*) FROM transcriptions").fetchone()[0]
+    assert count == 3
+
+
+def test_disk_get_honours_ttl(tmp_path):
+    disk = _DiskTier(str(tmp_path / "cache.db"))
+    disk.put("a", "A", time.time() - 50)
+    assert disk.get("a", 100)[0] == "A"
+    assert disk.get("a", 10) is None
+    # The expired row was deleted on the way
+    assert disk.get("a", 0) is None
@@ -0,0 +1,99 @@
+import asyncio
+import struct
+
+import numpy as np
+import pytest
+
+from app.services.voice_processing.engines import DecodeOptions, EngineSpec
+from app.services.voice_processing.transcription_daemon import (
+    MAX_HEADER_BYTES, DaemonUnavailable, TranscriptionDaemon, TranscriptionDaemonClient, read_frame, write_frame
+)
+
+
+class BufferWriter:
+    """Collects what write_frame writes."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+
+
+def reader_for(data: bytes) -> asyncio.StreamReader:
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+async def read_one(data: bytes):
+    return await read_frame(reader_for(data))
+
+
+def test_frame_round_trip():
+    async def run():
+        writer = BufferWriter()
+        pcm = np.arange(4, dtype=np.float32)
+        write_frame(writer, {"id": 1, "op": "transcribe_pcm"}, pcm.data)
+        write_frame(writer, {"id": 2, "op": "ping"})
+        reader = reader_for(bytes(writer.data))
+        first = await read_frame(reader)
+        second = await read_frame(reader)
+        return first, second
+
+    (header, payload), (ping, empty) = asyncio.run(run())
+    assert header == {"id": 1, "op": "transcribe_pcm"}
+    # A typed memoryview is sent as its bytes, not its element count
+    assert np.array_equal(np.frombuffer(payload, dtype=np.float32), np.arange(4, dtype=np.float32))
+    assert ping == {"id": 2, "op": "ping"} and empty == b""
+
+
+def test_oversized_frame_is_refused():
+    frame = struct.pack("!II", MAX_HEADER_BYTES + 1, 0)
+    with pytest.raises(ValueError):
+        asyncio.run(read_one(frame))
+
+
+def test_truncated_frame():
+    writer = BufferWriter()
+    write_frame(writer, {"id": 1}, b"\x00" * 16)
+    with pytest.raises(asyncio.IncompleteReadError):
+        asyncio.run(read_one(bytes(writer.data[:-1])))
+
+
+def test_pcm_requests_are_writable():
+    daemon = TranscriptionDaemon("unused.sock", EngineSpec("whisper", "tiny", DecodeOptions()))
+
+    async def run():
+        pcm = np.ones(8, dtype=np.float32)
+        task = asyncio.create_task(daemon._transcribe({"op": "transcribe_pcm"}, pcm.tobytes()))
+        job = await daemon._queue.get()
+        job.future.set_result(("ok", None))
+        return job.pcm, await task
+
+    pcm, response = asyncio.run(run())
+    assert pcm.flags.writeable
+    assert response == {"text": "ok", "escalation": None}
+
+
+def test_client_times_out_and_backs_off(tmp_path):
+    socket_path = str(tmp_path / "daemon.sock")
+
+    async def run():
+        # A daemon that accepts requests and never answers
+        async def handle(reader, writer):
+            await reader.read()
+
+        server = await asyncio.start_unix_server(handle, path=socket_path)
+        client = TranscriptionDaemonClient(socket_path, retry_interval=60, timeout=0.05)
+        async with server:
+            with pytest.raises(DaemonUnavailable):
+                await client.request("ping")
+            # Within the retry interval, requests fail without waiting on the daemon
+            with pytest.raises(DaemonUnavailable, match="recently"):
+                await client.request("ping")
+        return client
+
+    client = asyncio.run(run())
+    assert client._pending == {}
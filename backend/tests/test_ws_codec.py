@@ -0,0 +1,86 @@
+import io
+import logging
+
+import pytest
+
+from app.api import ws_codec
+from app.api.ws_codec import (
+    JsonCodec, OrjsonCodec, create_message, is_msgpack_message, json_codec, negotiate_codec
+)
+from app.api.ws_logging import MessageLog
+
+
+def test_default_is_stdlib_json():
+    codec = negotiate_codec(None)
+    assert type(codec) is JsonCodec
+    assert not codec.binary
+
+
+def test_unknown_codecs_fall_back_to_json():
+    assert type(negotiate_codec("protobuf")) is JsonCodec
+    assert type(json_codec("yaml")) is JsonCodec
+
+
+def test_orjson_falls_back_when_missing(monkeypatch):
+    monkeypatch.setattr(ws_codec, "orjson", None)
+    assert type(negotiate_codec(None, default="orjson")) is JsonCodec
+
+
+def test_msgpack_refused_when_missing(monkeypatch):
+    monkeypatch.setattr(ws_codec, "msgpack", None)
+    assert type(negotiate_codec("msgpack", default="json")) is JsonCodec
+
+
+def test_orjson_matches_json_wire_format():
+    pytest.importorskip("orjson")
+    codec = negotiate_codec(None, default="orjson")
+    assert isinstance(codec, OrjsonCodec)
+    message = create_message("transcript", {"text": "héllo"}, message_id="m1")
+    assert codec.decode(codec.encode(message)) == JsonCodec().decode(JsonCodec().encode(message))
+
+
+def test_msgpack_round_trip():
+    pytest.importorskip("msgpack")
+    codec = negotiate_codec("msgpack")
+    assert codec.binary
+    frame = codec.encode(create_message("ping", {}))
+    assert is_msgpack_message(frame)
+    assert codec.decode(frame)["type"] == "ping"
+
+
+def test_msgpack_marker_detection():
+    assert is_msgpack_message(b"\x81\xa4type")
+    assert is_msgpack_message(b"\xde\x00\x10")
+    assert not is_msgpack_message(b"")
+    # Binary audio frames start with the frame version byte
+    assert not is_msgpack_message(b"\x01\x00\x00")
+
+
+def message_logger(level: int):
+    stream = io.StringIO()
+    logger = logging.getLogger(f"test_ws_codec.{level}")
+    logger.handlers = [logging.StreamHandler(stream)]
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger, stream
+
+
+def test_message_log_uses_the_message_level():
+    logger, stream = message_logger(logging.INFO)
+    log = MessageLog(logger, sample_every=2)
+    log.received("text", 10)
+    log.sent("transcript", {"text": "x" * 500})
+    # Frequent types log at DEBUG, which this logger drops
+    log.received("audio_chunk", 3200)
+    lines = stream.getvalue().splitlines()
+    assert lines[0] == "Received text message (10 bytes)"
+    assert lines[1].startswith("Sent transcript:") and len(lines[1]) < 250
+    assert len(lines) == 2
+
+
+def test_message_log_samples_frequent_types():
+    logger, stream = message_logger(logging.DEBUG)
+    log = MessageLog(logger, sample_every=3)
+    for _ in range(7):
+        log.received("audio_chunk", 3200)
+    assert stream.getvalue().count("Received audio_chunk") == 3
@@ -1,28 +1,75 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useWebSocket } from '../hooks/useWebSocket';
 import { useVoiceRecording } from '../hooks/useVoiceRecording';
 import { useTranscript } from '../hooks/useTranscript';
 import { useAgent } from '../hooks/useAgent';
+import { encodeAudioFrame } from '../lib/audioFrames';
 
 const Conversation: React.FC = () => {
   const [inputText, setInputText] = useState('');
   const [isTranscribing, setIsTranscribing] = useState(false);
-  const { isConnected, sendMessage, onMessage, offMessage } = useWebSocket();
-  const { 
+  const [partialText, setPartialText] = useState('');
+  // Agent reply being streamed token by token, and the tool it is currently using
+  const [agentDraft, setAgentDraft] = useState('');
+  const [activeTool, setActiveTool] = useState<string | null>(null);
+  const { isConnected, sendMessage, sendBinary, onMessage, offMessage } = useWebSocket();
+  // Correlation id of the utterance currently being streamed
+  const streamIdRef = useRef<string | null>(null);
+  // Serializes chunk reads so chunks reach the server in recording order
+  const sendQueueRef = useRef<Promise<void>>(Promise.resolve());
+
+  const {
     isRecording, 
     isSupported, 
     startRecording, 
     stopRecording, 
-    getAudioBlob, 
     error: voiceError 
-  } = useVoiceRecording();
+  } = useVoiceRecording({
+    onChunk: (chunk) => {
+      const streamId = streamIdRef.current;
+      if (!streamId) return;
+      sendQueueRef.current = sendQueueRef.current.then(async () => {
+        sendBinary(encodeAudioFrame('audio_chunk', await chunk.arrayBuffer(), streamId));
+      });
+    },
+    onStop: () => {
+      const streamId = streamIdRef.current;
+      if (!streamId) return;
+      streamIdRef.current = null;
+      setIsTranscribing(true);
+      sendQueueRef.current = sendQueueRef.current.then(() => {
+        sendBinary(encodeAudioFrame('audio_end', new ArrayBuffer(0), streamId));
+      });
+    }
+  });
   const { messages, addMessage, messagesEndRef } = useTranscript();
   const { sendUserMessage, sendDictateMessage } = useAgent();
 
   useEffect(() => {
     const handleMessage = (message: any) => {
       if (message.type === 'transcript') {
+        // Final transcript (or transcription error) ends the streamed utterance
+        setPartialText('');
+        setIsTranscribing(false);
+        if (message.data.sender === 'Dictate') {
+          setAgentDraft('');
+          setActiveTool(null);
+        }
         addMessage(message.data);
+      } else if (message.type === 'partial_transcript') {
+        setPartialText(message.data.text);
+      } else if (message.type === 'transcript_delta') {
+        setAgentDraft(prev => prev + message.data.text);
+      } else if (message.type === 'tool_start') {
+        // Text streamed before a tool call is intermediate reasoning, not the answer
+        setAgentDraft('');
+        setActiveTool(message.data.tool);
+      } else if (message.type === 'tool_end') {
+        setActiveTool(null);
+      } else if (message.type === 'agent_cancelled') {
+        // Superseded by a newer utterance or stopped by the user; drop the partial reply
+        setAgentDraft('');
+        setActiveTool(null);
       } else if (message.type === 'cleared') {
         // TODO: Clear messages if needed
         // addMessage({ sender: 'System', text: 'Messages cleared', timestamp: new Date().toISOString() });
@@ -48,39 +95,12 @@ const Conversation: React.FC = () => {
     setInputText('');
   };
 
-  const sendAudioMessage = async (audioBlob: Blob) => {
-    setIsTranscribing(true);
-    
-    try {
-      // Convert audio blob to base64
-      const arrayBuffer = await audioBlob.arrayBuffer();
-      const base64Audio = btoa(String.fromCharCode(...new Uint8Array(arrayBuffer)));
-      
-      // Send audio message via WebSocket
-      sendMessage('audio', {
-        audio_data: base64Audio
-      });
-      
-    } catch (error) {
-      console.error('Error sending audio message:', error);
-      addMessage({
-        sender: 'Dictate',
-        text: `Audio transmission failed: ${error instanceof Error ? error.message : 'Unknown error'}`,
-        timestamp: new Date().toISOString()
-      });
-    } finally {
-      setIsTranscribing(false);
-    }
-  };
-
-  const handleVoiceRecording = async () => {
+  const handleVoiceRecording = () => {
     if (isRecording) {
       stopRecording();
-      const audioBlob = getAudioBlob();
-      if (audioBlob) {
-        await sendAudioMessage(audioBlob);
-      }
     } else {
+      streamIdRef.current = Math.random().toString(36).substr(2, 9);
+      setPartialText('');
       startRecording();
     }
   };
@@ -124,6 +144,25 @@ const Conversation: React.FC = () => {
             </div>
           ))
         )}
+        {partialText && (
+          <div className="flex justify-end">
+            <div className="max-w-xs px-3 py-2 rounded-lg bg-blue-600/60 text-white italic">
+              <div className="text-sm">{partialText}</div>
+            </div>
+          </div>
+        )}
+        {(agentDraft || activeTool) && (
+          <div className="flex justify-start">
+            <div className="max-w-xs px-3 py-2 rounded-lg bg-gray-700/60 text-gray-100">
+              <div className="flex justify-between items-center text-xs font-medium opacity-75 mb-1">
+                <span>Dictate</span>
+                <button onClick={() => sendMessage('cancel', {})} className="hover:text-red-400">Stop</button>
+              </div>
+              {activeTool && <div className="text-xs italic opacity-75">Using {activeTool}...</div>}
+              {agentDraft && <div className="text-sm">{agentDraft}</div>}
+            </div>
+          </div>
+        )}
         <div ref={messagesEndRef} />
       </div>
 
@@ -9,7 +9,14 @@ interface UseVoiceRecordingReturn {
   error: string | null;
 }
 
-export const useVoiceRecording = (): UseVoiceRecordingReturn => {
+interface UseVoiceRecordingOptions {
+  // Called with each 100ms chunk as it is recorded (for streaming transcription)
+  onChunk?: (chunk: Blob) => void;
+  // Called once the recorder has flushed its last chunk
+  onStop?: () => void;
+}
+
+export const useVoiceRecording = (options: UseVoiceRecordingOptions = {}): UseVoiceRecordingReturn => {
   const [isRecording, setIsRecording] = useState(false);
   const [isSupported, setIsSupported] = useState(false);
   const [error, setError] = useState<string | null>(null);
@@ -17,6 +24,8 @@ export const useVoiceRecording = (): UseVoiceRecordingReturn => {
   const mediaRecorderRef = useRef<MediaRecorder | null>(null);
   const audioChunksRef = useRef<Blob[]>([]);
   const streamRef = useRef<MediaStream | null>(null);
+  const optionsRef = useRef(options);
+  optionsRef.current = options;
 
   const checkSupport = useCallback(() => {
     const supported = !!(navigator.mediaDevices && navigator.mediaDevices.getUserMedia);
@@ -50,9 +59,14 @@ export const useVoiceRecording = (): UseVoiceRecordingReturn => {
       mediaRecorderRef.current.ondataavailable = (event) => {
         if (event.data.size > 0) {
           audioChunksRef.current.push(event.data);
+          optionsRef.current.onChunk?.(event.data);
         }
       };
       
+      mediaRecorderRef.current.onstop = () => {
+        optionsRef.current.onStop?.();
+      };
+      
       mediaRecorderRef.current.start(100); // Collect data every 100ms
       setIsRecording(true);
       
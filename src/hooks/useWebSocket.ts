@@ -11,6 +11,7 @@ interface WebSocketMessage {
 interface UseWebSocketReturn {
   isConnected: boolean;
   sendMessage: (type: string, data: any, correlationId?: string) => void;
+  sendBinary: (data: ArrayBuffer) => void;
   onMessage: (callback: (message: WebSocketMessage) => void) => void;
   offMessage: (callback: (message: WebSocketMessage) => void) => void;
 }
@@ -84,6 +85,15 @@ export const useWebSocket = (url: string = 'ws://127.0.0.1:8000/ws/dictate'): Us
     wsRef.current.send(JSON.stringify(message));
   }, []);
 
+  const sendBinary = useCallback((data: ArrayBuffer) => {
+    if (!wsRef.current || wsRef.current.readyState !== WebSocket.OPEN) {
+      console.error('WebSocket is not connected');
+      return;
+    }
+
+    wsRef.current.send(data);
+  }, []);
+
   const onMessage = useCallback((callback: (message: WebSocketMessage) => void) => {
     messageCallbacks.current.add(callback);
   }, []);
@@ -107,6 +117,7 @@ export const useWebSocket = (url: string = 'ws://127.0.0.1:8000/ws/dictate'): Us
   return {
     isConnected,
     sendMessage,
+    sendBinary,
     onMessage,
     offMessage
   };
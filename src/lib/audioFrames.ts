@@ -0,0 +1,47 @@
+// Binary websocket frames for /ws/dictate audio (see backend/app/api/binary_frames.py)
+const FRAME_VERSION = 1;
+
+const FRAME_TYPES = {
+  audio: 1,
+  audio_chunk: 2,
+  audio_end: 3,
+} as const;
+
+const AUDIO_FORMATS = {
+  webm: 0,
+  pcm_f32le: 1,
+  pcm_s16le: 2,
+} as const;
+
+export type AudioFrameType = keyof typeof FRAME_TYPES;
+export type AudioFormat = keyof typeof AUDIO_FORMATS;
+
+// The header stores the correlation id length in one byte
+const MAX_CORRELATION_BYTES = 255;
+
+// UTF-8 encode, cutting at a character boundary so the backend can always decode it
+const encodeCorrelationId = (correlationId: string): Uint8Array => {
+  const bytes = new TextEncoder().encode(correlationId);
+  if (bytes.length <= MAX_CORRELATION_BYTES) return bytes;
+  let end = MAX_CORRELATION_BYTES;
+  // Continuation bytes (10xxxxxx) belong to the character that starts before them
+  while (end > 0 && (bytes[end] & 0xc0) === 0x80) end--;
+  return bytes.slice(0, end);
+};
+
+export const encodeAudioFrame = (
+  type: AudioFrameType,
+  payload: ArrayBuffer,
+  correlationId?: string,
+  format: AudioFormat = 'webm'
+): ArrayBuffer => {
+  const corr = encodeCorrelationId(correlationId ?? '');
+  const frame = new Uint8Array(4 + corr.length + payload.byteLength);
+  frame[0] = FRAME_VERSION;
+  frame[1] = FRAME_TYPES[type];
+  frame[2] = AUDIO_FORMATS[format];
+  frame[3] = corr.length;
+  frame.set(corr, 4);
+  frame.set(new Uint8Array(payload), 4 + corr.length);
+  return frame.buffer;
+};